@@ -0,0 +1,33 @@
+import os
+
+_multiprocess_can_split_ = True
+
+called = []
+
+def record(what):
+    called.append(what)
+    log = os.environ.get('NOSE_AFFINITY_LOG')
+    if log:
+        f = open(log, 'a')
+        try:
+            f.write('%s %s\n' % (what, os.getpid()))
+        finally:
+            f.close()
+
+def setup():
+    record('setup')
+
+def teardown():
+    record('teardown')
+
+def test_one():
+    assert called[-1:] == ['setup'], called
+
+def test_two():
+    assert called[-1:] == ['setup'], called
+
+def test_three():
+    assert called[-1:] == ['setup'], called
+
+def test_four():
+    assert called[-1:] == ['setup'], called
@@ -0,0 +1,13 @@
+_multiprocess_can_split_ = True
+
+def teardown():
+    raise RuntimeError("teardown of held module failed")
+
+def test_fail():
+    assert False
+
+def test_two():
+    pass
+
+def test_three():
+    pass
@@ -0,0 +1,5 @@
+from imp_lib_a import value
+
+
+def test_a():
+    assert value() == 1
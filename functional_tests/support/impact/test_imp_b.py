@@ -0,0 +1,3 @@
+def test_b():
+    import imp_lib_b
+    assert imp_lib_b.value() == 2
@@ -0,0 +1,14 @@
+# each test must run in a worker that has run no other test
+ran = []
+
+def test_one():
+    ran.append(1)
+    assert len(ran) == 1, ran
+
+def test_two():
+    ran.append(2)
+    assert len(ran) == 1, ran
+
+def test_three():
+    ran.append(3)
+    assert len(ran) == 1, ran
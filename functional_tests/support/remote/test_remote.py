@@ -0,0 +1,9 @@
+def test_one():
+    pass
+
+def test_two():
+    pass
+
+class TestClass:
+    def test_three(self):
+        pass
@@ -0,0 +1,13 @@
+called = []
+
+def setup():
+    called.append('setup')
+
+def test_one():
+    pass
+
+def test_two():
+    pass
+
+def teardown():
+    called.append('teardown')
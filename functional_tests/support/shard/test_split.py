@@ -0,0 +1,15 @@
+_multiprocess_can_split_ = True
+
+called = []
+
+def setup():
+    called.append('setup')
+
+def test_x():
+    pass
+
+def test_y():
+    pass
+
+def test_z():
+    pass
@@ -0,0 +1,7 @@
+import time
+
+def test_fast():
+    pass
+
+def test_hang():
+    time.sleep(60)
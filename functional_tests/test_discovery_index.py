@@ -0,0 +1,119 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from nose.config import Config
+from nose.loader import TestLoader
+from nose.plugins import Plugin, PluginManager
+from nose.suite import ContextSuite
+
+
+def write(path, text):
+    f = open(path, 'w')
+    try:
+        f.write(text)
+    finally:
+        f.close()
+
+
+def touch(path):
+    # move the modification time on, however coarse the file system's
+    # timestamps are
+    later = os.stat(path).st_mtime + 10
+    os.utime(path, (later, later))
+
+
+class TestDiscoveryIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.tests = os.path.join(self.dir, 'tests')
+        self.sub = os.path.join(self.tests, 'sub_tests')
+        os.makedirs(self.sub)
+        self.marker = os.path.join(self.dir, 'imported')
+        write(os.path.join(self.tests, 'test_idx_a.py'),
+              "def test_a():\n    pass\n")
+        write(os.path.join(self.tests, 'test_idx_empty.py'),
+              "open(%r, 'w').close()\n" % self.marker)
+        write(os.path.join(self.sub, 'test_idx_b.py'),
+              "def test_b():\n    pass\n")
+        self.index = os.path.join(self.dir, 'index')
+
+    def tearDown(self):
+        for name in list(sys.modules.keys()):
+            if name.startswith('test_idx_') or name.startswith('idx_'):
+                del sys.modules[name]
+        shutil.rmtree(self.dir)
+
+    def collect(self, plugins=()):
+        config = Config(discoveryIndex=self.index,
+                        plugins=PluginManager(plugins=plugins))
+        loader = TestLoader(config=config)
+        names = []
+        def walk(test):
+            if isinstance(test, ContextSuite) or hasattr(test, '__iter__'):
+                for t in test:
+                    walk(t)
+            else:
+                names.append(str(test))
+        walk(loader.loadTestsFromDir(self.tests))
+        names.sort()
+        return names
+
+    def test_warm_run_uses_index(self):
+        assert self.collect() == ['test_idx_a.test_a', 'test_idx_b.test_b']
+        assert os.path.exists(self.index)
+        assert os.path.exists(self.marker)
+
+        # the module with no tests is not imported again
+        os.unlink(self.marker)
+        assert self.collect() == ['test_idx_a.test_a', 'test_idx_b.test_b']
+        assert not os.path.exists(self.marker)
+
+        # a new module in a subdirectory is found
+        write(os.path.join(self.sub, 'test_idx_c.py'),
+              "def test_c():\n    pass\n")
+        touch(self.sub)
+        assert self.collect() == ['test_idx_a.test_a', 'test_idx_b.test_b',
+                                  'test_idx_c.test_c']
+
+        # a module that gains tests is imported again
+        del sys.modules['test_idx_empty']
+        empty = os.path.join(self.tests, 'test_idx_empty.py')
+        write(empty, "def test_d():\n    pass\n")
+        touch(empty)
+        assert self.collect() == ['test_idx_a.test_a', 'test_idx_b.test_b',
+                                  'test_idx_c.test_c',
+                                  'test_idx_empty.test_d']
+
+    def test_star_imported_tests(self):
+        lib = os.path.join(self.tests, 'idx_lib.py')
+        write(lib, "def helper():\n    pass\n")
+        write(os.path.join(self.tests, 'test_idx_star.py'),
+              "from idx_lib import *\n")
+        assert self.collect() == ['test_idx_a.test_a', 'test_idx_b.test_b']
+        # as in a new run
+        del sys.modules['idx_lib']
+        del sys.modules['test_idx_star']
+        write(lib, "def helper():\n    pass\ndef test_star():\n    pass\n")
+        touch(lib)
+        assert 'test_idx_star.test_star' in self.collect()
+
+    def test_plugin_selection_not_indexed(self):
+        class Skip(Plugin):
+            enabled = True
+            skip = True
+            def wantFile(self, file):
+                if self.skip and file.endswith('test_idx_a.py'):
+                    return False
+        plug = Skip()
+        assert self.collect([plug]) == ['test_idx_b.test_b']
+        # eg. run again with other plugin options
+        plug.skip = False
+        assert self.collect([plug]) == ['test_idx_a.test_a',
+                                        'test_idx_b.test_b']
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from nose.config import Config
+from nose.loader import TestLoader
+from nose.scanner import DirectoryScanner, listDirectory
+from nose.suite import ContextSuite
+from nose.util import regex_last_key
+
+
+def write(path, text):
+    f = open(path, 'w')
+    try:
+        f.write(text)
+    finally:
+        f.close()
+
+
+class TestDiscoveryThreads(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.tests = os.path.join(self.dir, 'tests')
+        for sub in ('a_tests', 'b_tests', os.path.join('b_tests', 'c_tests'),
+                    'thr_pak', '_hidden_tests'):
+            os.makedirs(os.path.join(self.tests, sub))
+        write(os.path.join(self.tests, 'thr_pak', '__init__.py'), '')
+        for sub, name in (('', 'test_thr_z'), ('', 'test_thr_a'),
+                          ('', 'helper_thr'),
+                          ('a_tests', 'test_thr_in_a'),
+                          ('b_tests', 'test_thr_in_b'),
+                          (os.path.join('b_tests', 'c_tests'),
+                           'test_thr_in_c'),
+                          ('thr_pak', 'test_thr_pak'),
+                          ('_hidden_tests', 'test_thr_hidden')):
+            write(os.path.join(self.tests, sub, name + '.py'),
+                  "def test():\n    pass\n")
+
+    def tearDown(self):
+        for name in list(sys.modules.keys()):
+            if name.startswith('test_thr_') or name.startswith('thr_pak'):
+                del sys.modules[name]
+        shutil.rmtree(self.dir)
+
+    def collect(self, threads):
+        config = Config(discoveryThreads=threads)
+        loader = TestLoader(config=config)
+        names = []
+        def walk(test):
+            if isinstance(test, ContextSuite) or hasattr(test, '__iter__'):
+                for t in test:
+                    walk(t)
+            else:
+                names.append(str(test))
+        walk(loader.loadTestsFromDir(self.tests))
+        assert loader.scanner is None
+        return names
+
+    def test_same_order_with_threads(self):
+        serial = self.collect(0)
+        self.assertEqual(serial, ['thr_pak.test_thr_pak.test',
+                                  'test_thr_in_a.test',
+                                  'test_thr_in_c.test',
+                                  'test_thr_in_b.test',
+                                  'test_thr_a.test',
+                                  'test_thr_z.test'])
+        self.assertEqual(self.collect(3), serial)
+
+    def test_scanner_stopped_when_abandoned(self):
+        loader = TestLoader(config=Config(discoveryThreads=2))
+        tests = loader.loadTestsFromDir(self.tests)
+        tests.next()
+        assert loader.scanner is not None
+        threads = loader.scanner.threads
+        tests.close()
+        assert loader.scanner is None
+        self.assertEqual([t for t in threads if t.isAlive()], [])
+        self.assertEqual(loader._dirDepth, 0)
+
+    def test_scanner_listing(self):
+        key = regex_last_key(Config().testMatch)
+        scanner = DirectoryScanner(2, key)
+        try:
+            scanner.prefetch(self.tests)
+            scanner.prefetch(os.path.join(self.dir, 'missing'))
+            listing = scanner.listing(self.tests)
+            self.assertEqual(listing, listDirectory(self.tests, key))
+            self.assertEqual(
+                [name for path, name, is_file, is_dir, is_package
+                 in listing],
+                ['helper_thr.py', 'thr_pak', '_hidden_tests', 'a_tests',
+                 'b_tests', 'test_thr_a.py', 'test_thr_z.py'])
+            self.assertEqual(
+                [(is_file, is_dir, is_package) for
+                 path, name, is_file, is_dir, is_package in listing][:4],
+                [(True, False, False), (False, True, True),
+                 (False, True, False), (False, True, False)])
+            # listed once only
+            self.assertEqual(scanner.listing(self.tests), None)
+            self.assertEqual(
+                scanner.listing(os.path.join(self.dir, 'missing')), None)
+        finally:
+            scanner.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
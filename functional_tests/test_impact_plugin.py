@@ -0,0 +1,111 @@
+import optparse
+import os
+import pickle
+import re
+import shutil
+import tempfile
+import unittest
+from nose.config import Config
+from nose.plugins import PluginTester
+from nose.plugins.impact import Impact
+
+support = os.path.join(os.path.dirname(__file__), 'support', 'impact')
+tmp = tempfile.mkdtemp()
+record = os.path.join(tmp, 'impact')
+
+
+def tearDownModule():
+    shutil.rmtree(tmp)
+teardown = tearDownModule
+
+
+class ImpactTester(PluginTester):
+    plugins = [Impact()]
+    suitepath = support
+
+    def ran(self):
+        return re.findall(r'^(\S+) \.\.\. ok$', str(self.output), re.M)
+
+    def changed(self, *paths):
+        filename = os.path.join(tmp, 'changed')
+        f = open(filename, 'w')
+        try:
+            for path in paths:
+                f.write(os.path.join(support, path) + '\n')
+        finally:
+            f.close()
+        return filename
+
+
+class TestImpactRecord(ImpactTester, unittest.TestCase):
+    activate = '--with-impact'
+    args = ['-v', '--impact-file=%s' % record]
+
+    def runTest(self):
+        print str(self.output)
+        self.assertEqual(self.ran(), ['test_imp_a.test_a',
+                                      'test_imp_b.test_b',
+                                      'test_imp_plain.test_plain'])
+        f = open(record, 'rb')
+        try:
+            deps = pickle.load(f)['deps']
+        finally:
+            f.close()
+        def names(test):
+            for key in deps:
+                if key.endswith(test):
+                    return [os.path.basename(dep) for dep in deps[key]]
+        self.assertEqual(names('test_imp_a.py'),
+                         ['imp_lib_a.py', 'test_imp_a.py'])
+        self.assertEqual(names('test_imp_b.py'),
+                         ['imp_lib_b.py', 'test_imp_b.py'])
+        self.assertEqual(names('test_imp_plain.py'), ['test_imp_plain.py'])
+
+
+class TestImpactSelect(ImpactTester, unittest.TestCase):
+    args = ['-v', '--impact-file=%s' % record]
+
+    def setUp(self):
+        self.activate = '--impact-changed=%s' % self.changed('imp_lib_b.py')
+        ImpactTester.setUp(self)
+
+    def runTest(self):
+        print str(self.output)
+        self.assertEqual(self.ran(), ['test_imp_b.test_b'])
+
+
+class TestImpactSelectChangedTest(ImpactTester, unittest.TestCase):
+    args = ['-v', '--impact-file=%s' % record]
+
+    def setUp(self):
+        self.activate = '--impact-changed=%s' % self.changed(
+            'test_imp_plain.py', 'README.txt')
+        ImpactTester.setUp(self)
+
+    def runTest(self):
+        print str(self.output)
+        self.assertEqual(self.ran(), ['test_imp_plain.test_plain'])
+
+
+class TestImpactOptions(unittest.TestCase):
+
+    def configured(self, workers):
+        parser = optparse.OptionParser()
+        plug = Impact()
+        plug.addOptions(parser, {})
+        options, args = parser.parse_args(
+            ['--with-impact', '--impact-file=%s' % record])
+        options.multiprocess_workers = workers
+        plug.configure(options, Config())
+        return plug
+
+    def test_multiprocess_workers(self):
+        # NOSE_PROCESSES gives a string
+        assert self.configured('0').recording
+        assert self.configured(0).recording
+        assert not self.configured('2').recording
+        assert not self.configured('auto').recording
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -230,6 +230,47 @@ class TestNoseTestLoader(unittest.TestCase):
                   'test_pak.teardown']
         self.assertEqual(m.state, expect, diff(expect, m.state))
 
+    def test_multiple_names_grouped_by_module(self):
+        class Imports:
+            enabled = True
+            imported = []
+            def beforeImport(self, filename, module):
+                self.imported.append(module)
+        imports = Imports()
+        res = unittest.TestResult()
+        wd = os.path.join(support, 'package2')
+        l = loader.TestLoader(
+            config=Config(plugins=PluginManager(plugins=[imports])),
+            workingDir=wd)
+        suite = l.loadTestsFromNames(
+            ['test_pak.test_mod:test_add',
+             'test_pak.test_sub.test_mod:TestMaths.test_div',
+             'test_pak.test_mod:test_minus',
+             'test_pak.test_mod:test_nothing',
+             'test_pak.test_nomod:test_add'])
+        self.assertEqual(imports.imported,
+                         ['test_pak.test_mod', 'test_pak.test_sub.test_mod'])
+        suite(res)
+        self.assertEqual(res.testsRun, 5)
+        self.assertEqual(len(res.errors), 2)
+        m = sys.modules['test_pak']
+        expect = ['test_pak.setup',
+                  'test_pak.test_mod.setup',
+                  'test_pak.test_mod.test_add',
+                  'test_pak.test_mod.test_minus',
+                  'test_pak.test_mod.teardown',
+                  'test_pak.test_sub.setup',
+                  'test_pak.test_sub.test_mod.setup',
+                  'test_pak.test_sub.test_mod.TestMaths.setup_class',
+                  'test_pak.test_sub.test_mod.TestMaths.setup',
+                  'test_pak.test_sub.test_mod.TestMaths.test_div',
+                  'test_pak.test_sub.test_mod.TestMaths.teardown',
+                  'test_pak.test_sub.test_mod.TestMaths.teardown_class',
+                  'test_pak.test_sub.test_mod.teardown',
+                  'test_pak.test_sub.teardown',
+                  'test_pak.teardown']
+        self.assertEqual(m.state, expect, diff(expect, m.state))
+
     def test_fixture_context_multiple_names_some_common_ancestors(self):
         stream = _WritelnDecorator(StringIO())
         res = _TextTestResult(stream, 0, 2)
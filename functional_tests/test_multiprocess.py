@@ -0,0 +1,177 @@
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import unittest
+from nose.plugins import PluginTester
+from nose.plugins.skip import SkipTest
+from nose.plugins.multiprocess import MultiProcess
+
+support = os.path.join(os.path.dirname(__file__), 'support')
+
+
+def setup():
+    try:
+        import multiprocessing
+        if 'active' in MultiProcess.status:
+            raise SkipTest("Multiprocess plugin is active. Skipping tests of "
+                           "plugin itself.")
+    except ImportError:
+        raise SkipTest("multiprocessing module not available")
+
+
+class MPTestBase(PluginTester, unittest.TestCase):
+    activate = '--processes=2'
+    plugins = [MultiProcess()]
+
+    def tearDown(self):
+        # don't leave the plugin marked active for other tests
+        MultiProcess.status.pop('active', None)
+
+
+class TestProcessTestTimeout(MPTestBase):
+    args = ['-v', '--process-test-timeout=1']
+    suitepath = os.path.join(support, 'timeout')
+
+    def runTest(self):
+        print str(self.output)
+        assert "TimedOutException" in self.output
+        assert "test_timeout.test_hang ... ERROR" in self.output
+        assert "test_timeout.test_hang did not finish" in self.output
+        assert "test_timeout.test_fast ... ok" in self.output
+        assert "Ran 2 tests" in self.output
+        assert "FAILED (errors=1)" in self.output
+
+
+def free_port():
+    sock = socket.socket()
+    try:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+    finally:
+        sock.close()
+
+
+class TestRemoteWorkers(MPTestBase):
+    # no local workers: only the remote worker can run the tests
+    activate = '--processes=0'
+    authkey = 'functional-test'
+    suitepath = os.path.join(support, 'remote')
+
+    def setUp(self):
+        address = '127.0.0.1:%s' % free_port()
+        self.args = ['-v', '--process-listen=%s' % address,
+                     '--process-authkey=%s' % self.authkey]
+        env = os.environ.copy()
+        env['PYTHONPATH'] = os.path.dirname(os.path.dirname(__file__))
+        self.worker = subprocess.Popen(
+            [sys.executable, '-c', 'import nose; nose.run_exit()',
+             '--processes=2', '--process-connect=%s' % address,
+             '--process-authkey=%s' % self.authkey],
+            cwd=self.suitepath, env=env)
+        MPTestBase.setUp(self)
+
+    def tearDown(self):
+        self.worker.wait()
+        MPTestBase.tearDown(self)
+
+    def runTest(self):
+        print str(self.output)
+        assert "test_remote.test_one ... ok" in self.output
+        assert "test_remote.TestClass.test_three ... ok" in self.output
+        assert "Ran 3 tests" in self.output
+        assert str(self.output).strip().endswith('OK')
+
+
+class TestRemoteWorkersNeverConnect(MPTestBase):
+    activate = '--processes=0'
+    suitepath = os.path.join(support, 'remote')
+
+    def setUp(self):
+        self.args = ['-v', '--process-timeout=1',
+                     '--process-listen=127.0.0.1:%s' % free_port(),
+                     '--process-authkey=functional-test']
+        MPTestBase.setUp(self)
+
+    def runTest(self):
+        print str(self.output)
+        assert "No test runner process returned results" in self.output
+        assert "FAILED (errors=" in self.output
+
+
+class AffinityTester(MPTestBase):
+    suitepath = os.path.join(support, 'affinity')
+
+    def setUp(self):
+        fd, self.log = tempfile.mkstemp()
+        os.close(fd)
+        os.environ['NOSE_AFFINITY_LOG'] = self.log
+        try:
+            MPTestBase.setUp(self)
+        finally:
+            del os.environ['NOSE_AFFINITY_LOG']
+
+    def tearDown(self):
+        os.unlink(self.log)
+        MPTestBase.tearDown(self)
+
+    def fixtures(self):
+        """The (fixture, worker pid) of each module fixture run."""
+        f = open(self.log)
+        try:
+            return [tuple(line.split()) for line in f]
+        finally:
+            f.close()
+
+
+class TestProcessAffinity(AffinityTester):
+    args = ['-v', '--process-affinity']
+
+    def runTest(self):
+        print str(self.output)
+        assert "Ran 4 tests" in self.output
+        assert str(self.output).strip().endswith('OK')
+        # the module is set up and torn down once, by the one worker
+        # that runs all of its batches
+        fixtures = self.fixtures()
+        self.assertEqual([name for name, pid in fixtures],
+                         ['setup', 'teardown'])
+        self.assertEqual(fixtures[0][1], fixtures[1][1])
+
+
+class TestProcessNoAffinity(AffinityTester):
+    activate = '--processes=1'
+    args = ['-v']
+
+    def runTest(self):
+        print str(self.output)
+        assert "Ran 4 tests" in self.output
+        assert str(self.output).strip().endswith('OK')
+        # each batch sets the module up again after the one before
+        # tore it down
+        names = [name for name, pid in self.fixtures()]
+        assert len(names) > 2, names
+        self.assertEqual(names, ['setup', 'teardown'] * (len(names) // 2))
+
+
+class TestProcessAffinityStopped(MPTestBase):
+    activate = '--processes=1'
+    args = ['-v', '-x', '--process-affinity']
+    suitepath = os.path.join(support, 'affinity_stop')
+
+    def runTest(self):
+        print str(self.output)
+        # the worker tears down the module it held when it stops
+        assert "teardown of held module failed" in self.output
+
+
+class TestProcessRestartAfter(MPTestBase):
+    activate = '--processes=1'
+    args = ['-v', '--process-restart-after=1']
+    suitepath = os.path.join(support, 'recycle')
+
+    def runTest(self):
+        print str(self.output)
+        assert "Ran 3 tests" in self.output
+        assert str(self.output).strip().endswith('OK')
@@ -0,0 +1,52 @@
+import os
+import re
+import sys
+import unittest
+from nose.plugins import PluginTester
+from nose.plugins.shard import Shard
+
+support = os.path.join(os.path.dirname(__file__), 'support', 'shard')
+
+
+class ShardTester(PluginTester):
+    plugins = [Shard()]
+    suitepath = support
+    args = ['-v']
+
+    def ran(self):
+        return re.findall(r'^(\S+) \.\.\. ok$', str(self.output), re.M)
+
+
+class TestShardOne(ShardTester, unittest.TestCase):
+    activate = '--shard=1/2'
+
+    def runTest(self):
+        print str(self.output)
+        TestShardOne.tests = self.ran()
+
+
+class TestShardTwo(ShardTester, unittest.TestCase):
+    activate = '--shard=2/2'
+
+    def runTest(self):
+        print str(self.output)
+        one = TestShardOne.tests
+        two = self.ran()
+        assert one and two, (one, two)
+        both = one + two
+        both.sort()
+        assert both == [
+            'test_fixtures.test_one', 'test_fixtures.test_two',
+            'test_funcs.test_a', 'test_funcs.test_b',
+            'test_funcs.test_c', 'test_funcs.test_d',
+            'test_split.test_x', 'test_split.test_y',
+            'test_split.test_z'], both
+        # a module with fixtures is kept whole
+        assert (('test_fixtures.test_one' in one)
+                == ('test_fixtures.test_two' in one)), (one, two)
+        # its fixtures ran once, on its shard
+        assert sys.modules['test_fixtures'].called == ['setup', 'teardown']
+        # fixtures of a module that can be split run on every shard
+        # that has some of its tests
+        split = sys.modules['test_split'].called
+        assert split.count('setup') >= 1
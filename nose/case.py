@@ -1,6 +1,11 @@
 """nose unittest.TestCase subclasses. It is not necessary to subclass these
 classes when writing tests; they are used internally by nose.loader.TestLoader
 to create test cases from test functions and methods in test classes.
+
+A loaded suite keeps one or two of these objects alive for each test, so
+they are kept small: their own attributes are slots, and the empty cleanup
+list and the type equality functions that unittest.TestCase gives every
+instance are shared until a test adds to them.
 """
 import logging
 import sys
@@ -15,8 +20,43 @@ log = logging.getLogger(__name__)
 
 __all__ = ['Test']
 
+# shared by test cases until they add to them
+_no_cleanups = []
+_type_equality_funcs = None
+
 
-class Test(unittest.TestCase):
+class CompactCase(unittest.TestCase):
+    """Base class that shares the per-instance state unittest.TestCase
+    sets up but nose's test cases rarely use.
+    """
+    __test__ = False # do not collect
+    __slots__ = ()
+
+    def __init__(self, *arg, **kw):
+        global _type_equality_funcs
+        unittest.TestCase.__init__(self, *arg, **kw)
+        d = self.__dict__
+        if d.get('_cleanups') == []:
+            d['_cleanups'] = _no_cleanups
+        funcs = d.get('_type_equality_funcs')
+        if funcs is not None:
+            if _type_equality_funcs is None:
+                _type_equality_funcs = funcs
+            elif funcs == _type_equality_funcs:
+                d['_type_equality_funcs'] = _type_equality_funcs
+
+    def addCleanup(self, *arg, **kw):
+        if self._cleanups is _no_cleanups:
+            self._cleanups = []
+        return unittest.TestCase.addCleanup(self, *arg, **kw)
+
+    def addTypeEqualityFunc(self, typeobj, function):
+        if self._type_equality_funcs is _type_equality_funcs:
+            self._type_equality_funcs = dict(_type_equality_funcs)
+        return unittest.TestCase.addTypeEqualityFunc(self, typeobj, function)
+
+
+class Test(CompactCase):
     """The universal test case wrapper.
 
     When a plugin sees a test, it will always see an instance of this
@@ -24,6 +64,9 @@ class Test(unittest.TestCase):
     test property of the nose.case.Test instance.
     """
     __test__ = False # do not collect
+    __slots__ = ('test', 'config', 'tbinfo', 'capturedOutput',
+                 'resultProxy', 'plugins', 'passed')
+
     def __init__(self, test, config=None, resultProxy=None):
         # sanity check
         if not callable(test):
@@ -39,7 +82,7 @@ class Test(unittest.TestCase):
         self.resultProxy = resultProxy
         self.plugins = config.plugins
         self.passed = None
-        unittest.TestCase.__init__(self)
+        CompactCase.__init__(self)
 
     def __call__(self, *arg, **kwarg):
         return self.run(*arg, **kwarg)
@@ -125,8 +168,9 @@ class Test(unittest.TestCase):
         test before it is called and do cleanup after it is
         called. They are called unconditionally.
         """
-        if self.resultProxy:
-            result = self.resultProxy(result, self)
+        proxy = self.resultProxy
+        if proxy:
+            result = proxy(result, self)
         try:
             try:
                 self.beforeTest(result)
@@ -138,6 +182,9 @@ class Test(unittest.TestCase):
                 result.addError(self, err)
         finally:
             self.afterTest(result)
+            release = getattr(proxy, 'release', None)
+            if release is not None:
+                release(result)
 
     def runTest(self, result):
         """Run the test. Plugins may alter the test by returning a
@@ -175,10 +222,11 @@ class Test(unittest.TestCase):
         return desc
 
 
-class TestBase(unittest.TestCase):
+class TestBase(CompactCase):
     """Common functionality for FunctionTestCase and MethodTestCase.
     """
     __test__ = False # do not collect
+    __slots__ = ('test', 'arg', 'descriptor')
 
     def id(self):
         return str(self)
@@ -203,6 +251,7 @@ class FunctionTestCase(TestBase):
     create test cases for test functions.
     """
     __test__ = False # do not collect
+    __slots__ = ('setUpFunc', 'tearDownFunc')
 
     def __init__(self, test, setUp=None, tearDown=None, arg=tuple(),
                  descriptor=None):
@@ -301,6 +350,7 @@ class MethodTestCase(TestBase):
     create test cases for test methods.
     """
     __test__ = False # do not collect
+    __slots__ = ('method', 'cls', 'inst')
 
     def __init__(self, method, test=None, arg=tuple(), descriptor=None):
         """Initialize the MethodTestCase.
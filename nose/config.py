@@ -147,6 +147,8 @@ class Config(object):
       self.configSection = 'nosetests'
       self.debug = env.get('NOSE_DEBUG')
       self.debugLog = env.get('NOSE_DEBUG_LOG')
+      self.discoveryIndex = env.get('NOSE_DISCOVERY_INDEX')
+      self.discoveryThreads = int(env.get('NOSE_DISCOVERY_THREADS', 0))
       self.exclude = None
       self.getTestCaseNamesCompat = False
       self.includeExe = env.get('NOSE_INCLUDE_EXE',
@@ -161,11 +163,14 @@ class Config(object):
       self.options = NoOptions()
       self.parser = None
       self.plugins = NoPlugins()
+      self.pluginProfile = env.get('NOSE_PLUGIN_PROFILE', False)
+      self.pluginProfileFile = env.get('NOSE_PLUGIN_PROFILE_FILE')
       self.srcDirs = ('lib', 'src')
       self.runOnInit = True
       self.stopOnError = env.get('NOSE_STOP', False)
       self.stream = sys.stderr
       self.testNames = ()
+      self.watch = env.get('NOSE_WATCH', False)
       self.verbosity = int(env.get('NOSE_VERBOSE', 1))
       self.where = ()
       self.py3where = ()
@@ -182,6 +187,8 @@ class Config(object):
         self.configSection = 'nosetests'
         self.debug = env.get('NOSE_DEBUG')
         self.debugLog = env.get('NOSE_DEBUG_LOG')
+        self.discoveryIndex = env.get('NOSE_DISCOVERY_INDEX')
+        self.discoveryThreads = int(env.get('NOSE_DISCOVERY_THREADS', 0))
         self.exclude = None
         self.getTestCaseNamesCompat = False
         self.includeExe = env.get('NOSE_INCLUDE_EXE',
@@ -196,11 +203,14 @@ class Config(object):
         self.options = NoOptions()
         self.parser = None
         self.plugins = NoPlugins()
+        self.pluginProfile = env.get('NOSE_PLUGIN_PROFILE', False)
+        self.pluginProfileFile = env.get('NOSE_PLUGIN_PROFILE_FILE')
         self.srcDirs = ('lib', 'src')
         self.runOnInit = True
         self.stopOnError = env.get('NOSE_STOP', False)
         self.stream = sys.stderr
         self.testNames = []
+        self.watch = env.get('NOSE_WATCH', False)
         self.verbosity = int(env.get('NOSE_VERBOSE', 1))
         self.where = ()
         self.py3where = ()
@@ -301,6 +311,7 @@ class Config(object):
 
         self.addPaths = options.addPaths
         self.stopOnError = options.stopOnError
+        self.watch = options.watch
         self.verbosity = options.verbosity
         self.includeExe = options.includeExe
         self.traverseNamespace = options.traverseNamespace
@@ -308,6 +319,15 @@ class Config(object):
         self.debugLog = options.debugLog
         self.loggingConfig = options.loggingConfig
         self.firstPackageWins = options.firstPackageWins
+        if options.discoveryIndex:
+            self.discoveryIndex = os.path.abspath(
+                os.path.expanduser(options.discoveryIndex))
+        self.discoveryThreads = options.discoveryThreads
+        self.pluginProfile = options.pluginProfile
+        if options.pluginProfileFile:
+            self.pluginProfile = True
+            self.pluginProfileFile = os.path.abspath(
+                os.path.expanduser(options.pluginProfileFile))
         self.configureLogging()
 
         if options.where is not None:
@@ -542,6 +562,40 @@ class Config(object):
             help="nose's importer will normally evict a package from sys."
             "modules if it sees a package with the same name in a different "
             "location. Set this option to disable that behavior.")
+        parser.add_option(
+            "--discovery-index", action="store",
+            default=self.discoveryIndex, dest="discoveryIndex",
+            metavar="FILE",
+            help="Record what is found in each directory while looking for "
+            "tests in FILE, and use the record instead of examining "
+            "directories and modules that haven't changed since. "
+            "[NOSE_DISCOVERY_INDEX]")
+        parser.add_option(
+            "--discovery-threads", action="store", type="int",
+            default=self.discoveryThreads, dest="discoveryThreads",
+            metavar="NUM",
+            help="List the directories to be searched for tests in NUM "
+            "background threads, while tests from other directories are "
+            "loaded. Useful on slow or network file systems. "
+            "[NOSE_DISCOVERY_THREADS]")
+        parser.add_option(
+            "--watch", action="store_true", dest="watch",
+            default=self.watch,
+            help="Keep running after the tests have run, and run again the "
+            "tests affected by each change to the python source files "
+            "they were loaded and imported from. [NOSE_WATCH]")
+        parser.add_option(
+            "--plugin-profile", action="store_true", dest="pluginProfile",
+            default=self.pluginProfile,
+            help="Count the calls made to each plugin and time them, and "
+            "report the plugins that took the most time at the end of the "
+            "test run. [NOSE_PLUGIN_PROFILE]")
+        parser.add_option(
+            "--plugin-profile-file", action="store",
+            dest="pluginProfileFile", default=self.pluginProfileFile,
+            metavar="FILE",
+            help="Also write the plugin call times to FILE as JSON. "
+            "Implies --plugin-profile. [NOSE_PLUGIN_PROFILE_FILE]")
 
         self.plugins.loadPlugins()
         self.pluginOpts(parser)
@@ -13,8 +13,10 @@ from nose.loader import defaultTestLoader
 from nose.plugins.manager import PluginManager, DefaultPluginManager, \
      RestrictedPluginManager
 from nose.result import TextTestResult
+from nose.selector import defaultSelector
 from nose.suite import FinalizingSuiteWrapper
 from nose.util import isclass, tolist
+from nose.watch import Watcher
 
 
 log = logging.getLogger('nose.core')
@@ -196,10 +198,43 @@ class TestProgram(unittest.TestProgram):
             self.testRunner = plug_runner
         result = self.testRunner.run(self.test)
         self.success = result.wasSuccessful()
+        if self.config.watch:
+            self.watchTests()
         if self.exit:
             sys.exit(not self.success)
         return self.success
 
+    def watchTests(self):
+        """Run again the tests affected by each change to the watched
+        source files, until interrupted. Sets self.success to the outcome
+        of the last run.
+        """
+        roots = [self.config.workingDir]
+        for name in self.testNames:
+            path = os.path.abspath(name.split(':')[0])
+            if os.path.isdir(path):
+                roots.append(path)
+            elif os.path.exists(path):
+                roots.append(os.path.dirname(path))
+        selector = getattr(self.testLoader, 'selector', None)
+        if selector is None:
+            selector = defaultSelector(self.config)
+        watcher = Watcher(roots, selector)
+        stream = self.config.stream
+        try:
+            while True:
+                watcher.snapshot()
+                stream.write("Watching for changes; interrupt to stop\n")
+                names = watcher.wait()
+                stream.write("\n")
+                log.debug("Running again: %s", names)
+                self.config.plugins.begin()
+                self.test = self.testLoader.loadTestsFromNames(names)
+                result = self.testRunner.run(self.test)
+                self.success = result.wasSuccessful()
+        except KeyboardInterrupt:
+            stream.write("\n")
+
     def showPlugins(self):
         """Print list of available plugins.
         """
@@ -17,11 +17,20 @@ class Importer(object):
     """An importer class that does only path-specific imports. That
     is, the given module is not searched for on sys.path, but only at
     the path or in the directory specified.
+
+    Modules found in a directory are remembered (up to cacheSize of them),
+    so that the packages above each test module are not searched for again
+    for every module in them. A remembered module is used only while it is
+    still the one in sys.modules.
     """
+    cacheSize = 1000
+
     def __init__(self, config=None):
         if config is None:
             config = Config()
         self.config = config
+        self._found = {}
+        self._modPaths = {}
 
     def importFromPath(self, path, fqname):
         """Import a dotted-name package whose tail is at path. In other words,
@@ -45,8 +54,6 @@ class Importer(object):
         dir = os.path.normpath(os.path.abspath(dir))
         log.debug("Import %s from %s", fqname, dir)
 
-        # FIXME reimplement local per-dir cache?
-        
         # special case for __main__
         if fqname == '__main__':
             return sys.modules[fqname]
@@ -57,37 +64,22 @@ class Importer(object):
         path = [dir]
         parts = fqname.split('.')
         part_fqname = ''
-        mod = parent = fh = None
+        mod = parent = None
 
         for part in parts:
             if part_fqname == '':
                 part_fqname = part
             else:
                 part_fqname = "%s.%s" % (part_fqname, part)
-            try:
-                acquire_lock()
-                log.debug("find module part %s (%s) in %s",
-                          part, part_fqname, path)
-                fh, filename, desc = find_module(part, path)
-                old = sys.modules.get(part_fqname)
-                if old is not None:
-                    # test modules frequently have name overlap; make sure
-                    # we get a fresh copy of anything we are trying to load
-                    # from a new path
-                    log.debug("sys.modules has %s as %s", part_fqname, old)
-                    if (self.sameModule(old, filename)
-                        or (self.config.firstPackageWins and
-                            getattr(old, '__path__', None))):
-                        mod = old
-                    else:
-                        del sys.modules[part_fqname]
-                        mod = load_module(part_fqname, fh, filename, desc)
-                else:
-                    mod = load_module(part_fqname, fh, filename, desc)
-            finally:
-                if fh:
-                    fh.close()
-                release_lock()
+            key = (part_fqname, tuple(path))
+            mod = self._found.get(key)
+            if mod is not None and sys.modules.get(part_fqname) is mod:
+                log.debug("%s found in %s before", part_fqname, path)
+            else:
+                mod = self.importPart(part, part_fqname, path)
+                if len(self._found) >= self.cacheSize:
+                    self._found.clear()
+                self._found[key] = mod
             if parent:
                 setattr(parent, part, mod)
             if hasattr(mod, '__path__'):
@@ -95,7 +87,43 @@ class Importer(object):
             parent = mod
         return mod
 
-    def sameModule(self, mod, filename):
+    def importPart(self, part, fqname, path):
+        """Import the module part, named fqname, from the directories in
+        path.
+        """
+        fh = None
+        try:
+            acquire_lock()
+            log.debug("find module part %s (%s) in %s",
+                      part, fqname, path)
+            fh, filename, desc = find_module(part, path)
+            old = sys.modules.get(fqname)
+            if old is not None:
+                # test modules frequently have name overlap; make sure
+                # we get a fresh copy of anything we are trying to load
+                # from a new path
+                log.debug("sys.modules has %s as %s", fqname, old)
+                if (self.sameModule(old, filename)
+                    or (self.config.firstPackageWins and
+                        getattr(old, '__path__', None))):
+                    return old
+                del sys.modules[fqname]
+            return load_module(fqname, fh, filename, desc)
+        finally:
+            if fh:
+                fh.close()
+            release_lock()
+
+    def modulePaths(self, mod):
+        """The normalized directories that mod was loaded from.
+        """
+        name = getattr(mod, '__name__', None)
+        # a package's __path__ may be changed after it is imported
+        where = (tuple(getattr(mod, '__path__', None) or ()),
+                 getattr(mod, '__file__', None))
+        cached = self._modPaths.get(name)
+        if cached is not None and cached[0] is mod and cached[1] == where:
+            return cached[2]
         mod_paths = []
         if hasattr(mod, '__path__'):
             for path in mod.__path__:
@@ -106,7 +134,14 @@ class Importer(object):
             mod_paths.append(os.path.dirname(
                 os.path.normpath(
                 os.path.abspath(mod.__file__))))
-        else:
+        if len(self._modPaths) >= self.cacheSize:
+            self._modPaths.clear()
+        self._modPaths[name] = (mod, where, mod_paths)
+        return mod_paths
+
+    def sameModule(self, mod, filename):
+        mod_paths = self.modulePaths(mod)
+        if not mod_paths:
             # builtin or other module-like object that
             # doesn't have __file__; must be new
             return False
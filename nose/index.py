@@ -0,0 +1,198 @@
+"""
+Implements the discovery index, an on-disk record of what the test loader
+found in each directory on earlier runs (see the ``--discovery-index``
+option). While a directory is unchanged, the loader uses the index instead
+of listing the directory and asking the selector about each entry, and does
+not import discovered modules that had no tests in them.
+
+Directory entries are checked by modification time: a directory listing is
+used only if neither the directory nor any of its subdirectories has changed
+since it was recorded, and a module is known to have no tests only while
+neither it nor the modules it imports have changed. The whole index is
+discarded when the test selection settings or the set of enabled plugins
+change. Plugin options aren't part of those settings, so the loader asks
+the selector again about indexed entries when an enabled plugin selects
+files or directories, and doesn't skip modules when an enabled plugin takes
+part in loading tests from them.
+"""
+import logging
+import os
+import pickle
+import sys
+from nose.util import module_dependencies, src
+
+log = logging.getLogger(__name__)
+
+__all__ = ['DiscoveryIndex']
+
+
+class DiscoveryIndex(object):
+    """Directory listings and empty modules recorded by the test loader,
+    stored in filename. Each listing is a list of (path, is_file, is_dir,
+    is_package, wanted) tuples, one per entry of the directory, in the
+    order the loader visits them.
+
+    A module with no tests is recorded with the modification times of the
+    files of the modules it imports, or that the classes and functions it
+    imports come from (see nose.util.module_dependencies), so that tests
+    star-imported from a module that changes later are found. Modules it
+    imports only inside functions aren't checked.
+    """
+    version = 2
+
+    def __init__(self, filename, config):
+        self.filename = filename
+        self.config = config
+        self.signature = None
+        self.dirs = {}
+        self.empty = {}
+        self.changed = False
+        self.loaded = False
+
+    def makeSignature(self, config):
+        """The settings that decide which files and modules are wanted.
+        """
+        def patterns(regexes):
+            return [getattr(r, 'pattern', r) for r in regexes or ()]
+        plugins = [getattr(p, 'name', p.__class__.__name__)
+                   for p in getattr(config.plugins, 'plugins', ())]
+        plugins.sort()
+        return repr((self.version, sys.version_info[:2],
+                     patterns([config.testMatch]),
+                     patterns(config.include), patterns(config.exclude),
+                     patterns(config.ignoreFiles), bool(config.includeExe),
+                     bool(config.traverseNamespace), plugins))
+
+    def load(self):
+        """Read the index file, if it exists and was written with the
+        same settings.
+        """
+        self.loaded = True
+        self.signature = self.makeSignature(self.config)
+        try:
+            fh = open(self.filename, 'rb')
+        except IOError:
+            log.debug("No discovery index at %s", self.filename)
+            return
+        try:
+            try:
+                data = pickle.load(fh)
+            finally:
+                fh.close()
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except:
+            log.warning("Unable to read discovery index %s: %s",
+                        self.filename, sys.exc_info()[1])
+            return
+        if data.get('signature') != self.signature:
+            log.debug("Discovery index %s is for other settings",
+                      self.filename)
+            self.changed = True
+            return
+        self.dirs = data.get('dirs', {})
+        self.empty = data.get('empty', {})
+
+    def save(self):
+        """Write the index file, if anything in it has changed.
+        """
+        if not self.changed:
+            return
+        data = {'signature': self.signature,
+                'dirs': self.dirs,
+                'empty': self.empty}
+        try:
+            fh = open(self.filename, 'wb')
+            try:
+                pickle.dump(data, fh, 2)
+            finally:
+                fh.close()
+        except (IOError, OSError):
+            log.warning("Unable to write discovery index %s: %s",
+                        self.filename, sys.exc_info()[1])
+            return
+        self.changed = False
+
+    def listing(self, path):
+        """The recorded listing of the directory at path, or None if there
+        is none or the directory has changed since it was recorded.
+        """
+        if not self.loaded:
+            self.load()
+        try:
+            dir_mtime, subdirs, entries = self.dirs[path]
+        except KeyError:
+            return None
+        if dir_mtime != mtime(path):
+            return None
+        for subdir, sub_stamp in subdirs:
+            if sub_stamp != mtime(subdir):
+                return None
+        log.debug("Using indexed listing of %s", path)
+        return entries
+
+    def storeListing(self, path, entries):
+        """Record the listing of the directory at path.
+        """
+        if not self.loaded:
+            self.load()
+        subdirs = [(entry[0], mtime(entry[0])) for entry in entries
+                   if entry[2]]
+        self.dirs[path] = (mtime(path), subdirs, entries)
+        self.changed = True
+
+    def isEmpty(self, path):
+        """Is the module at path known to have no tests?
+        """
+        if not self.loaded:
+            self.load()
+        try:
+            file_stamp, deps = self.empty[path]
+        except KeyError:
+            return False
+        if file_stamp != stamp(path):
+            return False
+        for dep, dep_stamp in deps:
+            if dep_stamp != stamp(dep):
+                return False
+        return True
+
+    def storeEmpty(self, path, module=None):
+        """Record that the module at path, imported as module, has no
+        tests.
+        """
+        if not self.loaded:
+            self.load()
+        deps = []
+        if module is not None:
+            deps = [(dep, stamp(dep)) for dep in self.dependencies(module)]
+        record = (stamp(path), deps)
+        if self.empty.get(path) != record:
+            self.empty[path] = record
+            self.changed = True
+
+    def dependencies(self, module):
+        """The files of the modules that module depends on.
+        """
+        found = []
+        for name in module_dependencies(module):
+            filename = src(getattr(sys.modules.get(name), '__file__', None))
+            if filename:
+                found.append(os.path.normpath(os.path.abspath(filename)))
+        found.sort()
+        return found
+
+
+def mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime, st.st_size)
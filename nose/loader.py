@@ -19,10 +19,12 @@ from nose.case import FunctionTestCase, MethodTestCase
 from nose.failure import Failure
 from nose.config import Config
 from nose.importer import Importer, add_path, remove_path
+from nose.index import DiscoveryIndex
+from nose.scanner import DirectoryScanner, listDirectory
 from nose.selector import defaultSelector, TestAddress
 from nose.util import func_lineno, getpackage, isclass, isgenerator, \
-    ispackage, regex_last_key, resolve_name, transplant_func, \
-    transplant_class, test_address
+    regex_last_key, resolve_name, transplant_func, \
+    transplant_class, test_address, split_test_name
 from nose.suite import ContextSuiteFactory, ContextList, LazySuite
 from nose.pyversion import sort_list, cmp_to_key
 
@@ -40,6 +42,13 @@ op_isfile = os.path.isfile
 
 __all__ = ['TestLoader', 'defaultTestLoader']
 
+# plugin hooks that decide whether directory entries are wanted
+SELECT_HOOKS = ('wantFile', 'wantDirectory')
+# plugin hooks that can find tests in a module
+MODULE_HOOKS = ('loadTestsFromModule', 'loadTestsFromTestCase',
+                'loadTestsFromTestClass', 'makeTest', 'wantModule',
+                'wantClass', 'wantFunction', 'wantMethod')
+
 
 class TestLoader(unittest.TestLoader):
     """Test loader that extends unittest.TestLoader to:
@@ -55,6 +64,8 @@ class TestLoader(unittest.TestLoader):
     workingDir = None
     selector = None
     suiteClass = None
+    index = None
+    scanner = None
     
     def __init__(self, config=None, importer=None, workingDir=None,
                  selector=None):
@@ -93,6 +104,11 @@ class TestLoader(unittest.TestLoader):
         if config.addPaths:
             add_path(workingDir, config)        
         self.suiteClass = ContextSuiteFactory(config=config)
+        # multiprocess workers load what they're told; only the main
+        # process keeps the index
+        if getattr(config, 'discoveryIndex', None) and not config.worker:
+            self.index = DiscoveryIndex(config.discoveryIndex, config)
+        self._dirDepth = 0
         unittest.TestLoader.__init__(self)     
 
     def getTestCaseNames(self, testCaseClass):
@@ -133,35 +149,44 @@ class TestLoader(unittest.TestLoader):
         if self.config.addPaths:
             paths_added = add_path(path, self.config)
 
-        entries = os.listdir(path)
-        sort_list(entries, regex_last_key(self.config.testMatch))
-        for entry in entries:
-            # this hard-coded initial-dot test will be removed:
-            # http://code.google.com/p/python-nose/issues/detail?id=82
-            if entry.startswith('.'):
-                continue
-            entry_path = op_abspath(op_join(path, entry))
-            is_file = op_isfile(entry_path)
-            wanted = False
-            if is_file:
-                is_dir = False
-                wanted = self.selector.wantFile(entry_path)
-            else:
-                is_dir = op_isdir(entry_path)
-                if is_dir:
-                    # this hard-coded initial-underscore test will be removed:
-                    # http://code.google.com/p/python-nose/issues/detail?id=82
-                    if entry.startswith('_'):
-                        continue
-                    wanted = self.selector.wantDirectory(entry_path)
-            is_package = ispackage(entry_path)
-            if wanted:
+        threads = getattr(self.config, 'discoveryThreads', 0)
+        if self._dirDepth == 0 and threads > 0:
+            self.scanner = DirectoryScanner(
+                threads,
+                regex_last_key(self.config.testMatch))
+        self._dirDepth += 1
+        try:
+            entries = None
+            if self.index is not None:
+                entries = self.index.listing(op_normpath(op_abspath(path)))
+                if (entries is not None
+                    and self._pluginsImplement(SELECT_HOOKS)):
+                    entries = self.reselect(entries)
+            if entries is None:
+                entries = self.scanDir(path)
+                if self.index is not None:
+                    self.index.storeListing(op_normpath(op_abspath(path)),
+                                            entries)
+                if self.scanner is not None:
+                    # list the subdirectories while this one is loaded
+                    for entry in entries:
+                        if entry[2] and entry[4]:
+                            self.scanner.prefetch(entry[0])
+            for entry_path, is_file, is_dir, is_package, wanted in entries:
+                if not wanted:
+                    continue
                 if is_file:
-                    plugins.beforeContext()
-                    if entry.endswith('.py'):
+                    if entry_path.endswith('.py'):
+                        if (self.index is not None
+                            and not self._pluginsImplement(MODULE_HOOKS)
+                            and self.index.isEmpty(entry_path)):
+                            log.debug("%s had no tests; skipped", entry_path)
+                            continue
+                        plugins.beforeContext()
                         yield self.loadTestsFromName(
                             entry_path, discovered=True)
                     else:
+                        plugins.beforeContext()
                         yield self.loadTestsFromFile(entry_path)
                     plugins.afterContext()
                 elif is_package:
@@ -172,24 +197,88 @@ class TestLoader(unittest.TestLoader):
                 else:
                     # Another test dir in this one: recurse lazily
                     yield self.suiteClass(
-                        lambda: self.loadTestsFromDir(entry_path))
-        tests = []
-        for test in plugins.loadTestsFromDir(path):
-            tests.append(test)
-        # TODO: is this try/except needed?
-        try:
-            if tests:
-                yield self.suiteClass(tests)
-        except (KeyboardInterrupt, SystemExit):
-            raise
-        except:
-            yield self.suiteClass([Failure(*sys.exc_info())])
+                        lambda entry_path=entry_path:
+                            self.loadTestsFromDir(entry_path))
+            tests = []
+            for test in plugins.loadTestsFromDir(path):
+                tests.append(test)
+            # TODO: is this try/except needed?
+            try:
+                if tests:
+                    yield self.suiteClass(tests)
+            except (KeyboardInterrupt, SystemExit):
+                raise
+            except:
+                yield self.suiteClass([Failure(*sys.exc_info())])
         
-        # pop paths
-        if self.config.addPaths:
-            for p in paths_added:
-              remove_path(p)
-        plugins.afterDirectory(path)
+            # pop paths
+            if self.config.addPaths:
+                for p in paths_added:
+                  remove_path(p)
+            plugins.afterDirectory(path)
+        finally:
+            # also when the generator is abandoned part way
+            self._dirDepth -= 1
+            if self._dirDepth == 0:
+                if self.index is not None:
+                    self.index.save()
+                if self.scanner is not None:
+                    self.scanner.stop()
+                    self.scanner = None
+
+    def scanDir(self, path):
+        """Examine the entries of the directory at path, in the order in
+        which tests are loaded from them. Returns a list of (path,
+        is_file, is_dir, is_package, wanted) tuples, one per entry that
+        may hold tests.
+        """
+        listing = None
+        if self.scanner is not None:
+            listing = self.scanner.listing(path)
+        if listing is None:
+            listing = self.listDir(path)
+        found = []
+        for entry_path, entry, is_file, is_dir, is_package in listing:
+            wanted = False
+            if is_file:
+                wanted = self.selector.wantFile(entry_path)
+            elif is_dir:
+                # this hard-coded initial-underscore test will be removed:
+                # http://code.google.com/p/python-nose/issues/detail?id=82
+                if entry.startswith('_'):
+                    continue
+                wanted = self.selector.wantDirectory(entry_path)
+            found.append((entry_path, is_file, is_dir, is_package, wanted))
+        return found
+
+    def reselect(self, entries):
+        """Ask the selector again whether the entries of an indexed
+        listing are wanted.
+        """
+        found = []
+        for entry_path, is_file, is_dir, is_package, wanted in entries:
+            if is_file:
+                wanted = self.selector.wantFile(entry_path)
+            elif is_dir:
+                wanted = self.selector.wantDirectory(entry_path)
+            found.append((entry_path, is_file, is_dir, is_package, wanted))
+        return found
+
+    def _pluginsImplement(self, hooks):
+        # plugins' decisions can change with their options, which the
+        # discovery index doesn't know about
+        implementers = self.config.plugins.implementers
+        for hook in hooks:
+            if implementers(hook):
+                return True
+        return False
+
+    def listDir(self, path):
+        """List the directory at path in the order in which tests are
+        loaded from it. Returns a list of (path, name, is_file, is_dir,
+        is_package) tuples.
+        """
+        return listDirectory(path, regex_last_key(self.config.testMatch))
 
     def loadTestsFromFile(self, filename):
         """Load tests from a non-module file. Default is to raise a
@@ -329,6 +418,11 @@ class TestLoader(unittest.TestLoader):
         for test in self.config.plugins.loadTestsFromModule(module, path):
             tests.append(test)
 
+        if (discovered and not tests and self.index is not None
+            and path and op_isfile(path)
+            and not self._pluginsImplement(MODULE_HOOKS)):
+            # no need to import it next time, unless it changes
+            self.index.storeEmpty(op_normpath(op_abspath(path)), module)
         return self.suiteClass(ContextList(tests, context=module))
     
     def loadTestsFromName(self, name, module=None, discovered=False):
@@ -361,36 +455,11 @@ class TestLoader(unittest.TestLoader):
             #    the :, which is in addr.call.
             if addr.call:
                 name = addr.call
-            parent, obj = self.resolve(name, module)
-            if (isclass(parent)
-                and getattr(parent, '__module__', None) != module.__name__):
-                parent = transplant_class(parent, module.__name__)
-                obj = getattr(parent, obj.__name__)
-            log.debug("parent %s obj %s module %s", parent, obj, module)
-            if isinstance(obj, Failure):
-                return suite([obj])
-            else:
-                return suite(ContextList([self.makeTest(obj, parent)],
-                                         context=parent))
+            return self.resolveCall(name, module)
         else:
             if addr.module:
                 try:
-                    if addr.filename is None:
-                        module = resolve_name(addr.module)
-                    else:
-                        self.config.plugins.beforeImport(
-                            addr.filename, addr.module)
-                        # FIXME: to support module.name names,
-                        # do what resolve-name does and keep trying to
-                        # import, popping tail of module into addr.call,
-                        # until we either get an import or run out of
-                        # module parts
-                        try:
-                            module = self.importer.importFromPath(
-                                addr.filename, addr.module)
-                        finally:
-                            self.config.plugins.afterImport(
-                                addr.filename, addr.module)
+                    module = self.importFromAddress(addr)
                 except (KeyboardInterrupt, SystemExit):
                     raise
                 except:
@@ -438,6 +507,37 @@ class TestLoader(unittest.TestLoader):
                     Failure(ValueError, "Unresolvable test name %s" % name,
                             address=addr.totuple())])
 
+    def resolveCall(self, call, module):
+        """Load tests from the object named call (a dotted name, like
+        Class.method) in module.
+        """
+        parent, obj = self.resolve(call, module)
+        if (isclass(parent)
+            and getattr(parent, '__module__', None) != module.__name__):
+            parent = transplant_class(parent, module.__name__)
+            obj = getattr(parent, obj.__name__)
+        log.debug("parent %s obj %s module %s", parent, obj, module)
+        if isinstance(obj, Failure):
+            return self.suiteClass([obj])
+        return self.suiteClass(ContextList([self.makeTest(obj, parent)],
+                                           context=parent))
+
+    def importFromAddress(self, addr):
+        """Import and return the module of the test address addr.
+        """
+        if addr.filename is None:
+            return resolve_name(addr.module)
+        self.config.plugins.beforeImport(addr.filename, addr.module)
+        # FIXME: to support module.name names,
+        # do what resolve-name does and keep trying to
+        # import, popping tail of module into addr.call,
+        # until we either get an import or run out of
+        # module parts
+        try:
+            return self.importer.importFromPath(addr.filename, addr.module)
+        finally:
+            self.config.plugins.afterImport(addr.filename, addr.module)
+
     def loadTestsFromNames(self, names, module=None):
         """Load tests from all names, returning a suite containing all
         tests.
@@ -448,9 +548,60 @@ class TestLoader(unittest.TestLoader):
             if suite:
                 return self.suiteClass([
                     self.suiteClass(suite),
-                    unittest.TestLoader.loadTestsFromNames(self, names, module)
+                    self.suiteClass(self.resolveNames(names, module))
                     ])
-        return unittest.TestLoader.loadTestsFromNames(self, names, module)
+        return self.suiteClass(self.resolveNames(names, module))
+
+    def resolveNames(self, names, module=None):
+        """Load tests from each of names, returning a list of suites in
+        the same order as names.
+
+        Names of callables in modules (module:callable or
+        file.py:callable) are grouped by module: the address of each
+        module is worked out and the module is imported once, and all of
+        the callables named in it are loaded from it in turn. Other names
+        are loaded one at a time with loadTestsFromName(), as are all
+        names when a plugin implements loadTestsFromName.
+        """
+        if (module is not None
+            or self.config.plugins.implementers('loadTestsFromName')):
+            return [self.loadTestsFromName(name, module) for name in names]
+        found = [None] * len(names)
+        groups = {}
+        order = []
+        for i, name in enumerate(names):
+            filename, modname, call = split_test_name(name)
+            if not call or (filename is None and modname is None):
+                found[i] = self.loadTestsFromName(name)
+                continue
+            key = (filename, modname)
+            if key not in groups:
+                groups[key] = []
+                order.append(key)
+            groups[key].append((i, name, call))
+        for key in order:
+            group = groups[key]
+            i, name, call = group[0]
+            addr = TestAddress(name, workingDir=self.workingDir)
+            if not addr.module:
+                for i, name, call in group:
+                    found[i] = self.loadTestsFromName(name)
+                continue
+            log.debug("load %s names from %s", len(group), addr.module)
+            try:
+                mod = self.importFromAddress(addr)
+            except (KeyboardInterrupt, SystemExit):
+                raise
+            except:
+                exc = sys.exc_info()
+                for i, name, call in group:
+                    found[i] = self.suiteClass([
+                        Failure(exc[0], exc[1], exc[2],
+                                address=(addr.filename, addr.module, call))])
+                continue
+            for i, name, call in group:
+                found[i] = self.resolveCall(call, mod)
+        return found
 
     def loadTestsFromTestCase(self, testCaseClass):
         """Load tests from a unittest.TestCase subclass.
@@ -510,12 +661,6 @@ class TestLoader(unittest.TestLoader):
         or test suite.
         """
         plug_tests = []
-        try:
-            addr = test_address(obj)
-        except KeyboardInterrupt:
-            raise
-        except:
-            addr = None
         for test in self.config.plugins.makeTest(obj, parent):
             plug_tests.append(test)
         # TODO: is this try/except needed?
@@ -526,7 +671,8 @@ class TestLoader(unittest.TestLoader):
             raise
         except:
             exc = sys.exc_info()
-            return Failure(exc[0], exc[1], exc[2], address=addr)
+            return Failure(exc[0], exc[1], exc[2],
+                           address=self._failureAddress(obj))
         
         if isfunction(obj) and parent and not isinstance(parent, types.ModuleType):
 	    # This is a Python 3.x 'unbound method'.  Wrap it with its
@@ -562,7 +708,16 @@ class TestLoader(unittest.TestLoader):
         else:
             return Failure(TypeError,
                            "Can't make a test from %s" % obj,
-                           address=addr)
+                           address=self._failureAddress(obj))
+
+    def _failureAddress(self, obj):
+        # only needed when obj can't be made into a test
+        try:
+            return test_address(obj)
+        except KeyboardInterrupt:
+            raise
+        except:
+            return None
 
     def resolve(self, name, module):
         """Resolve name within module
@@ -39,6 +39,24 @@ in the setup.py for the package:
 Once the package is installed with install or develop, nose will be able
 to load the plugin.
 
+The entry points that nose finds are saved in ``nose/plugins`` in the
+directory named by the ``XDG_CACHE_HOME`` environment variable, or in
+``~/.cache`` if it is not set, so that later runs don't have to look
+through every installed package for them.
+They are looked for again when packages are installed or removed, or when a
+package's entry points change. The entry points found with each
+``sys.path`` are kept separately, so that projects with different paths
+don't keep replacing each other's. Set the ``NOSE_PLUGIN_CACHE`` environment
+variable to the name of another file to keep them there instead, or to an
+empty string to look for them every time. If the file can't be written, for
+instance because the home directory is read-only, nose carries on and looks
+for the entry points again on the next run.
+
+Since every plugin module that is found is imported when nose starts, a
+plugin module should be quick to import: import anything the plugin only
+needs when it is enabled in the plugin's ``configure`` method, or wherever
+it is used.
+
 .. _setuptools: http://peak.telecommunity.com/DevCenter/setuptools
 
 Registering a plugin without setuptools
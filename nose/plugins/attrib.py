@@ -143,6 +143,7 @@ class AttributeGetter:
 class AttributeSelector(Plugin):
     """Selects test cases to be run based on their attributes.
     """
+    pureWants = True
 
     def __init__(self):
         Plugin.__init__(self)
@@ -29,6 +29,11 @@ class Plugin(object):
     enableOpt = None
     name = None
     score = 100
+    #: Set to True if the plugin's wantClass, wantFunction and wantMethod
+    #: answers depend only on the class or function asked about (for
+    #: methods, on the function and the class it was found in), so that
+    #: the selector may remember them instead of asking again.
+    pureWants = False
 
     def __init__(self):
         if self.name is None:
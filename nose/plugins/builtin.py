@@ -16,6 +16,8 @@ builtins = (
     ('nose.plugins.skip', 'Skip'),
     ('nose.plugins.testid', 'TestId'),
     ('nose.plugins.multiprocess', 'MultiProcess'),
+    ('nose.plugins.shard', 'Shard'),
+    ('nose.plugins.impact', 'Impact'),
     ('nose.plugins.xunit', 'Xunit'),
     ('nose.plugins.allmodules', 'AllModules'),
     ('nose.plugins.collect', 'CollectOnly'),
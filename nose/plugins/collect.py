@@ -9,10 +9,19 @@ run individual tests by index number.
 
 This plugin is also useful for counting tests in a test suite, and making
 people watching your demo think all of your tests pass.
+
+Test modules are still imported to find the tests in them. With
+``--static-collection``, modules whose tests can be seen in their source code
+are not imported: their tests are found by reading the source (see
+:doc:`../api/static` for what can be found this way). Other modules are
+imported as usual. Static collection is not used when another plugin takes
+part in selecting or loading tests, for instance the attribute selector.
 """
 from nose.plugins.base import Plugin
 from nose.case import Test
+from nose.selector import TestAddress
 import logging
+import os
 import unittest
 
 log = logging.getLogger(__name__)
@@ -34,6 +43,51 @@ class CollectOnly(Plugin):
                           default=env.get('NOSE_COLLECT_ONLY'),
                           help="Enable collect-only: %s [COLLECT_ONLY]" %
                           (self.help()))
+        parser.add_option('--static-collection',
+                          action='store_true',
+                          dest='static_collection',
+                          default=env.get('NOSE_STATIC_COLLECTION'),
+                          help="With --collect-only, find tests by reading "
+                          "the source of test modules where possible, "
+                          "instead of importing them. "
+                          "[NOSE_STATIC_COLLECTION]")
+
+    def configure(self, options, conf):
+        """Configure plugin.
+        """
+        Plugin.configure(self, options, conf)
+        self.collector = None
+        if self.enabled and getattr(options, 'static_collection', False):
+            from nose.static import StaticCollector
+            self.collector = StaticCollector(conf)
+
+    def begin(self):
+        """Give up on static collection if other plugins select or load
+        tests.
+        """
+        if self.collector is not None and not self.collector.canCollect():
+            log.debug("Other plugins select tests; not collecting "
+                      "statically")
+            self.collector = None
+
+    def loadTestsFromName(self, name, module=None):
+        """Collect the tests in a python source file statically, if
+        possible.
+        """
+        if self.collector is None or module is not None:
+            return None
+        addr = TestAddress(name, workingDir=self.conf.workingDir)
+        if addr.call or not addr.filename or os.path.isdir(addr.filename):
+            return None
+        if not addr.filename.endswith('.py'):
+            return None
+        tests = self.collector.collect(addr.filename)
+        if tests is None:
+            return None
+        log.debug("Collected %s tests from %s statically",
+                  len(tests), addr.filename)
+        # an empty list would make the loader import the module
+        return tests or [unittest.TestSuite()]
 
     def prepareTestLoader(self, loader):
         """Install collect-only suite class in TestLoader.
@@ -54,6 +54,9 @@ class Pdb(Plugin):
     def debug(self, err):
         import sys # FIXME why is this import here?
         ec, ev, tb = err
+        if tb is None:
+            # errors replayed from multiprocess workers have no traceback
+            return
         stdout = sys.stdout
         sys.stdout = sys.__stdout__
         try:
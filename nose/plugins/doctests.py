@@ -137,6 +137,7 @@ class Doctest(Plugin):
     Activate doctest plugin to find and run doctests in non-test modules.
     """
     extension = None
+    pureWants = True
     suiteClass = DoctestSuite
     
     def options(self, parser, env):
@@ -7,7 +7,6 @@ debugging information.
 """
     
 from nose.plugins import Plugin
-from nose.inspector import inspect_traceback
 
 class FailureDetail(Plugin):
     """
@@ -37,6 +36,7 @@ class FailureDetail(Plugin):
     def formatFailure(self, test, err):
         """Add detail from traceback inspection to error message of a failure.
         """
+        from nose.inspector import inspect_traceback
         ec, ev, tb = err
         tbinfo = inspect_traceback(tb)
         test.tbinfo = tbinfo
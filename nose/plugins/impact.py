@@ -0,0 +1,316 @@
+"""
+The impact plugin records which source files each test module depends on,
+so that a later run can be limited to the test modules that a set of
+changes can affect. On a pull request, for instance, only the tests that
+touch the files the pull request changed need to run.
+
+Recording
+=========
+
+Run the whole test suite once with ``--with-impact``. While the tests run,
+nose records, for each test module, the python source files under the
+working directory that were executed while it was imported and while its
+tests and fixtures ran, as well as the modules it imports. The record is
+written to ``.noseimpact`` in the working directory, or to the file named
+with ``--impact-file``. Later runs with ``--with-impact`` update the record
+for the test modules they run.
+
+Recording uses a profile hook (:func:`sys.setprofile`), which slows tests
+down somewhat; it can't be used together with the profile plugin, and
+isn't done when tests run in multiprocess workers.
+
+Selecting
+=========
+
+Name the changed files with ``--impact-changed``, as a file listing one
+path per line, or ``-`` to read the list from standard input::
+
+  git diff --name-only --relative origin/master | \\
+      nosetests --impact-changed=-
+
+Relative paths are taken to be relative to the working directory. Test
+modules are found in the usual way, but a test module is loaded only if it
+has changed, or if one of the files recorded for it (or for the packages it
+is in) has changed. Test modules that aren't in the record are always
+loaded, as are tests named on the command line.
+
+Only python source files are recorded, so changes to data files,
+configuration files and extension modules don't select any tests, and code
+run in other threads or processes isn't seen. Run the whole suite from time
+to time (for instance on every merge) to catch what the record misses.
+"""
+import logging
+import os
+import pickle
+import sys
+from inspect import ismodule
+from nose.plugins.base import Plugin
+from nose.util import module_dependencies, src
+
+log = logging.getLogger(__name__)
+
+# code that nose itself runs while running tests isn't a test's dependency
+NOSE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Impact(Plugin):
+    """
+    Record the source files that each test module depends on, and run
+    only the test modules affected by a set of changed files.
+    """
+    name = 'impact'
+    recording = False
+    changed = None
+
+    def options(self, parser, env):
+        """Register commandline options.
+        """
+        Plugin.options(self, parser, env)
+        parser.add_option("--impact-file", action="store",
+                          default=env.get('NOSE_IMPACT_FILE', '.noseimpact'),
+                          dest="impact_file", metavar="FILE",
+                          help="Store the source files that each test "
+                          "module depends on in this file. Default is "
+                          ".noseimpact in the working directory. "
+                          "[NOSE_IMPACT_FILE]")
+        parser.add_option("--impact-changed", action="store",
+                          default=env.get('NOSE_IMPACT_CHANGED'),
+                          dest="impact_changed", metavar="FILE",
+                          help="Run only the test modules affected by "
+                          "changes to the files listed in FILE, one per "
+                          "line ('-' for standard input). Implies "
+                          "--with-impact. [NOSE_IMPACT_CHANGED]")
+
+    def configure(self, options, conf):
+        """Configure plugin.
+        """
+        Plugin.configure(self, options, conf)
+        if getattr(options, 'impact_changed', None):
+            self.enabled = True
+        if not self.enabled:
+            return
+        # multiprocess workers run what the main process selected, and
+        # report nothing back to record
+        if conf.worker:
+            self.enabled = False
+            return
+        self.workingDir = os.path.normpath(os.path.abspath(conf.workingDir))
+        self.filename = os.path.expanduser(options.impact_file)
+        if not os.path.isabs(self.filename):
+            self.filename = os.path.join(self.workingDir, self.filename)
+        self.deps = {}
+        self.recording = True
+        workers = getattr(options, 'multiprocess_workers', 0)
+        try:
+            # as the multiprocess plugin reads it
+            multiprocess = workers == 'auto' or int(workers) > 0
+        except (TypeError, ValueError):
+            multiprocess = False
+        if multiprocess:
+            log.warning("Test dependencies can't be recorded in "
+                        "multiprocess workers; %s will not be updated",
+                        self.filename)
+            self.recording = False
+        if getattr(options, 'enable_plugin_profile', False):
+            log.warning("Test dependencies can't be recorded while "
+                        "profiling; %s will not be updated", self.filename)
+            self.recording = False
+        self.stack = []
+        self.seen = {}
+        self.load()
+        if options.impact_changed:
+            self.changed = self.readChanged(options.impact_changed)
+
+    def load(self):
+        try:
+            fh = open(self.filename, 'rb')
+        except IOError:
+            log.debug("No impact record %s", self.filename)
+            return
+        try:
+            try:
+                data = pickle.load(fh)
+            except (KeyboardInterrupt, SystemExit):
+                raise
+            except:
+                log.warning("Unable to read impact record %s: %s",
+                            self.filename, sys.exc_info()[1])
+                return
+        finally:
+            fh.close()
+        if isinstance(data, dict):
+            self.deps = data.get('deps', {})
+
+    def save(self):
+        for key in list(self.deps.keys()):
+            if not os.path.exists(self.path(key)):
+                del self.deps[key]
+        try:
+            fh = open(self.filename, 'wb')
+            try:
+                pickle.dump({'version': 1, 'deps': self.deps}, fh)
+            finally:
+                fh.close()
+        except (IOError, OSError):
+            log.warning("Unable to write impact record %s: %s",
+                        self.filename, sys.exc_info()[1])
+            return
+        log.debug("Saved dependencies of %s test modules to %s",
+                  len(self.deps), self.filename)
+
+    def readChanged(self, filename):
+        """Read the list of changed files from filename ('-' for
+        standard input).
+        """
+        if filename == '-':
+            lines = sys.stdin.readlines()
+        else:
+            fh = open(filename, 'r')
+            try:
+                lines = fh.readlines()
+            finally:
+                fh.close()
+        changed = {}
+        for line in lines:
+            line = line.strip()
+            if line:
+                changed[self.key(os.path.join(self.workingDir, line))] = True
+        log.debug("Changed files: %s", list(changed.keys()))
+        if not self.deps:
+            log.warning("No test dependencies recorded in %s; running all "
+                        "tests", self.filename)
+        return changed
+
+    def key(self, path):
+        """The record's name for path: relative to the working directory
+        if it is under it, otherwise absolute.
+        """
+        path = os.path.normpath(os.path.abspath(path))
+        if path.startswith(self.workingDir + os.sep):
+            return path[len(self.workingDir) + 1:]
+        return path
+
+    def path(self, key):
+        return os.path.join(self.workingDir, key)
+
+    def isImpacted(self, key):
+        """Is the test module recorded as key affected by the changes?
+        """
+        if key in self.changed:
+            return True
+        deps = list(self.deps[key])
+        # package fixtures are recorded under the package's __init__.py
+        parent = os.path.dirname(key)
+        while parent and parent != os.path.dirname(parent):
+            deps.extend(self.deps.get(os.path.join(parent, '__init__.py'),
+                                      ()))
+            parent = os.path.dirname(parent)
+        for dep in deps:
+            if dep in self.changed:
+                return True
+        return False
+
+    def wantFile(self, file):
+        """Skip test modules that the changed files don't affect.
+        """
+        if self.changed is None or not self.deps:
+            return None
+        if not file.endswith('.py'):
+            return None
+        key = self.key(file)
+        if key not in self.deps or self.isImpacted(key):
+            return None
+        log.debug("%s is not affected by the changes", file)
+        return False
+
+    def begin(self):
+        if self.recording:
+            stack = self.stack
+            def profile(frame, event, arg):
+                if event == 'call' and stack:
+                    stack[-1][frame.f_code.co_filename] = True
+            sys.setprofile(profile)
+
+    def beforeImport(self, filename, module):
+        if self.recording:
+            self.stack.append({})
+
+    def afterImport(self, filename, module):
+        if not self.recording:
+            return
+        files = self.executed(self.stack.pop())
+        mod = sys.modules.get(module)
+        if mod is not None:
+            filename = getattr(mod, '__file__', None)
+            for dep in self.imports(mod):
+                files[dep] = True
+        if filename:
+            self.record(src(filename), files)
+
+    def startContext(self, context):
+        if self.recording and ismodule(context):
+            self.stack.append({})
+
+    def stopContext(self, context):
+        if not (self.recording and ismodule(context)):
+            return
+        files = self.executed(self.stack.pop())
+        filename = getattr(context, '__file__', None)
+        if filename:
+            self.record(src(filename), files)
+
+    def executed(self, files):
+        """The files in files whose code was run by the tests, rather than
+        by nose.
+        """
+        prefix = NOSE_DIR + os.sep
+        return dict([(filename, True) for filename in files
+                     if not os.path.abspath(filename).startswith(prefix)])
+
+    def imports(self, module):
+        """The source files under the working directory of the modules
+        that module imports, directly or through other such modules.
+        """
+        prefix = self.workingDir + os.sep
+        seen = {}
+        files = []
+        todo = [module]
+        while todo:
+            for name in module_dependencies(todo.pop()):
+                dep = sys.modules.get(name)
+                if name in seen or dep is None:
+                    continue
+                seen[name] = True
+                filename = src(getattr(dep, '__file__', None))
+                if filename and os.path.abspath(filename).startswith(prefix):
+                    files.append(filename)
+                    todo.append(dep)
+        return files
+
+    def record(self, filename, files):
+        """Add the files under the working directory in files to the
+        record for the test module at filename.
+        """
+        if not filename.endswith('.py'):
+            return
+        key = self.key(filename)
+        deps = {}
+        if key in self.seen:
+            # recorded earlier in this run; earlier runs' record is replaced
+            deps = dict([(dep, True) for dep in self.deps[key]])
+        self.seen[key] = True
+        prefix = self.workingDir + os.sep
+        for dep in files:
+            if not dep or not dep.endswith('.py'):
+                continue
+            dep = os.path.normpath(os.path.abspath(dep))
+            if dep.startswith(prefix):
+                deps[dep[len(prefix):]] = True
+        deps = list(deps.keys())
+        deps.sort()
+        self.deps[key] = deps
+
+    def finalize(self, result):
+        if self.recording:
+            sys.setprofile(None)
+            self.save()
@@ -53,6 +53,7 @@ class IsolationPlugin(Plugin):
     where module reloading may produce undesirable side-effects.
     """
     score = 10 # I want to be last
+    pureWants = True
     name = 'isolation'
 
     def configure(self, options, conf):
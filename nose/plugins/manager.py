@@ -15,7 +15,10 @@ The plugin managers provided with nose are:
     This manager loads plugins referenced in ``nose.plugins.builtin``.
 
 :class:`EntryPointPluginManager`
-    This manager uses setuptools entrypoints to load plugins.
+    This manager uses setuptools entrypoints to load plugins. The entry
+    points found are cached in ``nose/plugins`` under the user's cache
+    directory (or the file named by the ``NOSE_PLUGIN_CACHE`` environment
+    variable) until the installed distributions change.
 
 :class:`DefaultPluginMananger`
     This is the manager class that will be used by default. If
@@ -48,6 +51,7 @@ import inspect
 import logging
 import os
 import sys
+import time
 from warnings import warn
 import nose.config
 from nose.failure import Failure
@@ -62,6 +66,8 @@ try:
     from cStringIO import StringIO
 except:
     from StringIO import StringIO
+# cpu time of the process
+cpu_clock = getattr(time, 'process_time', None) or time.clock
 
 
 __all__ = ['DefaultPluginManager', 'PluginManager', 'EntryPointPluginManager',
@@ -85,10 +91,11 @@ class PluginProxy(object):
         except AttributeError:
             raise AttributeError("%s is not a valid %s method"
                                  % (call, self.interface.__name__))
-        self.call = self.makeCall(call)
+        self.name = call
         self.plugins = []
         for p in plugins:
             self.addPlugin(p, call)
+        self.call = self.makeCall(call)
 
     def __call__(self, *arg, **kw):
         return self.call(*arg, **kw)
@@ -104,8 +111,20 @@ class PluginProxy(object):
                 orig_meth = meth
                 meth = lambda module, path, **kwargs: orig_meth(module)
             self.plugins.append((plugin, meth))
+            self.call = self.makeCall(call)
+
+    def instrument(self, timer):
+        """Time each plugin's calls with timer, a :class:`HookTimer`.
+        """
+        self.plugins = [(p, timer.wrap(p, self.name, meth))
+                        for p, meth in self.plugins]
+        self.call = self.makeCall(self.name)
 
     def makeCall(self, call):
+        """Make the function that calls the plugins. Calls that no plugin
+        implements do nothing, and calls that only one plugin implements
+        call it directly, where that gives the same result.
+        """
         if call == 'loadTestsFromNames':
             # special case -- load tests from names behaves somewhat differently
             # from other chainable calls, because plugins return a tuple, only
@@ -114,8 +133,16 @@ class PluginProxy(object):
 
         meth = self.method
         if getattr(meth, 'generative', False):
+            if not self.plugins:
+                return lambda *arg, **kw: []
             # call all plugins and yield a flattened iterator of their results
             return lambda *arg, **kw: list(self.generate(*arg, **kw))
+        elif not self.plugins:
+            return _doNothing
+        elif len(self.plugins) == 1:
+            # the first non-None result, or the end of the chain, is
+            # whatever the one plugin returns
+            return self.plugins[0][1]
         elif getattr(meth, 'chainable', False):
             return self.chain
         else:
@@ -179,6 +206,89 @@ class PluginProxy(object):
         return suite, names
 
 
+def _doNothing(*arg, **kw):
+    pass
+
+
+class HookTimer(object):
+    """Counts the calls made to each plugin's implementation of each
+    plugin call, and adds up the wall clock and cpu time they take (see
+    the ``--plugin-profile`` option). Times include the time spent in any
+    other plugin calls made by the call.
+    """
+    def __init__(self):
+        self.stats = {}
+
+    def wrap(self, plugin, call, meth):
+        """Return a function that calls meth and times the call.
+        """
+        name = getattr(plugin, 'name', None) or plugin.__class__.__name__
+        stats = self.stats.setdefault((name, call), [0, 0.0, 0.0])
+        def timed(*arg, **kw):
+            wall = time.time()
+            cpu = cpu_clock()
+            try:
+                return meth(*arg, **kw)
+            finally:
+                stats[0] += 1
+                stats[1] += time.time() - wall
+                stats[2] += cpu_clock() - cpu
+        return timed
+
+    def ranked(self):
+        """The (plugin, call, calls, wall, cpu) of each plugin call that
+        was made, most time first.
+        """
+        ranked = [(plugin, call, calls, wall, cpu)
+                  for (plugin, call), (calls, wall, cpu)
+                  in self.stats.items() if calls]
+        sort_list(ranked, lambda x: (-x[3], x[0], x[1]))
+        return ranked
+
+    def report(self, stream):
+        """Write the times, most time first, to stream.
+        """
+        line = "%-48s %8s %10s %10s\n"
+        stream.write("\n" + line
+                     % ("Plugin call", "calls", "wall (s)", "cpu (s)"))
+        stream.write("-" * 79 + "\n")
+        total = [0, 0.0, 0.0]
+        for plugin, call, calls, wall, cpu in self.ranked():
+            stream.write(line % ("%s.%s" % (plugin, call), calls,
+                                 "%.3f" % wall, "%.3f" % cpu))
+            total[0] += calls
+            total[1] += wall
+            total[2] += cpu
+        stream.write("-" * 79 + "\n")
+        stream.write(line % ("Total", total[0], "%.3f" % total[1],
+                             "%.3f" % total[2]))
+
+    def save(self, filename):
+        """Write the times, most time first, to filename as JSON.
+        """
+        try:
+            import json
+        except ImportError:
+            try:
+                import simplejson as json
+            except ImportError:
+                log.warning("Unable to write plugin times to %s: no json "
+                            "module", filename)
+                return
+        stats = [{'plugin': plugin, 'call': call, 'calls': calls,
+                  'wall': wall, 'cpu': cpu}
+                 for plugin, call, calls, wall, cpu in self.ranked()]
+        try:
+            fh = open(filename, 'w')
+            try:
+                json.dump(stats, fh, indent=1)
+            finally:
+                fh.close()
+        except (IOError, OSError):
+            log.warning("Unable to write plugin times to %s: %s",
+                        filename, sys.exc_info()[1])
+
+
 class NoPlugins(object):
     """Null Plugin manager that has no plugins."""
     interface = IPluginInterface
@@ -197,9 +307,12 @@ class NoPlugins(object):
     def __getattr__(self, call):
         method = getattr(self.interface, call)
         if getattr(method, "generative", False):
-            return self._emptyIterator
+            meth = self._emptyIterator
         else:
-            return self._doNothing
+            meth = self._doNothing
+        # found in the instance next time, without coming here
+        self.__dict__[call] = meth
+        return meth
 
     def addPlugin(self, plug):
         raise NotImplementedError()
@@ -207,6 +320,9 @@ class NoPlugins(object):
     def addPlugins(self, plugins):
         raise NotImplementedError()
 
+    def implementers(self, call):
+        return []
+
     def configure(self, options, config):
         pass
 
@@ -224,10 +340,13 @@ class PluginManager(object):
     The basic functionality of a plugin manager is to proxy all unknown
     attributes through a ``PluginProxy`` to a list of plugins.
 
-    Note that the list of plugins *may not* be changed after the first plugin
-    call.
+    Each call is bound the first time it is made to a function that calls
+    the plugins implementing it directly (see :meth:`PluginProxy.makeCall`),
+    so later calls skip the proxy. Changing the list of plugins, as
+    :meth:`configure` does, unbinds all calls.
     """
     proxyClass = PluginProxy
+    timer = None
 
     def __init__(self, plugins=(), proxyClass=None):
         self._plugins = []
@@ -238,13 +357,53 @@ class PluginManager(object):
             self.proxyClass = proxyClass
 
     def __getattr__(self, call):
+        proxy = self.proxy(call)
+        # found in the instance next time, without coming here
+        self.__dict__[call] = proxy.call
+        return proxy.call
+
+    def proxy(self, call):
+        """The proxy for call.
+        """
         try:
             return self._proxies[call]
         except KeyError:
             proxy = self.proxyClass(call, self._plugins)
+            if self.timer is not None:
+                proxy.instrument(self.timer)
+                if call == 'finalize':
+                    proxy.call = self.reportingTimes(proxy.call)
             self._proxies[call] = proxy
         return proxy
 
+    def reportingTimes(self, finalize):
+        """Wrap finalize so that the plugins' times are reported after
+        the plugins' finalize calls.
+        """
+        def reporting(result):
+            try:
+                return finalize(result)
+            finally:
+                self.timer.report(self.config.stream)
+                filename = getattr(self.config, 'pluginProfileFile', None)
+                if filename:
+                    self.timer.save(filename)
+        return reporting
+
+    def implementers(self, call):
+        """The list of (plugin, method) pairs of the plugins that implement
+        call.
+        """
+        return self.proxy(call).plugins
+
+    def unbind(self):
+        """Forget the plugins that implement each call, after the list of
+        plugins has changed.
+        """
+        for call in self._proxies:
+            self.__dict__.pop(call, None)
+        self._proxies = {}
+
     def __iter__(self):
         return iter(self.plugins)
 
@@ -255,6 +414,7 @@ class PluginManager(object):
         self._plugins[:] = [p for p in self._plugins
                             if getattr(p, 'name', None) != new_name]
         self._plugins.append(plug)
+        self.unbind()
 
     def addPlugins(self, plugins):
         for plug in plugins:
@@ -270,6 +430,8 @@ class PluginManager(object):
         cfg = PluginProxy('configure', self._plugins)
         cfg(options, config)
         enabled = [plug for plug in self._plugins if plug.enabled]
+        if getattr(config, 'pluginProfile', False) and not config.worker:
+            self.timer = HookTimer()
         self.plugins = enabled
         self.sort()
         log.debug("Plugins enabled: %s", enabled)
@@ -278,6 +440,7 @@ class PluginManager(object):
         pass
 
     def sort(self):
+        self.unbind()
         return sort_list(self._plugins, lambda x: getattr(x, 'score', 1), reverse=True)
 
     def _get_plugins(self):
@@ -285,6 +448,7 @@ class PluginManager(object):
 
     def _set_plugins(self, plugins):
         self._plugins = []
+        self.unbind()
         self.addPlugins(plugins)
 
     plugins = property(_get_plugins, _set_plugins, None,
@@ -354,39 +518,157 @@ class ZeroNinePlugin:
 class EntryPointPluginManager(PluginManager):
     """Plugin manager that loads plugins from the `nose.plugins` and
     `nose.plugins.0.10` entry points.
+
+    Finding the entry points means importing ``pkg_resources`` and reading
+    the metadata of every installed distribution, so the entry points
+    found are saved in the file named by ``cacheFile`` (or the
+    ``NOSE_PLUGIN_CACHE`` environment variable; empty for none), and used
+    until the distributions on ``sys.path`` change. By default the file is
+    ``nose/plugins`` in ``$XDG_CACHE_HOME``, or in ``~/.cache`` if that is
+    not set. If it can't be written, the entry points are looked for again
+    on the next run. The file holds the
+    entry points found for each of the last ``cacheSize`` values of
+    ``sys.path``, so that runs in different projects share it.
     """
     entry_points = (('nose.plugins.0.10', None),
                     ('nose.plugins', ZeroNinePlugin))
+    cacheFile = None
+    cacheSize = 20
 
     def loadPlugins(self):
         """Load plugins by iterating the `nose.plugins` entry point.
         """
         super(EntryPointPluginManager, self).loadPlugins()
+        adapters = dict(self.entry_points)
+        loaded = {}
+        for group, name, module, attrs in self.entryPoints():
+            if name in loaded:
+                continue
+            loaded[name] = True
+            ep = "%s = %s:%s" % (name, module, '.'.join(attrs))
+            log.debug('%s load plugin %s', self.__class__.__name__, ep)
+            try:
+                plugcls = __import__(module, {}, {}, ['__name__'])
+                for attr in attrs:
+                    plugcls = getattr(plugcls, attr)
+            except KeyboardInterrupt:
+                raise
+            except Exception, e:
+                # never want a plugin load to kill the test run
+                # but we can't log here because the logger is not yet
+                # configured
+                warn("Unable to load plugin %s: %s" % (ep, e),
+                     RuntimeWarning)
+                continue
+            adapt = adapters[group]
+            if adapt:
+                plug = adapt(plugcls())
+            else:
+                plug = plugcls()
+            self.addPlugin(plug)
+
+    def entryPoints(self):
+        """The (group, name, module, attrs) of each plugin entry point of
+        the installed distributions, in the order of entry_points.
+        """
+        filename = os.environ.get('NOSE_PLUGIN_CACHE', self.cacheFile)
+        if filename is None:
+            filename = defaultCacheFile()
+        cached = []
+        if filename:
+            filename = os.path.expanduser(filename)
+            stamp = distributionStamp()
+            cached = readCache(filename)
+            for entry_stamp, entry_found in cached:
+                if entry_stamp == stamp:
+                    return entry_found
         from pkg_resources import iter_entry_points
+        found = []
+        for group, adapt in self.entry_points:
+            for ep in iter_entry_points(group):
+                found.append((group, ep.name, ep.module_name,
+                              tuple(ep.attrs)))
+        if filename:
+            # replace what was cached for the same sys.path, newest first
+            cached = [entry for entry in cached if entry[0][0] != stamp[0]]
+            writeCache(filename,
+                       [(stamp, found)] + cached[:self.cacheSize - 1])
+        return found
+
+
+def defaultCacheFile():
+    """The plugin cache file in the user's cache directory.
+    """
+    cache_dir = (os.environ.get('XDG_CACHE_HOME')
+                 or os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(cache_dir, 'nose', 'plugins')
 
-        loaded = {}
-        for entry_point, adapt in self.entry_points:
-            for ep in iter_entry_points(entry_point):
-                if ep.name in loaded:
-                    continue
-                loaded[ep.name] = True
-                log.debug('%s load plugin %s', self.__class__.__name__, ep)
+
+def distributionStamp():
+    """Identify the installed distributions: the entries on sys.path, the
+    distributions found in each and when their metadata last changed.
+    """
+    stamp = [tuple(sys.path)]
+    for path in sys.path:
+        try:
+            names = os.listdir(path or os.curdir)
+        except OSError:
+            continue
+        names.sort()
+        for name in names:
+            ext = os.path.splitext(name)[1]
+            if ext not in ('.egg-info', '.dist-info', '.egg'):
+                continue
+            meta = os.path.join(path, name)
+            for found in (os.path.join(meta, 'entry_points.txt'),
+                          os.path.join(meta, 'EGG-INFO', 'entry_points.txt'),
+                          meta):
                 try:
-                    plugcls = ep.load()
-                except KeyboardInterrupt:
-                    raise
-                except Exception, e:
-                    # never want a plugin load to kill the test run
-                    # but we can't log here because the logger is not yet
-                    # configured
-                    warn("Unable to load plugin %s: %s" % (ep, e),
-                         RuntimeWarning)
-                    continue
-                if adapt:
-                    plug = adapt(plugcls())
-                else:
-                    plug = plugcls()
-                self.addPlugin(plug)
+                    stamp.append((name, os.stat(found).st_mtime))
+                    break
+                except OSError:
+                    pass
+    return stamp
+
+
+def readCache(filename):
+    """The list of (stamp, entry points) saved in filename, or an empty
+    list.
+    """
+    try:
+        fh = open(filename, 'rb')
+    except IOError:
+        return []
+    try:
+        try:
+            cached = pickle.load(fh)
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except:
+            log.debug("Unable to read plugin cache %s: %s", filename,
+                      sys.exc_info()[1])
+            return []
+    finally:
+        fh.close()
+    if not isinstance(cached, list):
+        # written by an earlier version
+        return []
+    return cached
+
+
+def writeCache(filename, data):
+    try:
+        dirname = os.path.dirname(filename)
+        if dirname and not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        fh = open(filename, 'wb')
+        try:
+            pickle.dump(data, fh)
+        finally:
+            fh.close()
+    except (IOError, OSError):
+        log.debug("Unable to write plugin cache %s: %s", filename,
+                  sys.exc_info()[1])
 
 
 class BuiltinPluginManager(PluginManager):
@@ -402,10 +684,21 @@ class BuiltinPluginManager(PluginManager):
         super(BuiltinPluginManager, self).loadPlugins()
 
 try:
-    import pkg_resources
+    from pkgutil import find_loader
+    # look for setuptools without importing it: it's slow to import, and
+    # not needed when the plugin cache is up to date
+    have_setuptools = find_loader('pkg_resources') is not None
+except ImportError:
+    try:
+        import pkg_resources
+        have_setuptools = True
+    except ImportError:
+        have_setuptools = False
+
+if have_setuptools:
     class DefaultPluginManager(BuiltinPluginManager, EntryPointPluginManager):
         pass
-except ImportError:
+else:
     DefaultPluginManager = BuiltinPluginManager
 
 
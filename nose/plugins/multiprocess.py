@@ -50,16 +50,156 @@ initializes a shared database -- then set ``_multiprocess_shared_ = True`` in
 the context. These fixtures will then execute in the primary nose process, and
 tests in those contexts will be individually dispatched to run in parallel.
 
+Scheduling batches
+^^^^^^^^^^^^^^^^^^
+
+By default, batches are dispatched in the order in which they are
+discovered. If a slow batch happens to be discovered last, the run ends
+with one worker busy and all of the others idle. To avoid that, use
+``--process-schedule=longest``: batches expected to take the longest are
+dispatched first.
+
+The expected time for each batch comes from a timings file (by default,
+``.nosetimings`` in the working directory; use ``--process-timings`` to
+choose another file). Each run records the time taken by every batch it
+dispatches, so the schedule improves as the file fills up. Batches that
+have no recorded time are assumed to take the average of the recorded
+times. Passing ``--process-timings`` without ``--process-schedule`` records
+timings without changing the dispatch order.
+
+Dispatching tests in chunks
+^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Each batch is normally sent to a worker on its own, and the worker loads,
+runs and reports it separately. For suites of many very quick tests, that
+per-batch overhead can rival the time spent running the tests. Use
+``--process-chunk-size`` to send up to that many batches from the same
+module to a worker in a single message; the worker loads them with one
+call to the loader and reports them with one result. With
+``--process-chunk-size=auto``, the chunk size is chosen so that each worker
+receives about four chunks.
+
+Keeping modules on one worker
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+A module marked ``_multiprocess_can_split_`` is divided into batches that
+may go to different workers, and each worker that runs one of its batches
+runs the module's fixtures again. Use ``--process-affinity`` to send all of
+a module's batches to the same worker instead. That worker sets the module
+(and its packages) up before its first batch and tears them down after its
+last, so the fixtures run once per run. Modules are dealt out among the
+workers in advance; a worker that runs out of modules takes a module that
+another worker has not yet started. This option has no effect with
+``--process-listen``.
+
+Preloading modules
+^^^^^^^^^^^^^^^^^^
+
+On platforms where worker processes are forked (everywhere but Windows),
+workers inherit every module that the main nose process has imported
+before they start. Test modules are always among those, since they are
+loaded in the main process while tests are divided into batches. Modules
+that tests only import later -- inside fixtures or test functions, for
+instance an application framework and its models -- are imported again
+by each worker. Name them with ``--process-preload`` (a comma-separated
+list of module names) and they will be imported once, in the main
+process, before any workers start::
+
+  nosetests --processes=4 --process-preload=django.db,myapp.models
+
+A module that can't be preloaded is reported with a warning, and workers
+import it as usual when it is needed.
+
+Timing out hung tests
+^^^^^^^^^^^^^^^^^^^^^
+
+A test that never finishes keeps its worker busy for the rest of the run.
+Use ``--process-test-timeout`` to set a deadline, in seconds, for each
+batch (or chunk) of tests dispatched to a worker. A worker still running
+a batch when the deadline passes is killed, the test it was running (or,
+if it was still setting up, each test in the batch) is recorded as an
+error (a ``TimedOutException``), and a new worker is started in its place
+to carry on with the remaining batches. Tests in the batch that finished
+before the deadline are reported as usual; the rest of the batch is not
+run. The default, 0, sets no deadline.
+
+Choosing the number of workers
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+With ``--processes=auto``, the plugin starts one worker per processor, but
+no more workers than fit in the memory currently available. Each worker is
+assumed to need ``--process-max-memory`` megabytes (see below) or, if that
+is not set, as much memory as the main nose process uses when it starts.
+
+Recycling workers
+^^^^^^^^^^^^^^^^^
+
+Memory leaked by tests builds up in their worker for the rest of the run.
+Use ``--process-restart-after`` to replace each worker with a new one once
+it has run that many tests, and ``--process-max-memory`` to replace a worker
+once its memory use (resident set size) exceeds that many megabytes. Where
+the current size can't be found out (it can on Linux), only the largest
+size a worker has reached is known, and the worker is replaced once that
+has grown by more than the limit since the worker started. A worker is
+only replaced between batches: it finishes its current batch
+(and, with ``--process-affinity``, its current module) first, and its
+results are reported as usual. Workers on other hosts are not recycled.
+
+Running workers on other hosts
+^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Workers don't have to run on the same machine as the main nose process.
+Use ``--process-listen`` to have the main process wait for workers at a
+network address, and start workers anywhere that can reach it with
+``--process-connect``. Both sides must use the same
+``--process-authkey``::
+
+  nosetests --processes=2 --process-listen=0.0.0.0:5050 \
+            --process-authkey=secret
+
+  # on other hosts, or in other containers
+  nosetests --processes=8 --process-connect=ci-head:5050 \
+            --process-authkey=secret
+
+The main process loads and divides up the tests as usual, then hands out
+batches to its own workers (``--processes`` may be 0) and to remote workers
+alike, and collects and reports their results. A remote ``nosetests``
+starts ``--processes`` workers (at least one); it keeps trying to reach the
+main process for ``--process-timeout`` seconds, and exits when the main
+process is done. Once the main process's own workers have finished, it
+waits for results from remote workers for ``--process-timeout`` seconds at
+a time; if none arrive, the tests that haven't finished are reported as
+errors and the run ends. Test addresses are file paths on the main process's host,
+so every host must have the tests (and the main process's working
+directory) at the same paths, and be able to import what they import.
+
+.. warning ::
+
+   Anyone who can connect to the listening address and knows the authkey
+   can run code in the main process and in the workers. Listen only on
+   trusted networks, and choose an authkey that is hard to guess.
+
 How results are collected and reported
 ======================================
 
-As each test or suite executes in a worker process, results (failures, errors,
-and specially handled exceptions like SkipTest) are collected in that
-process. When the worker process finishes, it returns results to the main
-nose process. There, any progress output is printed (dots!), and the
-results from the test run are combined into a consolidated result
-set. When results have been received for all dispatched tests, or all
-workers have died, the result summary is output as normal.
+As each test executes in a worker process, the worker sends the main nose
+process a small event when the test starts, when its outcome (success,
+failure, error, or specially handled exception like SkipTest) is known,
+and when it stops. The main process replays each event as it arrives: any
+progress output is printed (dots!), the outcome is added to the
+consolidated result set, and the startTest, addSuccess, addFailure,
+addError and stopTest methods of plugins active in the main process are
+called, so plugins like xunit and testid see tests run by workers. Errors
+and failures replayed this way carry no traceback object; the formatted
+traceback appears in the error report as usual. When results have been
+received for all dispatched tests, or all workers have died, the result
+summary is output as normal.
+
+Events are kept small: a test is described in full only when it starts,
+and a formatted error that a worker has already sent for the same batch is
+sent again only as a reference. Formatted errors larger than 64 KB, which
+usually hold captured output, are passed through temporary files rather
+than through the result queue (except by workers on other hosts).
 
 Beware!
 =======
@@ -88,14 +228,20 @@ import time
 import traceback
 import unittest
 import pickle
+import shutil
+import tempfile
+from inspect import ismodule
+from itertools import islice
 import nose.case
 from nose.core import TextTestRunner
 from nose import failure
 from nose import loader
 from nose.plugins.base import Plugin
-from nose.result import TextTestResult
+from nose.plugins.skip import SkipTest
+from nose.pyversion import sort_list, UNICODE_STRINGS
+from nose.result import TextTestResult, _exception_detail
 from nose.suite import ContextSuite
-from nose.util import test_address
+from nose.util import test_address, tolist
 try:
     # 2.7+
     from unittest.runner import _WritelnDecorator
@@ -103,6 +249,14 @@ except ImportError:
     from unittest import _WritelnDecorator
 from Queue import Empty
 from warnings import warn
+import threading
+try:
+    from multiprocessing.connection import Client
+    from multiprocessing.managers import BaseManager, BaseProxy
+except ImportError:
+    # the plugin can't be used; _import_mp warns about it
+    Client = None
+    BaseManager = BaseProxy = object
 try:
     from cStringIO import StringIO
 except ImportError:
@@ -110,31 +264,50 @@ except ImportError:
 
 log = logging.getLogger(__name__)
 
-Process = Queue = Pool = Event = None
+Process = Queue = Pool = Event = Value = None
+
+# formatted errors longer than this are sent through temporary files
+SPOOL_SIZE = 64 * 1024
 
 def _import_mp():
-    global Process, Queue, Pool, Event
+    global Process, Queue, Pool, Event, Value
     try:
         from multiprocessing import Process as Process_, \
-            Queue as Queue_, Pool as Pool_, Event as Event_
-        Process, Queue, Pool, Event = Process_, Queue_, Pool_, Event_
+            Queue as Queue_, Pool as Pool_, Event as Event_, Value as Value_
+        Process, Queue, Pool, Event, Value = \
+            Process_, Queue_, Pool_, Event_, Value_
     except ImportError:
         warn("multiprocessing module is not available, multiprocess plugin "
              "cannot be used", RuntimeWarning)
 
 
+class TimedOutException(Exception):
+    """Recorded for each test in a batch that was still running when its
+    worker passed the --process-test-timeout deadline.
+    """
+    pass
+
+
 class TestLet:
     def __init__(self, case):
         try:
             self._id = case.id()
         except AttributeError:
             pass
+        try:
+            self._address = case.address()
+        except AttributeError:
+            self._address = None
         self._short_description = case.shortDescription()
         self._str = str(case)
+        self.passed = None
 
     def id(self):
         return self._id
 
+    def address(self):
+        return self._address
+
     def shortDescription(self):
         return self._short_description
 
@@ -142,6 +315,283 @@ class TestLet:
         return self._str
 
 
+def parseAddress(address):
+    """Split a HOST:PORT network address into a (host, port) tuple.
+    """
+    try:
+        host, port = address.rsplit(':', 1)
+        return (host, int(port))
+    except ValueError:
+        raise ValueError("Network address must be HOST:PORT, not %r"
+                         % address)
+
+
+def memoryUsage():
+    """Memory used by this process now (its resident set size), in bytes,
+    or None if it can't be found out.
+    """
+    try:
+        statm = open('/proc/self/statm')
+        try:
+            pages = int(statm.read().split()[1])
+        finally:
+            statm.close()
+        return pages * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, IndexError, IOError, OSError, ValueError):
+        return None
+
+
+def peakMemoryUsage():
+    """The largest resident set size this process has had, in bytes, or
+    None if it can't be found out. A forked process starts out with the
+    peak of its parent.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        # bytes there, kilobytes elsewhere
+        return rss
+    return rss * 1024
+
+
+def exceedsMemory(max_memory, start_peak=None):
+    """Does this process use more than max_memory bytes? Where only the
+    peak size is known, it's the growth of the peak since it was
+    start_peak that must exceed max_memory, since the peak never goes
+    down again.
+    """
+    used = memoryUsage()
+    if used is not None:
+        return used > max_memory
+    peak = peakMemoryUsage()
+    if peak is None:
+        return False
+    return peak - (start_peak or 0) > max_memory
+
+
+def availableMemory():
+    """Memory available to new processes, in bytes, or None if it can't
+    be found out.
+    """
+    try:
+        meminfo = open('/proc/meminfo')
+        try:
+            fields = {}
+            for line in meminfo:
+                parts = line.split()
+                if len(parts) >= 2:
+                    fields[parts[0]] = int(parts[1]) * 1024
+        finally:
+            meminfo.close()
+        if 'MemAvailable:' in fields:
+            return fields['MemAvailable:']
+        return fields['MemFree:'] + fields.get('Cached:', 0)
+    except (IOError, KeyError, OSError, ValueError):
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+class QueueProxy(BaseProxy):
+    """Proxy for a queue of the main process, used by remote workers.
+    Closing it does nothing: the main process owns the queue.
+    """
+    _exposed_ = ('get', 'put')
+
+    def get(self, *args, **kw):
+        return self._callmethod('get', args, kw)
+
+    def put(self, *args, **kw):
+        return self._callmethod('put', args, kw)
+
+    def close(self):
+        pass
+
+
+class EventProxy(BaseProxy):
+    """Proxy for the main process's stop event, used by remote workers.
+    """
+    _exposed_ = ('is_set',)
+
+    def is_set(self):
+        return self._callmethod('is_set')
+
+
+class Coordinator(object):
+    """What remote workers need to know to run tests for the main
+    process: its configuration, loader class and result class. Counts
+    the remote workers that have asked, so that each can be told to stop.
+    """
+    def __init__(self, config, loaderClass, resultClass):
+        self._config = config
+        self._loaderClass = loaderClass
+        self._resultClass = resultClass
+        self.workers = 0
+
+    def settings(self):
+        self.workers += 1
+        return (self._config, self._loaderClass, self._resultClass)
+
+
+class CoordinatorManager(BaseManager):
+    """Serves the main process's test queue, result queue, stop event and
+    Coordinator to remote workers. Workers use the registrations made
+    here; each run of the main process registers the objects it serves on
+    a subclass of its own in serve().
+    """
+    pass
+
+if BaseManager is not object:
+    CoordinatorManager.register('get_test_queue', proxytype=QueueProxy)
+    CoordinatorManager.register('get_result_queue', proxytype=QueueProxy)
+    CoordinatorManager.register('get_should_stop', proxytype=EventProxy)
+    CoordinatorManager.register('get_coordinator')
+
+
+class TimingStore(object):
+    """Record of the time taken to run each dispatched test address,
+    persisted between runs so that batches can be scheduled longest
+    first.
+
+    Addresses under the working directory are stored relative to it, so
+    the same file can be used with checkouts in different locations.
+    """
+    def __init__(self, filename, workingDir=None):
+        self.filename = filename
+        self.workingDir = workingDir
+        self.times = {}
+
+    def load(self):
+        try:
+            fh = open(self.filename, 'rb')
+        except IOError:
+            log.debug("No timings file %s", self.filename)
+            return
+        try:
+            try:
+                times = pickle.load(fh)
+            except (KeyboardInterrupt, SystemExit):
+                raise
+            except:
+                log.debug("Unable to read timings from %s: %s",
+                          self.filename, sys.exc_info()[1])
+                return
+        finally:
+            fh.close()
+        if isinstance(times, dict):
+            self.times = times
+        log.debug("Loaded %s timings from %s", len(self.times), self.filename)
+
+    def save(self):
+        fh = open(self.filename, 'wb')
+        try:
+            pickle.dump(self.times, fh)
+        finally:
+            fh.close()
+        log.debug("Saved %s timings to %s", len(self.times), self.filename)
+
+    def key(self, addr):
+        wd = self.workingDir
+        if wd and addr.startswith(wd + os.sep):
+            return addr[len(wd) + 1:]
+        return addr
+
+    def record(self, addr, taken):
+        """Record the time taken by the batch at addr. The stored value
+        is averaged with the previous one, to damp one-off slow runs.
+        If addr is a chunk (a tuple of addresses), the time is divided
+        evenly among its addresses.
+        """
+        if isinstance(addr, tuple):
+            for part in addr:
+                self.record(part, taken / len(addr))
+            return
+        key = self.key(addr)
+        old = self.times.get(key)
+        if old is not None:
+            taken = (old + taken) / 2.0
+        self.times[key] = taken
+
+    def estimate(self, addr):
+        """Expected time for the batch at addr. Unknown batches are
+        assumed to take the average of all recorded times. The estimate
+        for a chunk is the sum of the estimates of its addresses.
+        """
+        if isinstance(addr, tuple):
+            return sum([self.estimate(part) for part in addr])
+        try:
+            return self.times[self.key(addr)]
+        except KeyError:
+            if not self.times:
+                return 0.0
+            return sum(self.times.values()) / len(self.times)
+
+    def sortLongestFirst(self, addrs):
+        """Sort addrs in place so that the batches expected to take the
+        longest come first. Equal estimates keep their original order.
+        """
+        sort_list(addrs, self.estimate, reverse=True)
+
+
+class AffinityScheduler(object):
+    """Hands out tasks to workers so that all tasks with the same key
+    (the module of their addresses) go to the same worker. The groups of
+    tasks are dealt out to the workers' backlogs in order; a worker whose
+    backlog is empty steals the last group from the worker with the most
+    tasks left in its backlog. A group is never split once started.
+    """
+    def __init__(self, tasks, workers, key):
+        groups = []
+        by_key = {}
+        for task_ix, addr in tasks:
+            k = key(addr)
+            if k not in by_key:
+                by_key[k] = []
+                groups.append(by_key[k])
+            by_key[k].append((task_ix, addr))
+        self.backlogs = [[] for i in range(workers)]
+        for ix, group in enumerate(groups):
+            self.backlogs[ix % workers].append(group)
+        self.current = [[] for i in range(workers)]
+        self.owners = {}
+
+    def next(self, worker):
+        """The next task for worker, as (task_ix, addr, keep), or None
+        if there is nothing left for it. keep is True if the worker's
+        next task will be in the same group.
+        """
+        current = self.current[worker]
+        if not current:
+            backlog = self.backlogs[worker]
+            if backlog:
+                current.extend(backlog.pop(0))
+            else:
+                stolen = self.steal()
+                if stolen is None:
+                    return None
+                log.debug("Worker %s steals %s tasks", worker, len(stolen))
+                current.extend(stolen)
+        task_ix, addr = current.pop(0)
+        self.owners[task_ix] = worker
+        return (task_ix, addr, bool(current))
+
+    def steal(self):
+        victim = None
+        most = 0
+        for backlog in self.backlogs:
+            left = sum([len(group) for group in backlog])
+            if left > most:
+                victim, most = backlog, left
+        if victim is None:
+            return None
+        return victim.pop()
+
+
 class MultiProcess(Plugin):
     """
     Run tests in multiple processes. Requires processing module.
@@ -159,14 +609,108 @@ class MultiProcess(Plugin):
                           metavar="NUM",
                           help="Spread test run among this many processes. "
                           "Set a number equal to the number of processors "
-                          "or cores in your machine for best results. "
-                          "[NOSE_PROCESSES]")
+                          "or cores in your machine for best results, or "
+                          "use 'auto' to start one per processor, as many "
+                          "as available memory allows. [NOSE_PROCESSES]")
         parser.add_option("--process-timeout", action="store",
                           default=env.get('NOSE_PROCESS_TIMEOUT', 10),
                           dest="multiprocess_timeout",
                           metavar="SECONDS",
                           help="Set timeout for return of results from each "
                           "test runner process. [NOSE_PROCESS_TIMEOUT]")
+        parser.add_option("--process-schedule", action="store",
+                          type="choice", choices=('discovery', 'longest'),
+                          default=env.get('NOSE_PROCESS_SCHEDULE',
+                                          'discovery'),
+                          dest="multiprocess_schedule",
+                          metavar="ORDER",
+                          help="Order in which batches of tests are "
+                          "dispatched to test runner processes: "
+                          "'discovery' (the default) or 'longest', which "
+                          "dispatches the batches that took longest in "
+                          "previous runs first. [NOSE_PROCESS_SCHEDULE]")
+        parser.add_option("--process-timings", action="store",
+                          default=env.get('NOSE_PROCESS_TIMINGS'),
+                          dest="multiprocess_timings",
+                          metavar="FILE",
+                          help="Record the time taken by each batch of "
+                          "tests in this file. Default with "
+                          "--process-schedule=longest is the file "
+                          ".nosetimings in the working directory. "
+                          "[NOSE_PROCESS_TIMINGS]")
+        parser.add_option("--process-chunk-size", action="store",
+                          default=env.get('NOSE_PROCESS_CHUNK_SIZE', 1),
+                          dest="multiprocess_chunk_size",
+                          metavar="SIZE",
+                          help="Send up to this many batches of tests from "
+                          "the same module to a test runner process at "
+                          "once. Use 'auto' to size chunks so that each "
+                          "process receives about four of them. "
+                          "[NOSE_PROCESS_CHUNK_SIZE]")
+        parser.add_option("--process-affinity", action="store_true",
+                          default=env.get('NOSE_PROCESS_AFFINITY'),
+                          dest="multiprocess_affinity",
+                          help="Send all batches of tests from the same "
+                          "module to the same test runner process, so that "
+                          "the module's fixtures run only once. "
+                          "[NOSE_PROCESS_AFFINITY]")
+        parser.add_option("--process-preload", action="append",
+                          default=env.get('NOSE_PROCESS_PRELOAD'),
+                          dest="multiprocess_preload",
+                          metavar="MODULES",
+                          help="Import these modules (comma-separated) in "
+                          "the main process before starting test runner "
+                          "processes, so that forked processes inherit "
+                          "them. May be specified multiple times. "
+                          "[NOSE_PROCESS_PRELOAD]")
+        parser.add_option("--process-listen", action="store",
+                          default=env.get('NOSE_PROCESS_LISTEN'),
+                          dest="multiprocess_listen",
+                          metavar="HOST:PORT",
+                          help="Also hand out tests to test runner "
+                          "processes on other hosts, which connect to "
+                          "this address with --process-connect. "
+                          "[NOSE_PROCESS_LISTEN]")
+        parser.add_option("--process-connect", action="store",
+                          default=env.get('NOSE_PROCESS_CONNECT'),
+                          dest="multiprocess_connect",
+                          metavar="HOST:PORT",
+                          help="Don't collect tests: instead, run tests "
+                          "handed out by the nose process listening at "
+                          "this address (see --process-listen). "
+                          "[NOSE_PROCESS_CONNECT]")
+        parser.add_option("--process-authkey", action="store",
+                          default=env.get('NOSE_PROCESS_AUTHKEY'),
+                          dest="multiprocess_authkey",
+                          metavar="KEY",
+                          help="Secret shared by the listening and "
+                          "connecting nose processes. Required with "
+                          "--process-listen and --process-connect. "
+                          "[NOSE_PROCESS_AUTHKEY]")
+        parser.add_option("--process-test-timeout", action="store",
+                          default=env.get('NOSE_PROCESS_TEST_TIMEOUT', 0),
+                          dest="multiprocess_test_timeout",
+                          metavar="SECONDS",
+                          help="Kill a test runner process that spends "
+                          "longer than this running one batch of tests, "
+                          "record an error for the batch, and start a new "
+                          "process in its place. Default is 0 (no "
+                          "deadline). [NOSE_PROCESS_TEST_TIMEOUT]")
+        parser.add_option("--process-restart-after", action="store",
+                          default=env.get('NOSE_PROCESS_RESTART_AFTER', 0),
+                          dest="multiprocess_restart_after",
+                          metavar="TESTS",
+                          help="Replace a test runner process with a new "
+                          "one once it has run this many tests. Default is "
+                          "0 (never). [NOSE_PROCESS_RESTART_AFTER]")
+        parser.add_option("--process-max-memory", action="store",
+                          default=env.get('NOSE_PROCESS_MAX_MEMORY', 0),
+                          dest="multiprocess_max_memory",
+                          metavar="MB",
+                          help="Replace a test runner process with a new "
+                          "one once it uses more than this many megabytes "
+                          "of memory. Default is 0 (no limit). "
+                          "[NOSE_PROCESS_MAX_MEMORY]")
 
     def configure(self, options, config):
         """
@@ -183,20 +727,99 @@ class MultiProcess(Plugin):
         if config.worker:
             return
         self.config = config
+        try:
+            max_memory = int(float(options.multiprocess_max_memory or 0)
+                             * 1024 * 1024)
+        except (AttributeError, TypeError, ValueError):
+            max_memory = 0
+        auto = options.multiprocess_workers == 'auto'
         try:
             workers = int(options.multiprocess_workers)
         except (TypeError, ValueError):
             workers = 0
-        if workers:
+        listen = getattr(options, 'multiprocess_listen', None)
+        connect = getattr(options, 'multiprocess_connect', None)
+        if workers or auto or listen or connect:
             _import_mp()
             if Process is None:
                 self.enabled = False
                 return
             self.enabled = True
+            if auto:
+                workers = self.autoWorkers(max_memory)
+            self.config.multiprocess_listen = None
+            self.config.multiprocess_connect = None
+            if listen or connect:
+                authkey = options.multiprocess_authkey
+                if not authkey:
+                    raise ValueError("--process-authkey is required with "
+                                     "--process-listen and --process-connect")
+                if UNICODE_STRINGS:
+                    authkey = authkey.encode('utf-8')
+                self.config.multiprocess_authkey = authkey
+                if connect:
+                    self.config.multiprocess_connect = parseAddress(connect)
+                    # a remote runner needs at least one worker
+                    workers = max(workers, 1)
+                else:
+                    self.config.multiprocess_listen = parseAddress(listen)
             self.config.multiprocess_workers = workers
             self.config.multiprocess_timeout = int(options.multiprocess_timeout)
+            schedule = options.multiprocess_schedule
+            self.config.multiprocess_schedule = schedule
+            timings = options.multiprocess_timings
+            if timings is None and schedule == 'longest':
+                timings = '.nosetimings'
+            if timings is not None:
+                timings = os.path.expanduser(timings)
+                if not os.path.isabs(timings):
+                    timings = os.path.join(config.workingDir, timings)
+            self.config.multiprocess_timings = timings
+            chunk_size = options.multiprocess_chunk_size
+            if chunk_size != 'auto':
+                try:
+                    chunk_size = max(int(chunk_size), 1)
+                except (TypeError, ValueError):
+                    chunk_size = 1
+            self.config.multiprocess_chunk_size = chunk_size
+            # remote workers share one queue, so they can't have affinity
+            self.config.multiprocess_affinity = bool(
+                getattr(options, 'multiprocess_affinity', False)
+                and not self.config.multiprocess_listen)
+            preload = []
+            if options.multiprocess_preload:
+                for mods in [tolist(x)
+                             for x in tolist(options.multiprocess_preload)]:
+                    preload.extend(mods)
+            self.config.multiprocess_preload = preload
+            self.config.multiprocess_test_timeout = float(
+                options.multiprocess_test_timeout or 0)
+            try:
+                self.config.multiprocess_restart_after = int(
+                    options.multiprocess_restart_after or 0)
+            except (AttributeError, TypeError, ValueError):
+                self.config.multiprocess_restart_after = 0
+            self.config.multiprocess_max_memory = max_memory
             self.status['active'] = True
 
+    def autoWorkers(self, max_memory=0):
+        """Number of workers for --processes=auto: one per processor, but
+        no more than fit in available memory, assuming that each worker
+        needs max_memory bytes or, without a limit, as much as this
+        process uses now.
+        """
+        try:
+            from multiprocessing import cpu_count
+            workers = cpu_count()
+        except (ImportError, NotImplementedError):
+            workers = 1
+        needed = max_memory or memoryUsage() or peakMemoryUsage()
+        available = availableMemory()
+        if needed and available:
+            workers = min(workers, available // needed)
+        log.debug("Using %s workers", workers)
+        return max(int(workers), 1)
+
     def prepareTestLoader(self, loader):
         """Remember loader class so MultiProcessTestRunner can instantiate
         the right loader.
@@ -204,8 +827,13 @@ class MultiProcess(Plugin):
         self.loaderClass = loader.__class__
 
     def prepareTestRunner(self, runner):
-        """Replace test runner with MultiProcessTestRunner.
+        """Replace test runner with MultiProcessTestRunner, or with
+        RemoteWorkerRunner when connecting to another nose process.
         """
+        if getattr(self.config, 'multiprocess_connect', None):
+            return RemoteWorkerRunner(stream=runner.stream,
+                                      verbosity=self.config.verbosity,
+                                      config=self.config)
         # replace with our runner class
         return MultiProcessTestRunner(stream=runner.stream,
                                       verbosity=self.config.verbosity,
@@ -214,10 +842,15 @@ class MultiProcess(Plugin):
 
 
 class MultiProcessTestRunner(TextTestRunner):
+    spoolDir = None
 
     def __init__(self, **kw):
         self.loaderClass = kw.pop('loaderClass', loader.defaultTestLoader)
         super(MultiProcessTestRunner, self).__init__(**kw)
+        self.timings = None
+        filename = getattr(self.config, 'multiprocess_timings', None)
+        if filename:
+            self.timings = TimingStore(filename, self.config.workingDir)
 
     def run(self, test):
         """
@@ -227,7 +860,18 @@ class MultiProcessTestRunner(TextTestRunner):
         suite or any sub-suites.
 
         """
+        # local workers spool long error entries to files in this
+        # directory; any that are never read are removed with it
+        self.spoolDir = tempfile.mkdtemp(prefix='nose-')
+        try:
+            return self.runWorkers(test)
+        finally:
+            shutil.rmtree(self.spoolDir, ignore_errors=True)
+            self.spoolDir = None
+
+    def runWorkers(self, test):
         log.debug("%s.run(%s) (%s)", self, test, os.getpid())
+        self.preload()
         wrapper = self.config.plugins.prepareTest(test)
         if wrapper is not None:
             test = wrapper
@@ -240,16 +884,26 @@ class MultiProcessTestRunner(TextTestRunner):
         testQueue = Queue()
         resultQueue = Queue()
         tasks = {}
+        task_list = []
         completed = {}
+        running = {}
+        entries = {}
         workers = []
         to_teardown = []
         shouldStop = Event()
 
         result = self._makeResult()
         start = time.time()
+        if self.timings is not None:
+            self.timings.load()
+        listen = getattr(self.config, 'multiprocess_listen', None)
+        if listen:
+            stopServing = self.serve(listen, testQueue, resultQueue,
+                                     shouldStop, result.__class__)
 
         # dispatch and collect results
         # put indexes only on queue because tests aren't picklable
+        queued = []
         for case in self.nextBatch(test):
             log.debug("Next batch %s (%s)", case, type(case))
             if (isinstance(case, nose.case.Test) and
@@ -270,48 +924,123 @@ class MultiProcessTestRunner(TextTestRunner):
                 else:
                     to_teardown.append(case)
                     for _t in case:
-                        test_addr = self.address(_t)
-                        testQueue.put(test_addr, block=False)
-                        tasks[test_addr] = None
-                        log.debug("Queued shared-fixture test %s (%s) to %s",
-                                  len(tasks), test_addr, testQueue)
-
+                        queued.append(self.address(_t))
             else:
-                test_addr = self.address(case)
-                testQueue.put(test_addr, block=False)
-                tasks[test_addr] = None
+                queued.append(self.address(case))
+
+        queued = self.makeChunks(queued)
+        if (self.timings is not None
+            and self.config.multiprocess_schedule == 'longest'):
+            self.timings.sortLongestFirst(queued)
+        num_workers = self.config.multiprocess_workers
+        scheduler = None
+        if getattr(self.config, 'multiprocess_affinity', False):
+            # each worker gets its own queue, fed as it finishes tasks
+            queues = [Queue() for i in range(num_workers)]
+            scheduler = AffinityScheduler(enumerate(queued), num_workers,
+                                          self.moduleKey)
+        else:
+            queues = [testQueue] * num_workers
+        for test_addr in queued:
+            # workers report the index of the task they are running,
+            # so the task can be timed out
+            if scheduler is None:
+                testQueue.put((len(task_list), test_addr, False),
+                              block=False)
                 log.debug("Queued test %s (%s) to %s",
-                          len(tasks), test_addr, testQueue)
-
-        log.debug("Starting %s workers", self.config.multiprocess_workers)
-        for i in range(self.config.multiprocess_workers):
-            p = Process(target=runner, args=(i,
-                                             testQueue,
-                                             resultQueue,
-                                             shouldStop,
-                                             self.loaderClass,
-                                             result.__class__,
-                                             pickle.dumps(self.config)))
-            # p.setDaemon(True)
-            p.start()
-            workers.append(p)
+                          len(tasks) + 1, test_addr, testQueue)
+            task_list.append(test_addr)
+            tasks[test_addr] = None
+        if scheduler is not None:
+            # two tasks each, so that no worker waits between tasks
+            for i in range(num_workers):
+                self.feed(scheduler, queues, i)
+                self.feed(scheduler, queues, i)
+
+        log.debug("Starting %s workers", num_workers)
+        for i in range(num_workers):
+            workers.append(self.startProcess(
+                    i, queues[i], resultQueue, shouldStop, result.__class__))
             log.debug("Started worker process %s", i+1)
 
         num_tasks = len(tasks)
+        poll = self.config.multiprocess_timeout
+        # when results last arrived, for giving up on remote workers
+        last_event = time.time()
+        test_timeout = getattr(self.config, 'multiprocess_test_timeout', 0)
+        if test_timeout:
+            # wake up often enough to notice hung workers
+            poll = min(poll, 1)
         while tasks:
             log.debug("Waiting for results (%s/%s tasks)",
                       len(completed), num_tasks)
+            if test_timeout:
+                for ix, w in enumerate(workers):
+                    task_ix = w.currentTask.value
+                    if task_ix < 0 or not w.is_alive():
+                        continue
+                    taken = time.time() - w.currentStart.value
+                    if taken < test_timeout:
+                        continue
+                    addr = task_list[task_ix]
+                    log.debug("Worker %s timed out running %s", ix, addr)
+                    w.terminate()
+                    w.join()
+                    workers[ix] = self.startProcess(
+                        ix, queues[ix], resultQueue, shouldStop,
+                        result.__class__)
+                    if scheduler is not None:
+                        # the killed task will never report that it's done
+                        self.feed(scheduler, queues, ix)
+                    try:
+                        tasks.pop(addr)
+                    except KeyError:
+                        continue
+                    completed[addr] = None
+                    if self.timings is not None:
+                        self.timings.record(addr, taken)
+                    entries.pop(task_ix, None)
+                    self.removeSpool(task_ix)
+                    test, held = running.pop(task_ix, (None, ''))
+                    self.stream.write(held)
+                    self.timedOut(result, addr, test_timeout, test)
+                if not tasks:
+                    break
+                if (self.config.stopOnError
+                    and not result.wasSuccessful()):
+                    shouldStop.set()
+                    break
             try:
-                addr, batch_result = resultQueue.get(
-                    timeout=self.config.multiprocess_timeout)
-                log.debug('Results received for %s', addr)
-                try:
-                    tasks.pop(addr)
-                except KeyError:
-                    log.debug("Got result for unknown task? %s", addr)
+                task_ix, event = resultQueue.get(timeout=poll)
+                last_event = time.time()
+                if event[0] == 'done':
+                    running.pop(task_ix, None)
+                    entries.pop(task_ix, None)
+                    self.removeSpool(task_ix)
+                    if scheduler is not None and task_ix in scheduler.owners:
+                        self.feed(scheduler, queues,
+                                  scheduler.owners[task_ix])
+                    kind, addr, output, taken = event
+                    log.debug('Results received for %s', addr)
+                    self.stream.write(output)
+                    try:
+                        tasks.pop(addr)
+                    except KeyError:
+                        log.debug("Got result for unknown task? %s", addr)
+                    else:
+                        completed[addr] = None
+                        if self.timings is not None:
+                            self.timings.record(addr, taken)
+                elif event[0] == 'retire':
+                    ix = event[1]
+                    log.debug("Replacing worker %s", ix)
+                    workers[ix].join()
+                    workers[ix] = self.startProcess(
+                        ix, queues[ix], resultQueue, shouldStop,
+                        result.__class__)
                 else:
-                    completed[addr] = batch_result
-                self.consolidate(result, batch_result)
+                    event = self.unpack(entries, task_ix, event)
+                    self.replay(result, self.hold(running, task_ix, event))
                 if (self.config.stopOnError
                     and not result.wasSuccessful()):
                     # set the stop condition
@@ -324,12 +1053,33 @@ class MultiProcessTestRunner(TextTestRunner):
                     if w.is_alive():
                         any_alive = True
                         break
-                if not any_alive:
+                if not any_alive and not listen:
                     log.debug("All workers dead")
                     break
+                idle = time.time() - last_event
+                if (not any_alive and listen
+                    and idle >= self.config.multiprocess_timeout):
+                    log.debug("No results from remote workers for %ss",
+                              idle)
+                    shouldStop.set()
+                    for task_ix, (test, held) in running.items():
+                        self.stream.write(held)
+                    running.clear()
+                    self.unfinished(result,
+                                    [addr for addr in task_list
+                                     if tasks.pop(addr, 0) is None],
+                                    self.config.multiprocess_timeout)
+                    break
         log.debug("Completed %s/%s tasks (%s remain)",
                   len(completed), num_tasks, len(tasks))
 
+        # Tell all workers to stop, and report what they send as they do,
+        # such as errors from tearing down the modules they held
+        for ix, w in enumerate(workers):
+            if w.is_alive():
+                queues[ix].put('STOP', block=False)
+        self.drain(result, workers, resultQueue, running, entries)
+
         for case in to_teardown:
             log.debug("Tearing down shared fixtures for %s", case)
             try:
@@ -341,17 +1091,198 @@ class MultiProcessTestRunner(TextTestRunner):
 
         stop = time.time()
 
+        if self.timings is not None:
+            try:
+                self.timings.save()
+            except IOError:
+                log.warning("Unable to save timings to %s: %s",
+                            self.timings.filename, sys.exc_info()[1])
+
         result.printErrors()
         result.printSummary(start, stop)
         self.config.plugins.finalize(result)
 
-        # Tell all workers to stop
-        for w in workers:
-            if w.is_alive():
-                testQueue.put('STOP', block=False)
+        if listen:
+            stopServing()
 
         return result
 
+    def drain(self, result, workers, resultQueue, running, entries):
+        """Replay the events that workers send while they stop, until
+        they have all exited, or none has sent anything for
+        --process-timeout seconds.
+        """
+        timeout = self.config.multiprocess_timeout
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            try:
+                task_ix, event = resultQueue.get(timeout=0.1)
+            except Empty:
+                for w in workers:
+                    if w.is_alive():
+                        break
+                else:
+                    return
+                continue
+            deadline = time.time() + timeout
+            if event[0] == 'done':
+                running.pop(task_ix, None)
+                entries.pop(task_ix, None)
+                self.removeSpool(task_ix)
+                self.stream.write(event[2])
+            elif event[0] != 'retire':
+                event = self.unpack(entries, task_ix, event)
+                self.replay(result, self.hold(running, task_ix, event))
+
+    def serve(self, address, testQueue, resultQueue, shouldStop,
+              resultClass):
+        """Serve the test and result queues to remote workers at address,
+        from a thread of this process. Returns a function that tells the
+        remote workers to stop and stops accepting new connections.
+        """
+        coordinator = Coordinator(
+            pickle.dumps(self.config), self.loaderClass, resultClass)
+        authkey = self.config.multiprocess_authkey
+
+        class RunManager(CoordinatorManager):
+            # registrations for this run only; register() gives each
+            # subclass its own copy of the registry
+            pass
+        RunManager.register('get_test_queue', callable=lambda: testQueue,
+                            proxytype=QueueProxy)
+        RunManager.register('get_result_queue', callable=lambda: resultQueue,
+                            proxytype=QueueProxy)
+        RunManager.register('get_should_stop', callable=lambda: shouldStop,
+                            proxytype=EventProxy)
+        RunManager.register('get_coordinator', callable=lambda: coordinator)
+        server = RunManager(address=address, authkey=authkey).get_server()
+        log.debug("Serving tests to remote workers at %s:%s",
+                  *server.address)
+        stopping = threading.Event()
+        handlers = []
+
+        def accept():
+            # like server.serve_forever, but can be stopped
+            while not stopping.isSet():
+                try:
+                    conn = server.listener.accept()
+                except (OSError, IOError):
+                    continue
+                if stopping.isSet():
+                    conn.close()
+                    break
+                t = threading.Thread(target=server.handle_request,
+                                     args=(conn,))
+                t.setDaemon(True)
+                t.start()
+                handlers.append(t)
+            server.listener.close()
+        thread = threading.Thread(target=accept)
+        thread.setDaemon(True)
+        thread.start()
+
+        def stopServing():
+            for i in range(coordinator.workers):
+                testQueue.put('STOP', block=False)
+            stopping.set()
+            try:
+                # wake up the accepting thread
+                Client(server.address).close()
+            except (OSError, IOError):
+                pass
+            thread.join()
+            # give the remote workers a moment to stop and disconnect
+            deadline = time.time() + self.config.multiprocess_timeout
+            for t in handlers:
+                t.join(max(deadline - time.time(), 0))
+        return stopServing
+
+    def feed(self, scheduler, queues, ix):
+        """Queue the next task that scheduler has for worker ix, or tell
+        the worker to stop if there is none.
+        """
+        task = scheduler.next(ix)
+        if task is None:
+            queues[ix].put('STOP', block=False)
+        else:
+            log.debug("Queued test %s (%s) to worker %s", task[0], task[1], ix)
+            queues[ix].put(task, block=False)
+
+    def startProcess(self, ix, testQueue, resultQueue, shouldStop,
+                     resultClass):
+        """Start test runner process number ix. The process records the
+        index of the task it is running, and when it started, in shared
+        values that the main process uses to time out hung tasks.
+        """
+        currentTask = Value('i', -1)
+        currentStart = Value('d', 0.0)
+        p = Process(target=runner, args=(ix,
+                                         testQueue,
+                                         resultQueue,
+                                         shouldStop,
+                                         currentTask,
+                                         currentStart,
+                                         self.loaderClass,
+                                         resultClass,
+                                         pickle.dumps(self.config),
+                                         True,
+                                         self.spoolDir))
+        p.currentTask = currentTask
+        p.currentStart = currentStart
+        # p.setDaemon(True)
+        p.start()
+        return p
+
+    def unfinished(self, result, addrs, timeout):
+        """Record an error for each task address in addrs that no worker
+        returned results for before the run gave up waiting.
+        """
+        for addr in addrs:
+            failure.Failure(
+                TimedOutException,
+                "No test runner process returned results for %s within %s "
+                "seconds" % (addr, timeout))(result)
+
+    def timedOut(self, result, test_addr, timeout, test=None):
+        """Record an error for a task whose worker was killed for running
+        past the timeout: against test, the test the worker had started,
+        or if it had not started one, against each address in the task.
+        """
+        if test is not None:
+            exc = TimedOutException(
+                "%s did not finish within %s seconds; its test runner "
+                "process was killed" % (test, timeout))
+            err = (TimedOutException, exc, None)
+            entry = ''.join(
+                traceback.format_exception_only(TimedOutException, exc))
+            self.replay(result, ('error', test, '', (err, 'errors', entry)))
+            result.printLabel('ERROR')
+            self.replay(result, ('stop', test, '', timeout))
+            return
+        if isinstance(test_addr, tuple):
+            addrs = test_addr
+        else:
+            addrs = [test_addr]
+        for addr in addrs:
+            failure.Failure(
+                TimedOutException,
+                "%s did not finish within %s seconds; its test runner "
+                "process was killed" % (addr, timeout))(result)
+
+    def preload(self):
+        """Import the modules named in multiprocess_preload, so that
+        worker processes forked later inherit them.
+        """
+        for name in getattr(self.config, 'multiprocess_preload', None) or []:
+            log.debug("Preloading %s", name)
+            try:
+                __import__(name)
+            except (KeyboardInterrupt, SystemExit):
+                raise
+            except:
+                log.warning("Unable to preload module %s: %s",
+                            name, sys.exc_info()[1])
+
     def address(self, case):
         if hasattr(case, 'address'):
             file, mod, call = case.address()
@@ -376,6 +1307,48 @@ class MultiProcessTestRunner(TextTestRunner):
             parts.append(call)
         return ':'.join(map(str, parts))
 
+    def makeChunks(self, addrs):
+        """Group addrs into chunks of up to multiprocess_chunk_size
+        addresses from the same module, keeping the order in which each
+        module was first seen. Chunks of one address are left as plain
+        addresses; longer chunks are tuples.
+        """
+        size = getattr(self.config, 'multiprocess_chunk_size', 1)
+        if size == 'auto':
+            workers = max(getattr(self.config, 'multiprocess_workers', 1), 1)
+            size = max(len(addrs) // (workers * 4), 1)
+        if size <= 1:
+            return addrs
+        modules = []
+        by_module = {}
+        for addr in addrs:
+            key = self.moduleKey(addr)
+            if key not in by_module:
+                modules.append(key)
+                by_module[key] = []
+            by_module[key].append(addr)
+        chunks = []
+        for key in modules:
+            group = by_module[key]
+            for i in range(0, len(group), size):
+                chunk = tuple(group[i:i + size])
+                if len(chunk) == 1:
+                    chunks.append(chunk[0])
+                else:
+                    chunks.append(chunk)
+        log.debug("Grouped %s addresses into %s chunks",
+                  len(addrs), len(chunks))
+        return chunks
+
+    def moduleKey(self, addr):
+        """The file or module part of addr (the part before the callable).
+        For a chunk, the module of its addresses.
+        """
+        if isinstance(addr, tuple):
+            addr = addr[0]
+        head, tail = os.path.split(addr)
+        return os.path.join(head, tail.split(':')[0])
+
     def nextBatch(self, test):
         # allows tests or suites to mark themselves as not safe
         # for multiprocess execution
@@ -383,10 +1356,7 @@ class MultiProcessTestRunner(TextTestRunner):
             if not getattr(test.context, '_multiprocess_', True):
                 return
 
-        if ((isinstance(test, ContextSuite)
-             and test.hasFixtures(self.checkCanSplit))
-            or not getattr(test, 'can_split', True)
-            or not isinstance(test, unittest.TestSuite)):
+        if self.isBatch(test):
             # regular test case, or a suite with context fixtures
 
             # special case: when run like nosetests path/to/module.py
@@ -394,7 +1364,8 @@ class MultiProcessTestRunner(TextTestRunner):
             # the same context as that item. In that case, we want the
             # item, not the top-level suite
             if isinstance(test, ContextSuite):
-                contained = list(test)
+                # two are enough to tell; don't expand a whole generator
+                contained = list(islice(test, 2))
                 if (len(contained) == 1
                     and getattr(contained[0], 'context', None) == test.context):
                     test = contained[0]
@@ -407,6 +1378,15 @@ class MultiProcessTestRunner(TextTestRunner):
                 for batch in self.nextBatch(case):
                     yield batch
 
+    def isBatch(self, test):
+        """Is test dispatched as a unit (a test case, or a suite whose
+        context fixtures keep it from being split)?
+        """
+        return ((isinstance(test, ContextSuite)
+                 and test.hasFixtures(self.checkCanSplit))
+                or not getattr(test, 'can_split', True)
+                or not isinstance(test, unittest.TestSuite))
+
     def checkCanSplit(self, context, fixt):
         """
         Callback that we use to check whether the fixtures found in a
@@ -428,37 +1408,136 @@ class MultiProcessTestRunner(TextTestRunner):
             return False
         return getattr(context, '_multiprocess_shared_', False)
 
-    def consolidate(self, result, batch_result):
-        log.debug("batch result is %s" , batch_result)
+    def hold(self, running, task_ix, event):
+        """Keep track of the test each task is running, so that a timeout
+        can be recorded against it, and events can refer to it as None.
+        The output of a start event is held back and written with the
+        test's outcome, so that the progress output of tests running at
+        the same time is not interleaved. Returns the event to replay.
+        """
         try:
-            output, testsRun, failures, errors, errorClasses = batch_result
+            kind, test, output, data = event
         except ValueError:
-            log.debug("result in unexpected format %s", batch_result)
+            # replay reports it
+            return event
+        if kind == 'start':
+            running[task_ix] = (test, output)
+            return (kind, test, '', data)
+        if task_ix in running:
+            test_, held = running[task_ix]
+            if test is None:
+                test = test_
+            if kind == 'stop':
+                del running[task_ix]
+            else:
+                running[task_ix] = (test_, '')
+            output = held + output
+        return (kind, test, output, data)
+
+    def unpack(self, entries, task_ix, event):
+        """Restore the formatted error of an outcome event packed by the
+        worker (see packEntry). entries holds the entries received so far
+        for each task. Returns the event to replay.
+        """
+        try:
+            kind, test, output, (err, where, entry) = event
+        except (TypeError, ValueError):
+            return event
+        received = entries.setdefault(task_ix, [])
+        if isinstance(entry, int):
+            entry = received[entry]
+        elif entry is not None:
+            if isinstance(entry, tuple):
+                entry = self.readEntry(entry[1])
+            received.append(entry)
+        return (kind, test, output, (err, where, entry))
+
+    def removeSpool(self, task_ix):
+        """Remove the entries spooled for task_ix that were not read.
+        """
+        if self.spoolDir is not None:
+            shutil.rmtree(os.path.join(self.spoolDir, str(task_ix)),
+                          ignore_errors=True)
+
+    def readEntry(self, filename):
+        """Read (and remove) an entry spooled to a temporary file.
+        """
+        try:
+            f = open(filename, 'rb')
+            try:
+                return pickle.load(f)
+            finally:
+                f.close()
+                os.unlink(filename)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError):
+            return "(unable to read error details from %s: %s)" % (
+                filename, sys.exc_info()[1])
+
+    def replay(self, result, event):
+        """Replay an event sent by a worker (see streamEvents): call the
+        plugins as the worker's result proxy did, record the outcome in
+        result and write the worker's progress output.
+        """
+        log.debug("event is %s", event)
+        try:
+            kind, test, output, data = event
+        except ValueError:
+            log.debug("event in unexpected format %s", event)
             failure.Failure(*sys.exc_info())(result)
             return
+        plugins = self.config.plugins
+        if kind == 'start':
+            plugins.startTest(test)
+            result.testsRun += 1
+        elif kind == 'success':
+            plugins.addSuccess(test)
+        elif kind == 'failure':
+            err, where, entry = data
+            plugins.addFailure(test, err)
+            self.record(result, test, where, entry)
+        elif kind in ('error', 'skip'):
+            err, where, entry = data
+            plugins.addError(test, err)
+            self.record(result, test, where, entry)
+        elif kind == 'stop':
+            plugins.stopTest(test)
+            log.debug("%s took %.3fs", test, data)
         self.stream.write(output)
-        result.testsRun += testsRun
-        result.failures.extend(failures)
-        result.errors.extend(errors)
-        for key, (storage, label, isfail) in errorClasses.items():
+
+    def record(self, result, test, where, entry):
+        """Add a replayed outcome to result. where is 'errors',
+        'failures' or the (class, label, isfail) of an error class.
+        """
+        if where == 'errors':
+            test.passed = False
+            result.errors.append((test, entry))
+        elif where == 'failures':
+            test.passed = False
+            result.failures.append((test, entry))
+        elif where is not None:
+            key, label, isfail = where
             if key not in result.errorClasses:
                 # Ordinarily storage is result attribute
                 # but it's only processed through the errorClasses
                 # dict, so it's ok to fake it here
                 result.errorClasses[key] = ([], label, isfail)
-            mystorage, _junk, _junk = result.errorClasses[key]
-            mystorage.extend(storage)
-        log.debug("Ran %s tests (%s)", testsRun, result.testsRun)
+            storage, _junk, isfail = result.errorClasses[key]
+            if isfail:
+                test.passed = False
+            storage.append((test, entry))
 
 
-def runner(ix, testQueue, resultQueue, shouldStop,
-           loaderClass, resultClass, config):
+def runner(ix, testQueue, resultQueue, shouldStop, currentTask, currentStart,
+           loaderClass, resultClass, config, local=True, spoolDir=None):
     config = pickle.loads(config)
     config.plugins.begin()
     log.debug("Worker %s executing", ix)
     log.debug("Active plugins worker %s: %s", ix, config.plugins._plugins)
     loader = loaderClass(config=config)
-    loader.suiteClass.suiteClass = NoSharedFixtureContextSuite
+    factory = loader.suiteClass
+    factory.suiteClass = NoSharedFixtureContextSuite
+    # module teardowns wait until the worker is done with the module
+    factory.held = []
 
     def get():
         case = testQueue.get(timeout=config.multiprocess_timeout)
@@ -474,45 +1553,291 @@ def runner(ix, testQueue, resultQueue, shouldStop,
             return plug_result
         return result
 
-    def batch(result):
-        failures = [(TestLet(c), err) for c, err in result.failures]
-        errors = [(TestLet(c), err) for c, err in result.errors]
-        errorClasses = {}
-        for key, (storage, label, isfail) in result.errorClasses.items():
-            errorClasses[key] = ([(TestLet(c), err) for c, err in storage],
-                                 label, isfail)
-        return (
-            result.stream.getvalue(),
-            result.testsRun,
-            failures,
-            errors,
-            errorClasses)
+    restart_after = getattr(config, 'multiprocess_restart_after', 0)
+    max_memory = getattr(config, 'multiprocess_max_memory', 0)
+    start_peak = peakMemoryUsage()
+    tests_run = 0
     try:
         try:
-            for test_addr in iter(get, 'STOP'):
+            for task_ix, test_addr, keep in iter(get, 'STOP'):
                 if shouldStop.is_set():
                     break
+                currentStart.value = time.time()
+                currentTask.value = task_ix
                 result = makeResult()
-                test = loader.loadTestsFromNames([test_addr])
+                def send(event, task_ix=task_ix):
+                    resultQueue.put((task_ix, event))
+                streamEvents(result, send,
+                             spool=spoolDir and os.path.join(spoolDir,
+                                                             str(task_ix)))
+                if isinstance(test_addr, tuple):
+                    # a chunk of addresses from the same module
+                    test = loader.loadTestsFromNames(list(test_addr))
+                else:
+                    test = loader.loadTestsFromNames([test_addr])
                 log.debug("Worker %s Test is %s (%s)", ix, test_addr, test)
 
+                start = time.time()
                 try:
                     test(result)
-                    resultQueue.put((test_addr, batch(result)))
                 except KeyboardInterrupt, SystemExit:
                     raise
                 except:
                     log.exception("Error running test or returning results")
                     failure.Failure(*sys.exc_info())(result)
-                    resultQueue.put((test_addr, batch(result)))
+                if not keep:
+                    releaseContexts(factory, result)
+                # done with the task: from here on, the main process
+                # must not kill this worker for taking too long
+                currentTask.value = -1
+                resultQueue.put((task_ix, ('done', test_addr,
+                                           result.stream.getvalue(),
+                                           time.time() - start)))
+                tests_run += result.testsRun
+                if not local or keep:
+                    continue
+                if ((restart_after and tests_run >= restart_after)
+                    or (max_memory
+                        and exceedsMemory(max_memory, start_peak))):
+                    # ask the main process for a fresh worker in our place
+                    log.debug("Worker %s retiring after %s tests",
+                              ix, tests_run)
+                    resultQueue.put((task_ix, ('retire', ix)))
+                    break
         except Empty:
             log.debug("Worker %s timed out waiting for tasks", ix)
+        if factory.held:
+            # stopped in the middle of a module: send what tearing it
+            # down reports as a batch of its own
+            task_ix = ('exit', ix, os.getpid())
+            result = makeResult()
+            def send(event):
+                resultQueue.put((task_ix, event))
+            streamEvents(result, send,
+                         spool=spoolDir and os.path.join(spoolDir,
+                                                         'exit-%s' % ix))
+            releaseContexts(factory, result)
+            send(('done', None, result.stream.getvalue(), 0))
     finally:
         testQueue.close()
         resultQueue.close()
     log.debug("Worker %s ending", ix)
 
 
+def releaseContexts(factory, result):
+    """Tear down the modules whose teardown factory's suites held back,
+    adding any errors to result, and forget what has been set up, so that
+    the worker's next task sets up its contexts again.
+    """
+    held, factory.held = factory.held, []
+    for suite, context in held:
+        try:
+            suite.releaseContext(context)
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except:
+            result.addError(suite, sys.exc_info())
+    factory.was_setup = {}
+    factory.was_torndown = {}
+
+
+def streamEvents(result, send, spool=None):
+    """Patch result so that each test's start, outcome and stop are passed
+    to send as they happen, for the main process to replay.
+
+    Each event is a tuple of (kind, test, output, data): kind is one of
+    'start', 'success', 'failure', 'error', 'skip' or 'stop', test is a
+    TestLet, or None for the test that was started last and has not
+    stopped yet, and output is what the result wrote to its stream while
+    handling the event. For outcomes other than success, data is (err,
+    where, entry): err is a picklable copy of the exc_info tuple without
+    its traceback, where tells the main process how the result stored the
+    outcome (see MultiProcessTestRunner.record) and entry is the stored,
+    formatted error (see packEntry). For 'stop', data is the time the test
+    took.
+    """
+    stream = result.stream
+    started = {}
+    current = [None]
+    entries = {}
+
+    def let(test):
+        if id(test) == current[0]:
+            return None
+        return TestLet(test)
+
+    def takeOutput():
+        output = stream.getvalue()
+        stream.seek(0)
+        stream.truncate()
+        return output
+
+    def storage():
+        found = [('errors', result.errors), ('failures', result.failures)]
+        for key, (store, label, isfail) in getattr(
+            result, 'errorClasses', {}).items():
+            found.append(((key, label, isfail), store))
+        return [(where, store, len(store)) for where, store in found]
+
+    def startTest(test, orig=result.startTest):
+        started[id(test)] = time.time()
+        orig(test)
+        send(('start', TestLet(test), takeOutput(), None))
+        current[0] = id(test)
+
+    def addSuccess(test, orig=result.addSuccess):
+        orig(test)
+        send(('success', let(test), takeOutput(), None))
+
+    def outcome(kind, orig):
+        def add(test, err):
+            before = storage()
+            orig(test, err)
+            where = entry = None
+            for w, store, count in before:
+                if len(store) > count:
+                    where, entry = w, store[-1][1]
+                    break
+            if kind == 'skip':
+                # like ResultProxy.addSkip, tell plugins about a SkipTest
+                err = (SkipTest, err, None)
+            entry = packEntry(entry, entries, spool)
+            send((kind, let(test), takeOutput(),
+                  (remoteError(err), where, entry)))
+        return add
+
+    def stopTest(test, orig=result.stopTest):
+        orig(test)
+        taken = time.time() - started.pop(id(test), time.time())
+        send(('stop', let(test), takeOutput(), taken))
+        if id(test) == current[0]:
+            current[0] = None
+
+    result.startTest = startTest
+    result.addSuccess = addSuccess
+    result.addFailure = outcome('failure', result.addFailure)
+    result.addError = outcome('error', result.addError)
+    if hasattr(result, 'addSkip'):
+        result.addSkip = outcome('skip', result.addSkip)
+    result.stopTest = stopTest
+
+
+def packEntry(entry, entries, spool=None):
+    """Formatted error entry, made smaller for sending to the main
+    process. An entry already in entries (those sent before for the same
+    task) is replaced by its index there. With spool, the name of a
+    directory, a long entry is written to a temporary file in it and
+    replaced by ('file', filename). See MultiProcessTestRunner.unpack and
+    MultiProcessTestRunner.readEntry.
+    """
+    if entry is None:
+        return None
+    if entry in entries:
+        return entries[entry]
+    entries[entry] = len(entries)
+    if spool and len(entry) > SPOOL_SIZE:
+        if not os.path.isdir(spool):
+            os.makedirs(spool)
+        fd, filename = tempfile.mkstemp(prefix='nose-', suffix='.entry',
+                                        dir=spool)
+        f = os.fdopen(fd, 'wb')
+        try:
+            pickle.dump(entry, f, 2)
+        finally:
+            f.close()
+        return ('file', filename)
+    return entry
+
+
+def remoteError(err):
+    """Copy of exc_info tuple err that can be sent to the main process.
+    The traceback is dropped; an exception that can't be pickled is
+    replaced by its message.
+    """
+    ec, ev, tb = err
+    try:
+        return pickle.loads(pickle.dumps((ec, ev, None)))
+    except (KeyboardInterrupt, SystemExit):
+        raise
+    except:
+        pass
+    detail = _exception_detail(ev)
+    try:
+        return pickle.loads(pickle.dumps((ec, detail, None)))
+    except (KeyboardInterrupt, SystemExit):
+        raise
+    except:
+        return (Exception, "%s: %s" % (getattr(ec, '__name__', ec), detail),
+                None)
+
+
+class RemoteWorkerRunner(TextTestRunner):
+    """Runs tests handed out by a nose process on another host (see
+    --process-connect), in --processes worker processes, until that
+    process is done.
+    """
+    def run(self, test):
+        # the tests to run come from the other process, so test,
+        # collected here, is never loaded
+        address = self.config.multiprocess_connect
+        authkey = self.config.multiprocess_authkey
+        manager = CoordinatorManager(address=address, authkey=authkey)
+        deadline = time.time() + self.config.multiprocess_timeout
+        while True:
+            try:
+                manager.connect()
+                break
+            except (OSError, IOError):
+                if time.time() > deadline:
+                    raise
+                log.debug("Waiting for %s:%s", *address)
+                time.sleep(0.1)
+            except EOFError:
+                # it finished as we connected
+                log.debug("%s:%s has no tests left", *address)
+                return self._makeResult()
+        log.debug("Connected to %s:%s", *address)
+        workers = []
+        for i in range(self.config.multiprocess_workers):
+            p = Process(target=remoteRunner,
+                        args=(i, address, authkey,
+                              Value('i', -1), Value('d', 0.0)))
+            p.start()
+            workers.append(p)
+        for w in workers:
+            w.join()
+        return self._makeResult()
+
+
+def remoteRunner(ix, address, authkey, currentTask, currentStart):
+    """Worker process for RemoteWorkerRunner: fetch the settings and
+    queues of the nose process at address, and run its tests.
+    """
+    manager = CoordinatorManager(address=address, authkey=authkey)
+    proxies = []
+    try:
+        try:
+            manager.connect()
+            for get in (manager.get_coordinator, manager.get_test_queue,
+                        manager.get_result_queue, manager.get_should_stop):
+                proxies.append(get())
+            coordinator, testQueue, resultQueue, shouldStop = proxies
+            config, loaderClass, resultClass = coordinator.settings()
+            # nothing here would replace a retiring worker, and the main
+            # process can't read temporary files on this host
+            runner(ix, testQueue, resultQueue, shouldStop, currentTask,
+                   currentStart, loaderClass, resultClass, config,
+                   local=False)
+        except (EOFError, IOError):
+            # the main process is done, and has gone away
+            log.debug("Worker %s lost connection to %s:%s", ix, *address)
+    finally:
+        # don't release the proxies on exit: if the main process is
+        # gone, each attempt would wait for it for several seconds
+        for proxy in proxies:
+            proxy._close.cancel()
+
+
 class NoSharedFixtureContextSuite(ContextSuite):
     """
     Context suite that never fires shared fixtures.
@@ -531,4 +1856,14 @@ class NoSharedFixtureContextSuite(ContextSuite):
     def teardownContext(self, context):
         if getattr(context, '_multiprocess_shared_', False):
             return
+        held = getattr(self.factory, 'held', None)
+        if held is not None and ismodule(context):
+            # the worker's next task may be in the same module
+            held.append((self, context))
+            return
+        super(NoSharedFixtureContextSuite, self).teardownContext(context)
+
+    def releaseContext(self, context):
+        """Tear down a context whose teardown was held back.
+        """
         super(NoSharedFixtureContextSuite, self).teardownContext(context)
@@ -12,9 +12,8 @@ more details on the various output options.
 
 try:
     import hotshot
-    from hotshot import stats
 except ImportError:
-    hotshot, stats = None, None
+    hotshot = None
 import logging
 import os
 import sys
@@ -98,6 +97,8 @@ class Profile(Plugin):
         """Output profiler report.
         """
         log.debug('printing profiler report')
+        # imported here, as it imports pstats, which is slow to import
+        from hotshot import stats
         self.prof.close()
         prof_stats = stats.load(self.pfile)
         prof_stats.sort_stats(self.sort)
@@ -0,0 +1,209 @@
+"""
+Use the shard plugin to split one test run among several machines, such as
+the nodes of a continuous integration build. Every machine runs the same
+command, each with its own shard number, and each runs only its share of
+the tests::
+
+  nosetests --shard=1/3
+  nosetests --shard=2/3
+  nosetests --shard=3/3
+
+Together, the shards run every test exactly once.
+
+How tests are divided
+=====================
+
+Tests are divided into the same batches that the :doc:`multiprocess plugin
+<multiprocess>` dispatches to its worker processes, so context fixtures stay
+intact: a module or class with fixtures goes to one shard as a whole (unless
+it sets ``_multiprocess_can_split_``), and its fixtures run only on that
+shard. Shards may also use ``--processes`` to divide their share further.
+
+Each batch is assigned to a shard in one of two ways, chosen with
+``--shard-by``:
+
+``hash`` (the default)
+  By a checksum of the batch's address, relative to the working directory.
+  A batch stays on the same shard from one run to the next, on any
+  machine, as long as its address and the number of shards don't change.
+
+``duration``
+  By the time each batch took in previous runs, read from a timings file
+  written by the multiprocess plugin's ``--process-timings`` option
+  (``.nosetimings`` by default; use ``--shard-timings`` to choose another
+  file). The longest batches are assigned first, each to the shard with the
+  least work so far. Batches with no recorded time are assumed to take the
+  average time. Every shard must read the same timings file, or the shards
+  will not agree on the assignment.
+
+Either way, all shards must see the same tests: run them against the same
+checkout, with the same test selection options.
+
+Merging results
+===============
+
+Give each shard its own output files, for instance
+``--xunit-file=nosetests-1.xml`` and ``--id-file=.noseids-1`` on shard 1. No
+test appears in the xunit reports of two shards, so the reports can be
+combined by collecting the ``testcase`` elements of all of them (most
+continuous integration servers accept several report files). Test ids are
+numbered separately on each shard, so run ``--failed`` with the ids file of
+the shard that failed.
+"""
+import logging
+import os
+import unittest
+import zlib
+from nose.plugins.base import Plugin
+from nose.plugins.multiprocess import MultiProcessTestRunner, TimingStore
+from nose.pyversion import sort_list, UNICODE_STRINGS
+
+log = logging.getLogger(__name__)
+
+
+class Shard(Plugin):
+    """
+    Run only one shard of the test suite.
+    """
+    # prepareTest must see the test before plugins that wrap it
+    score = 1500
+
+    def options(self, parser, env):
+        """Register commandline options.
+        """
+        parser.add_option("--shard", action="store",
+                          default=env.get('NOSE_SHARD'),
+                          dest="shard", metavar="INDEX/COUNT",
+                          help="Run only shard INDEX (counting from 1) of "
+                          "COUNT shards of the test suite. [NOSE_SHARD]")
+        parser.add_option("--shard-by", action="store",
+                          type="choice", choices=('hash', 'duration'),
+                          default=env.get('NOSE_SHARD_BY', 'hash'),
+                          dest="shard_by", metavar="METHOD",
+                          help="How to assign batches of tests to shards: "
+                          "'hash' (the default) or 'duration', which "
+                          "balances shards by the time batches took in "
+                          "previous runs. [NOSE_SHARD_BY]")
+        parser.add_option("--shard-timings", action="store",
+                          default=env.get('NOSE_SHARD_TIMINGS',
+                                          '.nosetimings'),
+                          dest="shard_timings", metavar="FILE",
+                          help="Read batch timings for --shard-by=duration "
+                          "from this file, as written by --process-timings. "
+                          "Default is .nosetimings in the working "
+                          "directory. [NOSE_SHARD_TIMINGS]")
+
+    def configure(self, options, conf):
+        """Configure plugin.
+        """
+        self.conf = conf
+        if not getattr(options, 'shard', None):
+            return
+        # multiprocess workers run what the main process sends them
+        if conf.worker:
+            return
+        try:
+            index, count = [int(n) for n in options.shard.split('/')]
+        except ValueError:
+            raise ValueError("--shard must be INDEX/COUNT, for example 1/4, "
+                             "not %r" % options.shard)
+        if not 1 <= index <= count:
+            raise ValueError("--shard index must be between 1 and %s, "
+                             "not %s" % (count, index))
+        self.enabled = True
+        self.index = index
+        self.count = count
+        self.by = options.shard_by
+        timings = os.path.expanduser(options.shard_timings)
+        if not os.path.isabs(timings):
+            timings = os.path.join(conf.workingDir, timings)
+        self.timings = TimingStore(timings, conf.workingDir)
+        self.batcher = MultiProcessTestRunner(config=conf)
+
+    def prepareTest(self, test):
+        """Remove batches that belong to other shards from the test
+        suite.
+        """
+        keys = []
+        self.collect(test, keys)
+        if self.by == 'duration':
+            self.timings.load()
+            self.mine = self.balance(keys)
+        else:
+            self.mine = {}
+            for key in keys:
+                if self.hash(key) == self.index - 1:
+                    self.mine[key] = True
+        log.debug("Shard %s/%s has %s of %s batches", self.index,
+                  self.count, len(self.mine), len(keys))
+        if not self.trim(test):
+            # the whole suite is a single batch, in another shard
+            return unittest.TestSuite()
+
+    def isBatch(self, test):
+        # contexts that can't be run by multiprocess workers can still
+        # be run whole by one shard
+        context = getattr(test, 'context', None)
+        if not getattr(context, '_multiprocess_', True):
+            return True
+        return self.batcher.isBatch(test)
+
+    def key(self, test):
+        try:
+            addr = self.batcher.address(test)
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except:
+            addr = str(test)
+        return self.timings.key(addr)
+
+    def collect(self, test, keys):
+        """Append the key of each batch in test to keys. Lazy suites
+        are loaded along the way, so that trim can walk them again.
+        """
+        if self.isBatch(test):
+            keys.append(self.key(test))
+            return
+        cases = list(test)
+        test._tests = cases
+        for case in cases:
+            self.collect(case, keys)
+
+    def trim(self, test):
+        """Remove batches in other shards from test. Returns False if
+        nothing in test is left to run.
+        """
+        if self.isBatch(test):
+            return self.key(test) in self.mine
+        kept = [case for case in test if self.trim(case)]
+        test._tests = kept
+        return bool(kept)
+
+    def hash(self, key):
+        """Shard (counting from 0) of the batch with this key, by a
+        checksum that is the same on every platform and python version.
+        """
+        if UNICODE_STRINGS:
+            key = key.encode('utf-8')
+        return (zlib.crc32(key) & 0xffffffff) % self.count
+
+    def balance(self, keys):
+        """Assign keys to shards, longest batches first, each to the
+        shard with the least expected time so far (or, on a tie, the
+        fewest batches). Returns the keys assigned to this shard.
+        """
+        unique = []
+        seen = {}
+        for key in keys:
+            if key not in seen:
+                seen[key] = True
+                unique.append(key)
+        sort_list(unique, self.timings.estimate, reverse=True)
+        loads = [(0.0, 0, ix) for ix in range(self.count)]
+        mine = {}
+        for key in unique:
+            load, batches, ix = min(loads)
+            loads[ix] = (load + self.timings.estimate(key), batches + 1, ix)
+            if ix == self.index - 1:
+                mine[key] = True
+        return mine
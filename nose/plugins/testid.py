@@ -152,7 +152,9 @@ class TestId(Plugin):
         # used to track ids seen when tests is filled from
         # loaded ids file
         self._seen = {}
-        self._write_hashes = conf.verbosity >= 2
+        # in a multiprocess worker, ids are written by the main process
+        # as it replays the worker's results
+        self._write_hashes = conf.verbosity >= 2 and not conf.worker
 
     def finalize(self, result):
         """Save new ids file, if needed.
@@ -38,7 +38,6 @@ Here is an abbreviated version of what an XML test report might look like::
 
 """
 
-import doctest
 import os
 import traceback
 import re
@@ -46,7 +45,6 @@ import inspect
 from nose.plugins.base import Plugin
 from nose.exc import SkipTest
 from time import time
-from xml.sax import saxutils
 from nose.pyversion import UNICODE_STRINGS
 
 # Invalid XML characters, control characters 0-31 sans \t, \n and \r
@@ -108,9 +106,12 @@ class Xunit(Plugin):
     encoding = 'UTF-8'
     error_report_file = None
 
-    def _timeTaken(self):
-        if hasattr(self, '_timer'):
-            taken = time() - self._timer
+    def _timeTaken(self, test):
+        # timers are kept for each test, since tests replayed from
+        # multiprocess workers start and finish interleaved
+        started = self._timers.get(id(test))
+        if started is not None:
+            taken = time() - started
         else:
             # test died before it ran (probably error in setup())
             # or success/failure added before test started probably 
@@ -120,6 +121,8 @@ class Xunit(Plugin):
 
     def _quoteattr(self, attr):
         """Escape an XML attribute. Value can be unicode."""
+        # imported here, as xml.sax is slow to import
+        from xml.sax import saxutils
         attr = xml_safe(attr)
         if isinstance(attr, unicode) and not UNICODE_STRINGS:
             attr = attr.encode(self.encoding)
@@ -140,6 +143,10 @@ class Xunit(Plugin):
         """Configures the xunit plugin."""
         Plugin.configure(self, options, config)
         self.config = config
+        if config.worker:
+            # multiprocess workers send their results to the main
+            # process, which writes the report
+            self.enabled = False
         if self.enabled:
             self.stats = {'errors': 0,
                           'failures': 0,
@@ -147,6 +154,7 @@ class Xunit(Plugin):
                           'skipped': 0
                           }
             self.errorlist = []
+            self._timers = {}
             if UNICODE_STRINGS:
                 self.error_report_file = open(options.xunit_file, 'w', encoding=self.encoding)
             else:
@@ -175,12 +183,16 @@ class Xunit(Plugin):
 
     def startTest(self, test):
         """Initializes a timer before starting a test."""
-        self._timer = time()
+        self._timers[id(test)] = time()
+
+    def stopTest(self, test):
+        """Discards the test's timer."""
+        self._timers.pop(id(test), None)
 
     def addError(self, test, err, capt=None):
         """Add error output to Xunit report.
         """
-        taken = self._timeTaken()
+        taken = self._timeTaken(test)
 
         if issubclass(err[0], SkipTest):
             type = 'skipped'
@@ -206,7 +218,7 @@ class Xunit(Plugin):
     def addFailure(self, test, err, capt=None, tb_info=None):
         """Add failure output to Xunit report.
         """
-        taken = self._timeTaken()
+        taken = self._timeTaken(test)
         tb = ''.join(traceback.format_exception(*err))
         self.stats['failures'] += 1
         id = test.id()
@@ -225,7 +237,7 @@ class Xunit(Plugin):
     def addSuccess(self, test, capt=None):
         """Add success output to Xunit report.
         """
-        taken = self._timeTaken()
+        taken = self._timeTaken(test)
         self.stats['passes'] += 1
         id = test.id()
         self.errorlist.append(
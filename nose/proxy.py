@@ -14,6 +14,11 @@ addFailure(self.test, err) for each plugin. This allows plugins to
 have a single stable interface for all test types, and also to
 manipulate the test object itself by setting the `test` attribute of
 the nose.case.Test that they receive.
+
+When a test has finished running, its result proxy is given back to the
+factory that made it, to be bound to a later test. Checking that each
+result call is made for the proxy's own test is only done when debug
+logging is enabled for this module (``--debug=nose.proxy``).
 """
 import logging
 from nose.config import Config
@@ -45,6 +50,8 @@ class ResultProxyFactory(object):
         self.config = config
         self.__prepared = False
         self.__result = None
+        self.__checkTests = False
+        self.__free = []
 
     def __call__(self, result, test):
         """Return a ResultProxy for the current test.
@@ -56,35 +63,67 @@ class ResultProxyFactory(object):
         """
         if not self.__prepared:
             self.__prepared = True
+            self.__checkTests = log.isEnabledFor(logging.DEBUG)
             plug_result = self.config.plugins.prepareTestResult(result)
             if plug_result is not None:
                 self.__result = result = plug_result
         if self.__result is not None:
             result = self.__result
-        return ResultProxy(result, test, config=self.config)
+        try:
+            proxy = self.__free.pop()
+        except IndexError:
+            return ResultProxy(result, test, config=self.config,
+                               checkTests=self.__checkTests)
+        proxy.bind(result, test)
+        return proxy
+
+    def release(self, proxy):
+        """Take back the proxy of a test that has finished running, to bind
+        it to a later test.
+        """
+        if proxy.__class__ is ResultProxy and proxy.config is self.config:
+            self.__free.append(proxy)
 
 
 class ResultProxy(object):
     """Proxy to TestResults (or other results handler).
 
-    One ResultProxy is created for each nose.case.Test. The result
-    proxy calls plugins with the nose.case.Test instance (instead of
-    the wrapped test case) as each result call is made. Finally, the
+    A ResultProxy is bound to each nose.case.Test while it runs. The
+    result proxy calls plugins with the nose.case.Test instance (instead
+    of the wrapped test case) as each result call is made. Finally, the
     real result method is called, also with the nose.case.Test
     instance as the test parameter.
 
+    If checkTests is true (by default, when debug logging is enabled for
+    this module) each result call checks that it is made for the proxy's
+    test.
     """
-    def __init__(self, result, test, config=None):
+    __slots__ = ('config', 'plugins', 'result', 'test', 'checkTests',
+                 '_beforeTest', '_afterTest', '__weakref__')
+
+    def __init__(self, result, test, config=None, checkTests=None):
         if config is None:
             config = Config()
+        if checkTests is None:
+            checkTests = log.isEnabledFor(logging.DEBUG)
         self.config = config
         self.plugins = config.plugins
-        self.result = result
-        self.test = test
+        self.checkTests = checkTests
+        self.result = None
+        self.bind(result, test)
 
     def __repr__(self):
         return repr(self.result)
 
+    def bind(self, result, test):
+        """Proxy result for test.
+        """
+        if result is not self.result:
+            self.result = result
+            self._beforeTest = getattr(result, 'beforeTest', None)
+            self._afterTest = getattr(result, 'afterTest', None)
+        self.test = test
+
     def assertMyTest(self, test):
         # The test I was called with must be my .test or my
         # .test's .test. or my .test.test's .case
@@ -97,19 +136,22 @@ class ResultProxy(object):
                 % (self.test, id(self.test), test, id(test)))
 
     def afterTest(self, test):
-        self.assertMyTest(test)
+        if self.checkTests:
+            self.assertMyTest(test)
         self.plugins.afterTest(self.test)
-        if hasattr(self.result, "afterTest"):
-            self.result.afterTest(self.test)
+        if self._afterTest is not None:
+            self._afterTest(self.test)
 
     def beforeTest(self, test):
-        self.assertMyTest(test)
+        if self.checkTests:
+            self.assertMyTest(test)
         self.plugins.beforeTest(self.test)
-        if hasattr(self.result, "beforeTest"):
-            self.result.beforeTest(self.test)
+        if self._beforeTest is not None:
+            self._beforeTest(self.test)
 
     def addError(self, test, err):
-        self.assertMyTest(test)
+        if self.checkTests:
+            self.assertMyTest(test)
         plugins = self.plugins
         plugin_handled = plugins.handleError(self.test, err)
         if plugin_handled:
@@ -127,7 +169,8 @@ class ResultProxy(object):
             self.shouldStop = True
 
     def addFailure(self, test, err):
-        self.assertMyTest(test)
+        if self.checkTests:
+            self.assertMyTest(test)
         plugins = self.plugins
         plugin_handled = plugins.handleFailure(self.test, err)
         if plugin_handled:
@@ -146,18 +189,21 @@ class ResultProxy(object):
     def addSkip(self, test, reason):
         # 2.7 compat shim
         from nose.plugins.skip import SkipTest
-        self.assertMyTest(test)
+        if self.checkTests:
+            self.assertMyTest(test)
         plugins = self.plugins
         plugins.addError(self.test, (SkipTest, reason, None))
         self.result.addSkip(self.test, reason)
 
     def addSuccess(self, test):
-        self.assertMyTest(test)
+        if self.checkTests:
+            self.assertMyTest(test)
         self.plugins.addSuccess(self.test)
         self.result.addSuccess(self.test)
 
     def startTest(self, test):
-        self.assertMyTest(test)
+        if self.checkTests:
+            self.assertMyTest(test)
         self.plugins.startTest(self.test)
         self.result.startTest(self.test)
 
@@ -165,7 +211,8 @@ class ResultProxy(object):
         self.result.stop()
 
     def stopTest(self, test):
-        self.assertMyTest(test)
+        if self.checkTests:
+            self.assertMyTest(test)
         self.plugins.stopTest(self.test)
         self.result.stopTest(self.test)
 
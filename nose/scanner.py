@@ -0,0 +1,147 @@
+"""
+Implements background directory scanning for the test loader (see the
+``--discovery-threads`` option). While the loader imports and runs the tests
+in one directory, a pool of threads lists the directories it will visit
+next, so that on slow file systems the loader rarely has to wait for a
+directory listing.
+
+Threads only list directories and find out what kind of thing each entry
+is; whether an entry is wanted is still decided by the selector (and any
+plugins) in the loader's own thread, in the usual order. Where
+``os.scandir`` is available, the file type reported with each directory
+entry is used instead of examining each entry separately.
+"""
+import logging
+import os
+import sys
+import threading
+try:
+    import Queue
+except ImportError:
+    import queue as Queue
+from nose.pyversion import sort_list
+from nose.util import ispackage
+
+log = logging.getLogger(__name__)
+
+__all__ = ['DirectoryScanner', 'listDirectory']
+
+
+def listDirectory(path, sortKey):
+    """List the directory at path in the order given by sortKey. Returns a
+    list of (entry_path, name, is_file, is_dir, is_package) tuples, leaving
+    out entries that start with a dot.
+    """
+    scandir = getattr(os, 'scandir', None)
+    found = []
+    if scandir is not None:
+        entries = dict([(e.name, e) for e in scandir(path)])
+        names = list(entries.keys())
+        sort_list(names, sortKey)
+        for name in names:
+            if name.startswith('.'):
+                continue
+            entry = entries[name]
+            entry_path = os.path.abspath(entry.path)
+            is_file = entry.is_file()
+            is_dir = not is_file and entry.is_dir()
+            is_package = is_dir and ispackage(entry_path)
+            found.append((entry_path, name, is_file, is_dir, is_package))
+        return found
+    names = os.listdir(path)
+    sort_list(names, sortKey)
+    for name in names:
+        if name.startswith('.'):
+            continue
+        entry_path = os.path.abspath(os.path.join(path, name))
+        is_file = os.path.isfile(entry_path)
+        is_dir = not is_file and os.path.isdir(entry_path)
+        is_package = is_dir and ispackage(entry_path)
+        found.append((entry_path, name, is_file, is_dir, is_package))
+    return found
+
+
+class DirectoryScanner(object):
+    """Lists directories in a pool of threads. Directories are submitted
+    with prefetch(); listing() returns the listing of a submitted directory,
+    waiting for it if need be, or None if the directory was not submitted
+    or could not be listed.
+    """
+    def __init__(self, threads, sortKey):
+        self.sortKey = sortKey
+        self.queue = Queue.Queue()
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.results = {}
+        self.threads = []
+        for i in range(threads):
+            thread = threading.Thread(target=self.work,
+                                      name="nose-scanner-%s" % i)
+            thread.setDaemon(True)
+            thread.start()
+            self.threads.append(thread)
+
+    def prefetch(self, path):
+        """Start listing the directory at path.
+        """
+        path = os.path.normpath(os.path.abspath(path))
+        self.lock.acquire()
+        try:
+            if path in self.pending or path in self.results:
+                return
+            self.pending[path] = threading.Event()
+        finally:
+            self.lock.release()
+        self.queue.put(path)
+
+    def listing(self, path):
+        """The listing of the directory at path, in the format returned by
+        listDirectory(), or None.
+        """
+        path = os.path.normpath(os.path.abspath(path))
+        self.lock.acquire()
+        try:
+            done = self.pending.get(path)
+        finally:
+            self.lock.release()
+        if done is None:
+            return None
+        done.wait()
+        self.lock.acquire()
+        try:
+            del self.pending[path]
+            return self.results.pop(path, None)
+        finally:
+            self.lock.release()
+
+    def stop(self):
+        """Stop the threads once they have finished what was submitted.
+        """
+        for thread in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+    def work(self):
+        while True:
+            path = self.queue.get()
+            if path is None:
+                return
+            try:
+                found = listDirectory(path, self.sortKey)
+            except (KeyboardInterrupt, SystemExit):
+                raise
+            except:
+                # the loader lists it again and reports the problem
+                log.debug("Unable to scan %s: %s", path, sys.exc_info()[1])
+                found = None
+            self.lock.acquire()
+            try:
+                if found is not None:
+                    self.results[path] = found
+                done = self.pending.get(path)
+            finally:
+                self.lock.release()
+            if done is not None:
+                done.set()
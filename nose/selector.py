@@ -8,7 +8,9 @@ thinks may be a test.
 """
 import logging
 import os
+import re
 import unittest
+from weakref import WeakKeyDictionary
 from nose.config import Config
 from nose.util import split_test_name, src, getfilename, getpackage, ispackage
 
@@ -25,6 +27,11 @@ op_splitext = os.path.splitext
 op_isabs = os.path.isabs
 op_abspath = os.path.abspath
 
+# pattern features that change meaning when a pattern is combined with
+# others: numbered and named back references and conditional group
+# references, and inline flags, which apply to the whole combined pattern
+uncombinable = re.compile(r'\\[1-9]|\(\?P=|\(\?\(|\(\?[aiLmsux]+\)')
+
 
 class Selector(object):
     """Core test selector. Examines test candidates and determines whether,
@@ -43,21 +50,69 @@ class Selector(object):
         self.include = config.include
         self.plugins = config.plugins
         self.match = config.testMatch
-        
+        self.compilePatterns()
+
+    def compilePatterns(self):
+        """Combine testMatch and include into one pattern, and exclude into
+        another, and forget the names already matched. Patterns appended
+        to include or exclude are noticed; call this again after replacing
+        any of them.
+        """
+        self._wanted = anyOf([self.match] + list(self.include or ()))
+        self._excluded = anyOf(self.exclude or ())
+        self._counts = (len(self.include or ()), len(self.exclude or ()))
+        self._matched = {}
+        self._wants = {}
+
+    def checkPatterns(self):
+        # patterns appended to config.include or exclude in place
+        if (len(self.include or ()) != self._counts[0]
+            or len(self.exclude or ()) != self._counts[1]):
+            self.compilePatterns()
+
+    def answers(self, call):
+        """The remembered answers to the want* call, or None if they
+        can't be remembered because a plugin that implements the call does
+        not declare its answers pure (see
+        :attr:`nose.plugins.base.Plugin.pureWants`). Answers are held by
+        weak reference to the class or function, so that remembering them
+        does not keep test modules alive.
+        """
+        try:
+            return self._wants[call]
+        except KeyError:
+            pass
+        answers = WeakKeyDictionary()
+        for plugin, meth in self.plugins.implementers(call):
+            if not getattr(plugin, 'pureWants', False):
+                log.debug("%s answers to %s can't be remembered",
+                          plugin, call)
+                answers = None
+                break
+        self._wants[call] = answers
+        return answers
+
+    def isExcluded(self, name):
+        """Does the name match config.exclude?
+        """
+        self.checkPatterns()
+        return self._excluded is not None and bool(
+            self._excluded.search(name))
+
     def matches(self, name):
         """Does the name match my requirements?
 
         To match, a name must match config.testMatch OR config.include
         and it must not match config.exclude
         """
-        return ((self.match.search(name)
-                 or (self.include and
-                     filter(None,
-                            [inc.search(name) for inc in self.include])))
-                and ((not self.exclude)
-                     or not filter(None,
-                                   [exc.search(name) for exc in self.exclude])
-                 ))
+        self.checkPatterns()
+        try:
+            return self._matched[name]
+        except KeyError:
+            pass
+        wanted = bool(self._wanted.search(name)) and not self.isExcluded(name)
+        self._matched[name] = wanted
+        return wanted
     
     def wantClass(self, cls):
         """Is the class a wanted test class?
@@ -65,6 +120,11 @@ class Selector(object):
         A class must be a unittest.TestCase subclass, or match test name
         requirements. Classes that start with _ are always excluded.
         """
+        answers = self.answers('wantClass')
+        if answers is not None:
+            answer = recall(answers, cls, cls)
+            if answer is not None:
+                return answer
         declared = getattr(cls, '__test__', None)
         if declared is not None:
             wanted = declared
@@ -78,6 +138,7 @@ class Selector(object):
             log.debug("Plugin setting selection of %s to %s", cls, plug_wants)
             wanted = plug_wants
         log.debug("wantClass %s? %s", cls, wanted)
+        remember(answers, cls, cls, wanted)
         return wanted
 
     def wantDirectory(self, dirname):
@@ -88,10 +149,7 @@ class Selector(object):
         """
         tail = op_basename(dirname)
         if ispackage(dirname):
-            wanted = (not self.exclude
-                      or not filter(None,
-                                    [exc.search(tail) for exc in self.exclude]
-                                    ))
+            wanted = not self.isExcluded(tail)
         else:
             wanted = (self.matches(tail)
                       or (self.config.srcDirs
@@ -137,6 +195,11 @@ class Selector(object):
     def wantFunction(self, function):
         """Is the function a test function?
         """
+        answers = self.answers('wantFunction')
+        if answers is not None:
+            answer = recall(answers, function, function)
+            if answer is not None:
+                return answer
         try:
             if hasattr(function, 'compat_func_name'):
                 funcname = function.compat_func_name
@@ -154,6 +217,7 @@ class Selector(object):
         if plug_wants is not None:
             wanted = plug_wants
         log.debug("wantFunction %s? %s", function, wanted)
+        remember(answers, function, function, wanted)
         return wanted
 
     def wantMethod(self, method):
@@ -164,6 +228,26 @@ class Selector(object):
         except AttributeError:
             # not a method
             return False
+        # answers are remembered per class the method was found in, and
+        # within that per function
+        try:
+            key = method.im_func
+        except AttributeError:
+            key = getattr(method, '_func', method)
+        cls = getattr(method, 'im_class', None)
+        if cls is None:
+            cls = getattr(getattr(method, '__self__', None), 'cls', None)
+        answers = self.answers('wantMethod')
+        if answers is not None:
+            try:
+                answers = answers.setdefault(cls, WeakKeyDictionary())
+            except TypeError:
+                # no class, or one that can't be weakly referenced
+                answers = None
+        if answers is not None:
+            answer = recall(answers, key, method)
+            if answer is not None:
+                return answer
         if method_name.startswith('_'):
             # never collect 'private' methods
             return False
@@ -176,6 +260,7 @@ class Selector(object):
         if plug_wants is not None:
             wanted = plug_wants
         log.debug("wantMethod %s? %s", method, wanted)
+        remember(answers, key, method, wanted)
         return wanted
     
     def wantModule(self, module):
@@ -199,6 +284,66 @@ class Selector(object):
 defaultSelector = Selector        
 
 
+def recall(answers, key, obj):
+    """The remembered answer for key, or None. An answer is forgotten if
+    the __test__ attribute of obj has changed since it was given.
+    """
+    try:
+        declared, wanted = answers[key]
+    except (KeyError, TypeError):
+        return None
+    if getattr(obj, '__test__', None) is not declared:
+        return None
+    return wanted
+
+
+def remember(answers, key, obj, wanted):
+    if answers is not None:
+        try:
+            answers[key] = (getattr(obj, '__test__', None), wanted)
+        except TypeError:
+            # unhashable, or can't be weakly referenced
+            pass
+
+
+class AnyOf(object):
+    """Matches wherever any of a list of patterns does, for lists of
+    patterns that can't be combined into one.
+    """
+    def __init__(self, regexes):
+        self.regexes = regexes
+
+    def search(self, name):
+        for regex in self.regexes:
+            if regex.search(name):
+                return True
+        return False
+
+
+def anyOf(regexes):
+    """A compiled pattern (or object with a compatible search method) that
+    matches wherever any of regexes does, or None if there are none.
+    """
+    regexes = list(regexes)
+    if not regexes:
+        return None
+    if len(regexes) == 1:
+        return regexes[0]
+    patterns = [getattr(r, 'pattern', None) for r in regexes]
+    flags = {}
+    for r in regexes:
+        flags[getattr(r, 'flags', None)] = True
+    if len(flags) != 1 or [p for p in patterns
+                           if not isinstance(p, basestring)
+                           or uncombinable.search(p)]:
+        return AnyOf(regexes)
+    try:
+        return re.compile('|'.join(['(?:%s)' % p for p in patterns]),
+                          regexes[0].flags)
+    except re.error:
+        return AnyOf(regexes)
+
+
 class TestAddress(object):
     """A test address represents a user's request to run a particular
     test. The user may specify a filename or module (or neither),
@@ -0,0 +1,347 @@
+"""
+Static test collection
+----------------------
+
+Finds the tests in a test module by reading its source, without importing
+it. This is only possible for modules whose tests are plainly visible in
+the source: test functions, test classes and unittest.TestCase subclasses
+defined at the top level of the module, optionally marked with the
+:func:`~nose.tools.istest` and :func:`~nose.tools.nottest` decorators or a
+literal ``__test__`` setting. For anything that can only be known by
+running the module -- generator tests, metaclasses, other decorators,
+classes that inherit from classes defined elsewhere, names that look like
+tests but are imported or assigned, definitions made under ``if`` or
+``try`` -- the collector gives up, and the module must be imported as
+usual.
+
+Test classes imported into a module under names that don't look like tests
+are not seen by the collector.
+"""
+import logging
+from nose.pyversion import sort_list
+from nose.selector import defaultSelector
+from nose.util import getpackage
+
+try:
+    import ast
+except ImportError:
+    # 2.5 and earlier: nothing can be collected statically
+    ast = None
+
+log = logging.getLogger(__name__)
+
+__all__ = ['StaticCollector', 'StaticTest', 'Dynamic']
+
+# decorators that don't change whether or how a test is collected
+NEUTRAL_DECORATORS = ('raises', 'timed', 'with_setup')
+
+# names that look like tests when imported, but hold none
+EMPTY_TEST_NAMES = ('TestCase',)
+
+# plugin methods that change what the loader collects
+LOADER_HOOKS = ('wantModule', 'wantClass', 'wantFunction', 'wantMethod',
+                'loadTestsFromModule', 'loadTestsFromTestCase',
+                'loadTestsFromTestClass', 'makeTest')
+
+
+class Dynamic(Exception):
+    """Raised when the tests in a module can't be found without importing
+    it.
+    """
+    pass
+
+
+class StaticTest(object):
+    """A test found by static collection. It can be reported (for
+    instance by the collect-only plugin), but not run.
+    """
+    def __init__(self, filename, module, call, name, doc=None):
+        self.filename = filename
+        self.module = module
+        self.call = call
+        self.name = name
+        self.doc = doc
+
+    def __call__(self, *arg, **kw):
+        raise TypeError("%s was collected statically and can't be run"
+                        % self.name)
+
+    def __str__(self):
+        return self.name
+
+    def __repr__(self):
+        return "StaticTest(%r)" % self.name
+
+    def address(self):
+        return (self.filename, self.module, self.call)
+
+    def id(self):
+        return "%s.%s" % (self.module, self.call)
+
+    def shortDescription(self):
+        if self.doc:
+            return self.doc.strip().split("\n")[0].strip()
+        return None
+
+
+class StaticCollector(object):
+    """Finds the tests in python source files without importing them,
+    using the selector's name rules (see the module docs for what can
+    and can't be found this way).
+    """
+    def __init__(self, config, selector=None):
+        if selector is None:
+            selector = defaultSelector(config)
+        self.config = config
+        self.selector = selector
+
+    def canCollect(self):
+        """Can tests be collected statically with this configuration? Not
+        if a plugin takes part in selecting or loading tests.
+        """
+        if ast is None:
+            return False
+        for plugin in getattr(self.config.plugins, 'plugins', ()):
+            for hook in LOADER_HOOKS:
+                if hasattr(plugin, hook):
+                    log.debug("%s implements %s; can't collect statically",
+                              plugin, hook)
+                    return False
+        return True
+
+    def collect(self, filename):
+        """Return a list of StaticTests for the tests in the python source
+        file filename, in the order the loader would load them, or None if
+        the module must be imported to find them.
+        """
+        try:
+            fh = open(filename, 'rU')
+            try:
+                source = fh.read()
+            finally:
+                fh.close()
+            tree = ast.parse(source, filename)
+            return self.collectModule(tree, filename)
+        except Dynamic, e:
+            log.debug("Can't collect %s statically: %s", filename, e)
+            return None
+        except (IOError, SyntaxError, TypeError, ValueError), e:
+            # let the import report it
+            log.debug("Can't read %s: %s", filename, e)
+            return None
+
+    def collectModule(self, tree, filename):
+        module = getpackage(filename)
+        if module is None:
+            raise Dynamic("not a python module")
+        classes = {}
+        funcs = []
+        for node in tree.body:
+            if isinstance(node, ast.FunctionDef):
+                if self.wantFunction(node):
+                    funcs.append(node)
+            elif isinstance(node, ast.ClassDef):
+                classes[node.name] = node
+            elif isinstance(node, (ast.Import, ast.ImportFrom)):
+                self.checkImport(node)
+            elif isinstance(node, ast.Assign):
+                for target in node.targets:
+                    self.checkTarget(target)
+            elif isinstance(node, (ast.AugAssign, ast.Delete)):
+                raise Dynamic("module changes names at line %s" % node.lineno)
+            elif isinstance(node, ast.Expr) or self.isSimple(node):
+                continue
+            else:
+                # a compound statement (if, try, for...) may define tests
+                self.checkBlock(node)
+        tests = []
+        names = list(classes.keys())
+        sort_list(names, lambda name: name)
+        for name in names:
+            tests.extend(self.collectClass(classes[name], classes,
+                                           filename, module))
+        sort_list(funcs, lambda node: node.lineno)
+        for node in funcs:
+            if self.isGenerator(node):
+                raise Dynamic("%s is a generator" % node.name)
+            tests.append(StaticTest(filename, module, node.name,
+                                    "%s.%s" % (module, node.name),
+                                    ast.get_docstring(node)))
+        return tests
+
+    def collectClass(self, node, classes, filename, module):
+        bases, is_case, declared, methods = self.classInfo(node, classes)
+        if declared is not None:
+            wanted = declared
+        else:
+            wanted = (not node.name.startswith('_')
+                      and (is_case or self.selector.matches(node.name)))
+        if not wanted:
+            return []
+        names = []
+        for name, method in methods.items():
+            if self.wantMethod(name, method):
+                if self.isGenerator(method):
+                    raise Dynamic("%s.%s is a generator" % (node.name, name))
+                names.append(name)
+        sort_list(names, lambda name: name)
+        if not names and 'runTest' in methods and is_case:
+            raise Dynamic("%s has only runTest" % node.name)
+        tests = []
+        for name in names:
+            call = "%s.%s" % (node.name, name)
+            if is_case:
+                label = "%s (%s.%s)" % (name, module, node.name)
+            else:
+                label = "%s.%s" % (module, call)
+            tests.append(StaticTest(filename, module, call, label,
+                                    ast.get_docstring(methods[name])))
+        return tests
+
+    def classInfo(self, node, classes, seen=()):
+        """Returns (bases, is_case, declared, methods) for the class
+        defined by node: whether it's a unittest.TestCase, its literal
+        __test__ setting (or None), and its methods, including those
+        inherited from classes defined in the same module.
+        """
+        if node.name in seen:
+            raise Dynamic("%s inherits from itself" % node.name)
+        if getattr(node, 'decorator_list', None):
+            raise Dynamic("%s is decorated" % node.name)
+        if getattr(node, 'keywords', None):
+            raise Dynamic("%s has a metaclass" % node.name)
+        is_case = False
+        declared = None
+        methods = {}
+        bases = []
+        for base in node.bases:
+            name = self.dottedName(base)
+            if name in ('object', 'unittest.TestCase', 'TestCase'):
+                is_case = is_case or name != 'object'
+                continue
+            if name not in classes:
+                raise Dynamic("%s inherits from %s" % (node.name, name))
+            base_info = self.classInfo(classes[name], classes,
+                                       seen + (node.name,))
+            bases.append(name)
+            is_case = is_case or base_info[1]
+            if declared is None:
+                declared = base_info[2]
+            for key, value in base_info[3].items():
+                methods.setdefault(key, value)
+        own = {}
+        for item in node.body:
+            if isinstance(item, ast.FunctionDef):
+                own[item.name] = item
+            elif isinstance(item, ast.Assign):
+                for target in item.targets:
+                    if isinstance(target, ast.Name) and target.id in (
+                        '__test__', '__metaclass__'):
+                        if target.id == '__metaclass__':
+                            raise Dynamic("%s has a metaclass" % node.name)
+                        declared = self.literal(item.value)
+                    else:
+                        self.checkTarget(target)
+            elif isinstance(item, ast.Expr) or self.isSimple(item):
+                continue
+            else:
+                self.checkBlock(item)
+        methods.update(own)
+        return bases, is_case, declared, methods
+
+    def wantFunction(self, node):
+        declared = self.decorated(node)
+        if declared is not None:
+            return declared
+        return (not node.name.startswith('_')
+                and self.selector.matches(node.name))
+
+    def wantMethod(self, name, node):
+        if name.startswith('_'):
+            return False
+        declared = self.decorated(node)
+        if declared is not None:
+            return declared
+        return bool(self.selector.matches(name))
+
+    def decorated(self, node):
+        """The __test__ setting made by node's decorators, or None.
+        """
+        declared = None
+        for dec in node.decorator_list:
+            if isinstance(dec, ast.Call):
+                dec = dec.func
+            name = self.dottedName(dec).split('.')[-1]
+            if name == 'istest':
+                declared = True
+            elif name == 'nottest':
+                declared = False
+            elif name not in NEUTRAL_DECORATORS:
+                raise Dynamic("%s is decorated with %s" % (node.name, name))
+        return declared
+
+    def checkImport(self, node):
+        for alias in node.names:
+            name = alias.asname or alias.name.split('.')[0]
+            if name == '*':
+                raise Dynamic("star import at line %s" % node.lineno)
+            if name in EMPTY_TEST_NAMES:
+                continue
+            if self.selector.matches(name):
+                raise Dynamic("imports %s" % name)
+
+    def checkTarget(self, target):
+        if isinstance(target, (ast.Tuple, ast.List)):
+            for elt in target.elts:
+                self.checkTarget(elt)
+        elif isinstance(target, ast.Name):
+            if target.id == '__test__' or self.selector.matches(target.id):
+                raise Dynamic("assigns %s" % target.id)
+        elif isinstance(target, ast.Attribute):
+            if target.attr == '__test__':
+                raise Dynamic("assigns __test__ at line %s" % target.lineno)
+
+    def checkBlock(self, node):
+        """Look for definitions inside a compound statement.
+        """
+        for child in ast.walk(node):
+            if isinstance(child, (ast.FunctionDef, ast.ClassDef, ast.Import,
+                                  ast.ImportFrom)):
+                raise Dynamic("definitions at line %s" % node.lineno)
+            if isinstance(child, ast.Assign):
+                for target in child.targets:
+                    self.checkTarget(target)
+
+    def isSimple(self, node):
+        return isinstance(node, (ast.Pass, ast.Global))
+
+    def isGenerator(self, node):
+        """Does the function defined by node yield?
+        """
+        todo = list(node.body)
+        while todo:
+            child = todo.pop()
+            if isinstance(child, ast.Yield):
+                return True
+            if isinstance(child, (ast.FunctionDef, ast.ClassDef,
+                                  ast.Lambda)):
+                # nested scopes don't make node a generator
+                continue
+            todo.extend(ast.iter_child_nodes(child))
+        return False
+
+    def dottedName(self, node):
+        if isinstance(node, ast.Name):
+            return node.id
+        if isinstance(node, ast.Attribute):
+            return "%s.%s" % (self.dottedName(node.value), node.attr)
+        raise Dynamic("can't name %s" % node.__class__.__name__)
+
+    def literal(self, node):
+        if isinstance(node, ast.Name) and node.id in ('True', 'False'):
+            return node.id == 'True'
+        value = getattr(node, 'value', None)
+        if value in (True, False) and node.__class__.__name__ in (
+            'NameConstant', 'Constant'):
+            return value
+        raise Dynamic("__test__ is not True or False")
@@ -288,6 +288,34 @@ def getpackage(filename):
     return '.'.join(mod_parts)
 
 
+def module_dependencies(module):
+    """
+    Find the names of the modules that a module depends on, as seen in its
+    namespace: its parent packages, the modules it imported, and the
+    modules that the classes and functions it imported were defined in.
+    Imports made inside functions are not seen.
+
+    >>> import nose.plugins.base
+    >>> deps = module_dependencies(nose.plugins.base)
+    >>> 'nose.plugins' in deps, 'textwrap' in deps, 'optparse' in deps
+    (True, True, True)
+    """
+    found = {}
+    name = module.__name__
+    parts = name.split('.')
+    for i in range(1, len(parts)):
+        found['.'.join(parts[:i])] = True
+    for value in list(vars(module).values()):
+        if isinstance(value, types.ModuleType):
+            found[value.__name__] = True
+        else:
+            dep = getattr(value, '__module__', None)
+            if isinstance(dep, str):
+                found[dep] = True
+    found.pop(name, None)
+    return list(found.keys())
+
+
 def ln(label):
     """Draw a 70-char-wide divider, with label in the middle.
 
@@ -0,0 +1,190 @@
+"""
+Implements watch mode (see the ``--watch`` option). After the tests have
+run, nose keeps running and polls the python source files in the working
+directory, in the directories of the tests named on the command line and in
+the directories of modules imported from those trees. When files change, it
+runs again the tests in:
+
+* test modules that changed, or that were added to a watched directory
+* test modules that import, directly or through other watched modules, a
+  module that changed
+
+Changed modules and the modules that depend on them are imported again for
+the new run; everything else already imported is reused, and the rest of the
+test tree is not searched again.
+
+A module's dependencies are the modules found in its namespace once it has
+been imported: modules imported by it, the modules that classes and
+functions imported into it were defined in, and its parent packages.
+Imports made inside functions are not seen.
+"""
+import logging
+import os
+import sys
+import time
+import types
+from nose.util import module_dependencies
+
+log = logging.getLogger(__name__)
+
+__all__ = ['Watcher']
+
+
+class Watcher(object):
+    """Polls the files under roots for changes, and finds the tests
+    affected by them. The selector decides which files are test modules.
+    """
+    interval = 0.5
+
+    def __init__(self, roots, selector):
+        self.roots = [os.path.normpath(os.path.abspath(root))
+                      for root in roots]
+        self.selector = selector
+        self.modules = {}
+        self.dependents = {}
+        self.dirs = {}
+        self.files = {}
+
+    def isWatched(self, path):
+        for root in self.roots:
+            if path == root or path.startswith(root + os.sep):
+                return True
+        return False
+
+    def sourceFile(self, module):
+        """The python source file of module, or None.
+        """
+        filename = getattr(module, '__file__', None)
+        if not filename:
+            return None
+        base, ext = os.path.splitext(filename)
+        if ext in ('.pyc', '.pyo'):
+            filename = base + '.py'
+        elif ext != '.py':
+            return None
+        return os.path.normpath(os.path.abspath(filename))
+
+    def snapshot(self):
+        """Record the modules imported from the watched trees, what each
+        depends on, and the state of the source files in their
+        directories.
+        """
+        modules = {}
+        for name, module in list(sys.modules.items()):
+            if not isinstance(module, types.ModuleType):
+                continue
+            filename = self.sourceFile(module)
+            if filename is not None and self.isWatched(filename):
+                modules[name] = filename
+        for name, filename in self.modules.items():
+            # changed since, and not imported again yet
+            if name not in sys.modules:
+                modules[name] = filename
+        dependents = {}
+        for name in modules:
+            if name not in sys.modules:
+                continue
+            for dep in self.dependencies(sys.modules[name], modules):
+                dependents.setdefault(dep, []).append(name)
+        self.modules = modules
+        self.dependents = dependents
+
+        dirs = dict([(root, None) for root in self.roots])
+        for filename in modules.values():
+            dirs[os.path.dirname(filename)] = None
+        self.dirs = {}
+        self.files = {}
+        for path in dirs:
+            self.dirs[path] = mtime(path)
+            for filename in listSources(path):
+                self.files[filename] = mtime(filename)
+        log.debug("Watching %s modules in %s directories",
+                  len(modules), len(self.dirs))
+
+    def dependencies(self, module, modules):
+        """The names of the watched modules that module depends on.
+        """
+        return [dep for dep in module_dependencies(module) if dep in modules]
+
+    def changes(self):
+        """The source files that have been changed, added or removed since
+        the last snapshot.
+        """
+        changed = []
+        for path, stamp in self.dirs.items():
+            if mtime(path) == stamp:
+                continue
+            self.dirs[path] = mtime(path)
+            for filename in listSources(path):
+                if filename not in self.files:
+                    self.files[filename] = None
+        for filename, stamp in self.files.items():
+            current = mtime(filename)
+            if current != stamp:
+                self.files[filename] = current
+                changed.append(filename)
+        changed.sort()
+        return changed
+
+    def affected(self, changed):
+        """The test files to run again after the files in changed have
+        changed. The modules that must be imported again are removed from
+        sys.modules.
+        """
+        by_file = dict([(filename, name)
+                        for name, filename in self.modules.items()])
+        todo = [by_file[filename] for filename in changed
+                if filename in by_file]
+        stale = {}
+        while todo:
+            name = todo.pop()
+            if name in stale:
+                continue
+            stale[name] = True
+            todo.extend(self.dependents.get(name, ()))
+        tests = {}
+        for name in stale:
+            log.debug("%s changed or depends on a change", name)
+            sys.modules.pop(name, None)
+            filename = self.modules[name]
+            if self.selector.wantFile(filename):
+                tests[filename] = True
+        for filename in changed:
+            # new modules, and modules that could not be imported
+            if (filename not in by_file and os.path.exists(filename)
+                and self.selector.wantFile(filename)):
+                tests[filename] = True
+        tests = list(tests.keys())
+        tests.sort()
+        return tests
+
+    def wait(self):
+        """Wait for changes that affect tests, and return the test files
+        to run again.
+        """
+        while True:
+            time.sleep(self.interval)
+            changed = self.changes()
+            if not changed:
+                continue
+            log.debug("Changed: %s", changed)
+            tests = self.affected(changed)
+            if tests:
+                return tests
+
+
+def listSources(path):
+    try:
+        names = os.listdir(path)
+    except OSError:
+        return []
+    return [os.path.join(path, name) for name in names
+            if name.endswith('.py') and not name.startswith('.')]
+
+
+def mtime(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime, st.st_size)
@@ -64,6 +64,9 @@ class RecordingPluginManager(object):
     def __getattr__(self, call):
         return RecordingPluginProxy(self, call)
 
+    def implementers(self, call):
+        return self._nullPluginManager.implementers(call)
+
     def null_call(self, call, *arg, **kw):
         return getattr(self._nullPluginManager, call)(*arg, **kw)
 
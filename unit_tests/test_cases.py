@@ -115,6 +115,26 @@ class TestNoseCases(unittest.TestCase):
         f(res)
         assert res.errors
 
+    def test_cases_are_compact(self):
+        def func():
+            pass
+        a = nose.case.Test(nose.case.FunctionTestCase(func))
+        b = nose.case.Test(nose.case.FunctionTestCase(func))
+        for name in ('test', 'config', 'plugins'):
+            assert name not in a.__dict__, "%s in __dict__" % name
+        assert 'arg' not in a.test.__dict__
+        if not hasattr(a, '_type_equality_funcs'):
+            return # pre 2.7
+        assert a._type_equality_funcs is b._type_equality_funcs
+        assert a._cleanups is b._cleanups
+        # adding to them doesn't change other tests
+        a.addTypeEqualityFunc(int, func)
+        a.addCleanup(func)
+        assert a._type_equality_funcs is not b._type_equality_funcs
+        assert int not in b._type_equality_funcs
+        self.assertEqual(a._cleanups, [(func, (), {})])
+        self.assertEqual(b._cleanups, [])
+
 
 class TestNoseTestWrapper(unittest.TestCase):
     def test_case_fixtures_called(self):
@@ -50,6 +50,47 @@ class TestImporter(unittest.TestCase):
         assert where in sys.path
         # buz has an intra-package import that sets boodle
         assert mod.boodle
-        
+
+    def test_import_cache(self):
+        where = os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                             'support'))
+        found = []
+        imp = nose.importer.Importer()
+        def importPart(part, fqname, path):
+            found.append(fqname)
+            return nose.importer.Importer.importPart(imp, part, fqname, path)
+        imp.importPart = importPart
+        for name in ('foo', 'foo.bar', 'foo.bar.buz'):
+            sys.modules.pop(name, None)
+
+        mod = imp.importFromDir(where, 'foo.bar.buz')
+        self.assertEqual(found, ['foo', 'foo.bar', 'foo.bar.buz'])
+        # the packages and module are found once
+        assert imp.importFromDir(where, 'foo.bar.buz') is mod
+        assert imp.importFromDir(where, 'foo.bar') is sys.modules['foo.bar']
+        self.assertEqual(found, ['foo', 'foo.bar', 'foo.bar.buz'])
+
+        # a module replaced in sys.modules is found again
+        del sys.modules['foo.bar.buz']
+        assert imp.importFromDir(where, 'foo.bar.buz') is not mod
+        self.assertEqual(found, ['foo', 'foo.bar', 'foo.bar.buz',
+                                 'foo.bar.buz'])
+
+    def test_module_paths_cache(self):
+        where = os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                             'support'))
+        imp = nose.importer.Importer()
+        mod = imp.importFromDir(where, 'foo')
+        self.assertEqual(imp.modulePaths(mod), [where])
+        # a change to the package's __path__ is seen
+        path = mod.__path__[:]
+        try:
+            mod.__path__.append(os.path.join(where, 'other', 'foo'))
+            self.assertEqual(imp.modulePaths(mod),
+                             [where, os.path.join(where, 'other')])
+        finally:
+            mod.__path__[:] = path
+        self.assertEqual(imp.modulePaths(mod), [where])
+
 if __name__ == '__main__':
     unittest.main()
@@ -224,6 +224,10 @@ class TestTestLoader(unittest.TestCase):
 
     def setUp(self):
         os.listdir = mock_listdir
+        # directories are listed with the mocked os.listdir
+        self.scandir = getattr(os, 'scandir', None)
+        if self.scandir is not None:
+            del os.scandir
         loader.op_isdir = selector.op_isdir = os.path.isdir = mock_isdir
         loader.op_isfile = selector.op_isfile = os.path.isfile = mock_isfile
         selector.op_exists = os.path.exists = mock_exists
@@ -232,6 +236,8 @@ class TestTestLoader(unittest.TestCase):
 
     def tearDown(self):
         os.listdir = _listdir
+        if self.scandir is not None:
+            os.scandir = self.scandir
         loader.op_isdir = selector.op_isdir = os.path.isdir = _isdir
         loader.op_isfile = selector.op_isfile = os.path.isfile = _isfile
         selector.op_exists = os.path.exists = _exists
@@ -1,26 +1,39 @@
+import os
 import pickle
+import shutil
 import sys
+import tempfile
 import unittest
+from optparse import OptionParser
 
 from nose import case
 from nose.plugins import multiprocess
-from nose.plugins.skip import SkipTest
+from nose.plugins.skip import Skip, SkipTest
 from nose.config import Config
 from nose.loader import TestLoader
+from nose.plugins.base import Plugin
+from nose.plugins.manager import PluginManager
+from nose.proxy import ResultProxyFactory
 try:
     # 2.7+
     from unittest.runner import _WritelnDecorator
 except ImportError:
     from unittest import _WritelnDecorator
+try:
+    from cStringIO import StringIO
+except ImportError:
+    from StringIO import StringIO
 
 
 class ArgChecker:
+    started = []
     def __init__(self, target, args):
         self.target = target
         self.args = args
-        # skip the id and queues
-        pargs = args[4:]
+        # skip the id, queues and shared values
+        pargs = args[6:]
         self.pickled = pickle.dumps(pargs)
+        self.started.append(self)
     def start(self):
         pass
     def is_alive(self):
@@ -53,3 +66,297 @@ def test_mp_process_args_pickleable():
         config=config)
     runner.run(test)
         
+
+
+class Slow(unittest.TestCase):
+    __test__ = False
+    def runTest(self):
+        pass
+
+
+class Fast(unittest.TestCase):
+    __test__ = False
+    def runTest(self):
+        pass
+
+
+def test_mp_batch_generator_not_expanded():
+    made = []
+    def check(i):
+        pass
+    def test_gen():
+        for i in range(1000):
+            made.append(i)
+            yield check, i
+    loader = TestLoader()
+    suite = loader.loadTestsFromGenerator(test_gen, sys.modules[__name__])
+    runner = multiprocess.MultiProcessTestRunner()
+    batches = list(runner.nextBatch(suite))
+    assert batches == [suite], batches
+    assert len(made) <= 2, len(made)
+
+
+def test_timing_store():
+    fd, filename = tempfile.mkstemp()
+    os.close(fd)
+    try:
+        store = multiprocess.TimingStore(filename, '/work')
+        assert store.estimate('/work/a.py') == 0.0
+        store.record('/work/a.py', 4.0)
+        store.record('/work/b.py:T.test', 2.0)
+        store.record('/elsewhere/c.py', 6.0)
+        assert 'a.py' in store.times
+        assert '/elsewhere/c.py' in store.times
+        # unknown addresses get the average
+        assert store.estimate('/work/d.py') == 4.0
+        store.record('/work/a.py', 2.0)
+        assert store.estimate('/work/a.py') == 3.0
+        store.save()
+
+        # same relative addresses under a different working dir
+        loaded = multiprocess.TimingStore(filename, '/other')
+        loaded.load()
+        assert loaded.estimate('/other/a.py') == 3.0
+        addrs = ['/other/b.py:T.test', '/other/new.py', '/other/a.py',
+                 '/elsewhere/c.py']
+        loaded.sortLongestFirst(addrs)
+        assert addrs == ['/elsewhere/c.py', '/other/new.py',
+                         '/other/a.py', '/other/b.py:T.test'], addrs
+    finally:
+        os.unlink(filename)
+
+
+def test_mp_schedule_longest_first():
+    fd, filename = tempfile.mkstemp()
+    os.close(fd)
+    try:
+        slow = case.Test(Slow('runTest'))
+        fast = case.Test(Fast('runTest'))
+        runner = multiprocess.MultiProcessTestRunner()
+        store = multiprocess.TimingStore(filename, runner.config.workingDir)
+        store.record(runner.address(slow), 10.0)
+        store.record(runner.address(fast), 0.5)
+        store.save()
+
+        config = Config()
+        config.multiprocess_workers = 1
+        config.multiprocess_timeout = 0.1
+        config.multiprocess_schedule = 'longest'
+        config.multiprocess_timings = filename
+        runner = multiprocess.MultiProcessTestRunner(
+            stream=_WritelnDecorator(sys.stdout),
+            verbosity=2,
+            loaderClass=TestLoader,
+            config=config)
+        del ArgChecker.started[:]
+        runner.run(unittest.TestSuite([fast, slow]))
+        testQueue = ArgChecker.started[0].args[1]
+        queued = [testQueue.get(timeout=1)[1], testQueue.get(timeout=1)[1]]
+        assert queued == [runner.address(slow), runner.address(fast)], queued
+    finally:
+        os.unlink(filename)
+
+
+def test_affinity_scheduler():
+    runner = multiprocess.MultiProcessTestRunner()
+    addrs = ['/a.py:test_1', '/b.py:test_1', '/a.py:test_2',
+             '/c.py:test_1', ('/b.py:test_2', '/b.py:test_3')]
+    sched = multiprocess.AffinityScheduler(enumerate(addrs), 2,
+                                           runner.moduleKey)
+    # a.py and c.py are dealt to worker 0, b.py to worker 1
+    assert sched.next(0) == (0, '/a.py:test_1', True)
+    assert sched.next(1) == (1, '/b.py:test_1', True)
+    assert sched.next(0) == (2, '/a.py:test_2', False)
+    assert sched.next(1) == (4, ('/b.py:test_2', '/b.py:test_3'), False)
+    # worker 1 is out of work, and steals c.py from worker 0
+    assert sched.next(1) == (3, '/c.py:test_1', False)
+    assert sched.next(0) is None
+    assert sched.next(1) is None
+    assert sched.owners == {0: 0, 1: 1, 2: 0, 3: 1, 4: 1}, sched.owners
+
+
+def test_mp_auto_workers():
+    parser = OptionParser()
+    plugin = multiprocess.MultiProcess()
+    plugin.options(parser, {})
+    options, args = parser.parse_args(['--processes=auto',
+                                       '--process-max-memory=1'])
+    config = Config()
+    plugin.configure(options, config)
+    try:
+        assert plugin.enabled
+        assert config.multiprocess_workers >= 1, config.multiprocess_workers
+        assert config.multiprocess_max_memory == 1024 * 1024
+    finally:
+        multiprocess.MultiProcess.status.pop('active', None)
+
+
+def test_mp_exceeds_memory():
+    mb = 1024 * 1024
+    memoryUsage = multiprocess.memoryUsage
+    peakMemoryUsage = multiprocess.peakMemoryUsage
+    try:
+        # the current size is compared with the limit
+        multiprocess.memoryUsage = lambda: 50 * mb
+        multiprocess.peakMemoryUsage = lambda: 500 * mb
+        assert not multiprocess.exceedsMemory(100 * mb, 10 * mb)
+        assert multiprocess.exceedsMemory(40 * mb, 10 * mb)
+        # without it, the peak's growth since the worker started is
+        multiprocess.memoryUsage = lambda: None
+        assert not multiprocess.exceedsMemory(100 * mb, 450 * mb)
+        assert multiprocess.exceedsMemory(100 * mb, 350 * mb)
+        multiprocess.peakMemoryUsage = lambda: None
+        assert not multiprocess.exceedsMemory(1, 0)
+    finally:
+        multiprocess.memoryUsage = memoryUsage
+        multiprocess.peakMemoryUsage = peakMemoryUsage
+
+
+def test_mp_preload():
+    colorsys = sys.modules.pop('colorsys', None)
+    try:
+        config = Config()
+        config.multiprocess_workers = 1
+        config.multiprocess_timeout = 0.1
+        config.multiprocess_preload = ['colorsys',
+                                       'no_such_module_to_preload']
+        runner = multiprocess.MultiProcessTestRunner(
+            stream=_WritelnDecorator(sys.stdout),
+            verbosity=2,
+            loaderClass=TestLoader,
+            config=config)
+        runner.run(case.Test(T('runTest')))
+        assert 'colorsys' in sys.modules
+    finally:
+        if colorsys is None:
+            sys.modules.pop('colorsys', None)
+        else:
+            sys.modules['colorsys'] = colorsys
+
+
+def test_mp_serve_registers_per_run():
+    config = Config()
+    config.multiprocess_timeout = 0.1
+    config.multiprocess_authkey = 'secret'
+    runner = multiprocess.MultiProcessTestRunner(
+        stream=_WritelnDecorator(sys.stdout), loaderClass=TestLoader,
+        config=config)
+    registry = multiprocess.CoordinatorManager._registry.copy()
+    stopServing = runner.serve(('127.0.0.1', 0), multiprocess.Queue(),
+                               multiprocess.Queue(), multiprocess.Event(),
+                               unittest.TestResult)
+    stopServing()
+    # the shared class still has only the workers' registrations
+    assert multiprocess.CoordinatorManager._registry == registry
+    assert multiprocess.CoordinatorManager._registry[
+        'get_test_queue'][0] is None
+
+
+class Outcomes(unittest.TestCase):
+    __test__ = False
+    def test_pass(self):
+        pass
+    def test_fail(self):
+        assert False, "failed"
+    def test_error(self):
+        raise TypeError("oops")
+    def test_skip(self):
+        raise SkipTest("skipped")
+
+
+class EventRecorder(Plugin):
+    enabled = True
+    name = 'eventrecorder'
+
+    def __init__(self):
+        Plugin.__init__(self)
+        self.events = []
+
+    def startTest(self, test):
+        self.events.append(('start', test.address()))
+
+    def addError(self, test, err):
+        self.events.append(('error', err[0]))
+
+    def addFailure(self, test, err):
+        self.events.append(('failure', err[0]))
+
+    def addSuccess(self, test):
+        self.events.append(('success', test.id()))
+
+
+def test_mp_stream_events():
+    config = Config()
+    result = multiprocess.TextTestResult(
+        _WritelnDecorator(StringIO()), descriptions=1, verbosity=1,
+        config=config)
+    Skip().prepareTestResult(result)
+    events = []
+    multiprocess.streamEvents(result, events.append)
+    for name in ('test_pass', 'test_fail', 'test_error', 'test_skip'):
+        case.Test(Outcomes(name), config=config,
+                  resultProxy=ResultProxyFactory(config=config))(result)
+    kinds = [e[0] for e in events]
+    # python 2.7's unittest reports SkipTest through addSkip
+    assert kinds[10] in ('error', 'skip'), kinds
+    kinds[10] = 'skip'
+    assert kinds == [
+        'start', 'success', 'stop', 'start', 'failure', 'stop',
+        'start', 'error', 'stop', 'start', 'skip', 'stop'], kinds
+    # events must survive the trip through the result queue
+    events = pickle.loads(pickle.dumps(events))
+
+    recorder = EventRecorder()
+    stream = _WritelnDecorator(StringIO())
+    parent_config = Config(plugins=PluginManager(plugins=[recorder]))
+    runner = multiprocess.MultiProcessTestRunner(
+        stream=stream, config=parent_config)
+    parent = runner._makeResult()
+    running = {}
+    entries = {}
+    for event in events:
+        event = runner.unpack(entries, 0, event)
+        runner.replay(parent, runner.hold(running, 0, event))
+    assert stream.getvalue() == '.FES', stream.getvalue()
+    assert parent.testsRun == 4
+    assert len(parent.failures) == 1
+    assert len(parent.errors) == 1
+    assert 'TypeError: oops' in parent.errors[0][1]
+    storage, label, isfail = parent.errorClasses[SkipTest]
+    assert label == 'SKIP' and len(storage) == 1
+    assert recorder.events[0][0] == 'start'
+    assert recorder.events[0][1][2] == 'Outcomes.test_pass', recorder.events
+    assert ('failure', AssertionError) in recorder.events
+    assert ('error', TypeError) in recorder.events
+    assert ('error', SkipTest) in recorder.events
+
+
+def test_mp_pack_entries():
+    runner = multiprocess.MultiProcessTestRunner()
+    runner.spoolDir = tempfile.mkdtemp()
+    try:
+        sent = {}
+        big = 'x' * (multiprocess.SPOOL_SIZE + 1)
+        spool = os.path.join(runner.spoolDir, '3')
+        packed = [multiprocess.packEntry(entry, sent, spool=spool)
+                  for entry in ('Traceback: oops', big, 'Traceback: oops',
+                                big)]
+        assert packed[0] == 'Traceback: oops'
+        assert packed[1][0] == 'file' and os.path.exists(packed[1][1]), packed
+        assert packed[2:] == [0, 1], packed
+        received = {}
+        unpacked = []
+        for entry in packed:
+            event = ('error', None, '', ((TypeError, 'oops', None), 'errors',
+                                         entry))
+            unpacked.append(runner.unpack(received, 3, event)[3][2])
+        assert unpacked == ['Traceback: oops', big, 'Traceback: oops', big]
+        assert not os.path.exists(packed[1][1])
+        # entries of an abandoned task are removed unread
+        unread = multiprocess.packEntry(
+            big, {}, spool=os.path.join(runner.spoolDir, '4'))
+        assert os.path.exists(unread[1])
+        runner.removeSpool(4)
+        assert not os.path.exists(unread[1])
+    finally:
+        shutil.rmtree(runner.spoolDir)
@@ -115,6 +115,31 @@ class TestMultiProcessTestRunner(unittest.TestCase):
         print tests
         self.assertEqual(len(tests), 3)
         
+
+    def test_make_chunks_groups_by_module(self):
+        r = multiprocess.MultiProcessTestRunner()
+        addrs = ['/a/test_x.py:T.test_1', '/a/test_y.py:test_1',
+                 '/a/test_x.py:T.test_2', '/a/test_x.py:test_3',
+                 '/a/test_y.py:test_2', 'mod:test_1', '/a/test_z.py']
+        self.assertEqual(r.makeChunks(addrs[:]), addrs)
+        r.config.multiprocess_chunk_size = 2
+        self.assertEqual(r.makeChunks(addrs),
+                         [('/a/test_x.py:T.test_1', '/a/test_x.py:T.test_2'),
+                          '/a/test_x.py:test_3',
+                          ('/a/test_y.py:test_1', '/a/test_y.py:test_2'),
+                          'mod:test_1',
+                          '/a/test_z.py'])
+
+    def test_make_chunks_auto(self):
+        r = multiprocess.MultiProcessTestRunner()
+        r.config.multiprocess_chunk_size = 'auto'
+        r.config.multiprocess_workers = 2
+        addrs = ['/a/test_x.py:test_%s' % i for i in range(20)]
+        chunks = r.makeChunks(addrs)
+        self.assertEqual(len(chunks), 10)
+        self.assertEqual(chunks[0], ('/a/test_x.py:test_0',
+                                     '/a/test_x.py:test_1'))
+
             
 if __name__ == '__main__':
     unittest.main()
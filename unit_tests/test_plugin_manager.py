@@ -1,6 +1,22 @@
+import os
+import shutil
+import tempfile
 import unittest
+from StringIO import StringIO
 from nose import case
+from nose.config import Config
+from nose.exc import SkipTest
 from nose.plugins import Plugin, PluginManager
+from nose.plugins.manager import EntryPointPluginManager, \
+    defaultCacheFile, distributionStamp, have_setuptools, readCache, \
+    writeCache
+try:
+    import json
+except ImportError:
+    try:
+        import simplejson as json
+    except ImportError:
+        json = None
 
 
 class Plug(Plugin):
@@ -70,5 +86,132 @@ class TestPluginManager(unittest.TestCase):
         self.assertEqual(len(pm.plugins), 1)
         assert isinstance(pm.plugins[0], BetterPlug2)
 
+    def test_bound_calls(self):
+        one = Plug()
+        pm = PluginManager(plugins=[one])
+        # no plugin implements it: nothing to call
+        self.assertEqual(pm.addSuccess(None), None)
+        self.assertEqual(pm.loadTestsFromDir('foo'), [])
+        self.assertEqual(pm.implementers('addSuccess'), [])
+        # one plugin implements it: called directly
+        self.assertEqual(pm.addError, one.addError)
+        self.assertEqual([p for p, meth in pm.implementers('addError')],
+                         [one])
+        # changing the plugins unbinds the calls
+        two = Plug2()
+        pm.plugins = [two, one]
+        self.assertEqual(len(pm.implementers('addError')), 2)
+        self.assertRaises(AssertionError, pm.addError, None, None)
+        one.score = 200
+        pm.sort()
+        self.assertEqual(pm.addError(None, None), True)
+
+    def test_plugin_profile(self):
+        class Options:
+            pass
+        one = Plug()
+        one.enabled = True
+        fd, filename = tempfile.mkstemp()
+        os.close(fd)
+        stream = StringIO()
+        pm = PluginManager(plugins=[one])
+        pm.configure(Options(), Config(pluginProfile=True, stream=stream,
+                                       pluginProfileFile=filename))
+        try:
+            for i in range(3):
+                pm.addError(None, None)
+            list(pm.loadTestsFromFile('foo'))
+            pm.finalize(None)
+            report = stream.getvalue().splitlines()
+            self.assertEqual(report[1].split(),
+                             ['Plugin', 'call', 'calls', 'wall', '(s)',
+                              'cpu', '(s)'])
+            self.assertEqual(sorted([line.split()[:2]
+                                     for line in report[3:5]]),
+                             [['plug.addError', '3'],
+                              ['plug.loadTestsFromFile', '1']])
+            self.assertEqual(report[-1].split()[:2], ['Total', '4'])
+            if json is not None:
+                f = open(filename)
+                try:
+                    stats = json.load(f)
+                finally:
+                    f.close()
+                self.assertEqual(
+                    sorted([(s['call'], s['calls']) for s in stats]),
+                    [('addError', 3), ('loadTestsFromFile', 1)])
+        finally:
+            if os.path.exists(filename):
+                os.unlink(filename)
+
+class TestEntryPointCache(unittest.TestCase):
+
+    def setUp(self):
+        self.env = os.environ.pop('NOSE_PLUGIN_CACHE', None)
+        fd, self.filename = tempfile.mkstemp()
+        os.close(fd)
+        self.entries = [('nose.plugins.0.10', 'plug', __name__, ('Plug',))]
+
+    def tearDown(self):
+        if self.env is not None:
+            os.environ['NOSE_PLUGIN_CACHE'] = self.env
+        if os.path.exists(self.filename):
+            os.unlink(self.filename)
+
+    def loaded(self):
+        pm = EntryPointPluginManager()
+        pm.cacheFile = self.filename
+        pm.loadPlugins()
+        return [p.__class__ for p in pm.plugins]
+
+    def test_cached_entry_points(self):
+        writeCache(self.filename, [(distributionStamp(), self.entries)])
+        self.assertEqual(self.loaded(), [Plug])
+
+    def test_out_of_date_cache(self):
+        if not have_setuptools:
+            raise SkipTest("setuptools is not available")
+        stamp = distributionStamp()
+        other = [('/elsewhere',)]
+        writeCache(self.filename, [([stamp[0]], self.entries),
+                                   (other, self.entries)])
+        assert Plug not in self.loaded()
+        cached = readCache(self.filename)
+        # the entry for this sys.path is replaced; others are kept
+        self.assertEqual([entry_stamp for entry_stamp, entries in cached],
+                         [stamp, other])
+        assert self.entries[0] not in cached[0][1]
+
+    def test_default_cache_file(self):
+        xdg = os.environ.get('XDG_CACHE_HOME')
+        try:
+            os.environ['XDG_CACHE_HOME'] = '/xdg'
+            self.assertEqual(defaultCacheFile(),
+                             os.path.join('/xdg', 'nose', 'plugins'))
+            os.environ['XDG_CACHE_HOME'] = ''
+            self.assertEqual(defaultCacheFile(),
+                             os.path.join(os.path.expanduser('~'), '.cache',
+                                          'nose', 'plugins'))
+        finally:
+            if xdg is None:
+                os.environ.pop('XDG_CACHE_HOME', None)
+            else:
+                os.environ['XDG_CACHE_HOME'] = xdg
+
+    def test_unwritable_cache(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            # the cache directory is made if it is missing
+            filename = os.path.join(tmpdir, 'nose', 'plugins')
+            writeCache(filename, [(distributionStamp(), self.entries)])
+            self.assertEqual(len(readCache(filename)), 1)
+            # a file where the directory should be can't be written
+            # through; that is logged, not raised
+            filename = os.path.join(filename, 'plugins')
+            writeCache(filename, [(distributionStamp(), self.entries)])
+            self.assertEqual(readCache(filename), [])
+        finally:
+            shutil.rmtree(tmpdir)
+
 if __name__ == '__main__':
     unittest.main()
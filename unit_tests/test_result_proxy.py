@@ -160,5 +160,40 @@ class TestResultProxy(unittest.TestCase):
         assert proxy.shouldStop
         assert res.shouldStop
             
+    def test_proxies_are_reused(self):
+        from nose.case import Test
+        seen = []
+        class TC(unittest.TestCase):
+            def run(self, result):
+                seen.append((result, result.test))
+                unittest.TestCase.run(self, result)
+            def runTest(self):
+                pass
+        factory = ResultProxyFactory()
+        res = unittest.TestResult()
+        cases = [Test(TC(), resultProxy=factory) for i in range(3)]
+        for case in cases:
+            case(res)
+        self.assertEqual(res.testsRun, 3)
+        assert seen[0][0] is seen[1][0] is seen[2][0]
+        self.assertEqual([test for proxy, test in seen], cases)
+        # a proxy in use is not handed out again
+        proxy = factory(res, cases[0])
+        assert factory(res, cases[1]) is not proxy
+        
+    def test_test_checked_when_debugging(self):
+        from nose.case import Test
+        class TC(unittest.TestCase):
+            def runTest(self):
+                pass
+        case = Test(TC())
+        other = Test(TC())
+        res = unittest.TestResult()
+        ResultProxy(res, case, checkTests=False).addSuccess(other)
+        proxy = ResultProxy(res, case, checkTests=True)
+        proxy.addSuccess(case)
+        proxy.addSuccess(case.test)
+        self.assertRaises(AssertionError, proxy.addSuccess, other)
+
 if __name__ == '__main__':
     unittest.main()
@@ -45,6 +45,42 @@ class TestSelector(unittest.TestCase):
         assert not s.matches('toyota')
         assert s2.matches('toyota')
         
+    def test_many_patterns(self):
+        c = Config()
+        c.include = [re.compile(r'^check'), re.compile(r'(?i)^VERIFY')]
+        c.exclude = [re.compile(r'slow'), re.compile(r'(\w)\1{2}'),
+                     re.compile(r'(?P<x>net)'), re.compile(r'(?P<x>db)')]
+        s = Selector(c)
+        assert s.matches('test_foo')
+        assert s.matches('check_foo')
+        assert s.matches('verify_foo')
+        assert not s.matches('foo')
+        assert not s.matches('test_slow')
+        assert not s.matches('check_zzz')
+        assert s.matches('check_zz')
+        assert not s.matches('test_net')
+        assert not s.matches('test_db')
+        # names are remembered until the patterns change
+        assert s.matches('test_fast')
+        c.exclude.append(re.compile('fast'))
+        assert not s.matches('test_fast')
+        s.match = re.compile('^foo')
+        s.compilePatterns()
+        assert s.matches('foo')
+        assert not s.matches('test_foo')
+
+    def test_conditional_patterns(self):
+        # a conditional group reference can't be combined with other
+        # patterns, as its group number would change
+        c = Config()
+        c.exclude = [re.compile(r'(s)low'), re.compile(r'_(x)?y(?(1)z|w)$')]
+        s = Selector(c)
+        assert isinstance(s._excluded, nose.selector.AnyOf)
+        assert not s.matches('test_xyz')
+        assert not s.matches('test_yw')
+        assert not s.matches('test_slow')
+        assert s.matches('test_xyw')
+
     def test_want_class(self):
         class Foo:
             pass
@@ -152,6 +188,83 @@ class TestSelector(unittest.TestCase):
         assert not s.wantMethod(Baz.test_not_test), \
                "Failed to respect __test__ = False"
         
+    def test_remembered_answers(self):
+        from nose.plugins import Plugin
+        from nose.plugins.manager import PluginManager
+        class Asked(Plugin):
+            enabled = True
+            def __init__(self):
+                Plugin.__init__(self)
+                self.asked = []
+            def wantMethod(self, method):
+                self.asked.append(method.__name__)
+        class Pure(Asked):
+            pureWants = True
+        class Mixin:
+            def test_shared(self):
+                pass
+        class TestA(Mixin):
+            pass
+        class TestB(Mixin):
+            pass
+
+        pure = Pure()
+        s = Selector(Config(plugins=PluginManager(plugins=[pure])))
+        assert s.wantMethod(TestA.test_shared)
+        assert s.wantMethod(TestA.test_shared)
+        self.assertEqual(pure.asked, ['test_shared'])
+        # the class the method was found in may change the answer
+        assert s.wantMethod(TestB.test_shared)
+        self.assertEqual(pure.asked, ['test_shared', 'test_shared'])
+        # a change to __test__ is seen
+        Mixin.__dict__['test_shared'].__test__ = False
+        assert not s.wantMethod(TestB.test_shared)
+        self.assertEqual(pure.asked, ['test_shared'] * 3)
+
+        asked = Asked()
+        s = Selector(Config(plugins=PluginManager(plugins=[pure, asked])))
+        assert not s.wantMethod(TestA.test_shared)
+        assert not s.wantMethod(TestB.test_shared)
+        self.assertEqual(asked.asked, ['test_shared', 'test_shared'])
+
+    def test_remembered_answers_attrib(self):
+        from nose.plugins.attrib import AttributeSelector, attr
+        from nose.plugins.manager import PluginManager
+        class TestFast:
+            def test_quick(self):
+                pass
+            test_quick = attr('fast')(test_quick)
+            def test_slow(self):
+                pass
+        plug = AttributeSelector()
+        plug.enabled = True
+        plug.attribs = [[('fast', True)]]
+        asked = []
+        def wantMethod(method, want=plug.wantMethod):
+            asked.append(method.__name__)
+            return want(method)
+        plug.wantMethod = wantMethod
+        s = Selector(Config(plugins=PluginManager(plugins=[plug])))
+        for i in range(2):
+            assert s.wantMethod(TestFast.test_quick)
+            assert not s.wantMethod(TestFast.test_slow)
+        self.assertEqual(asked, ['test_quick', 'test_slow'])
+
+    def test_remembered_answers_are_weak(self):
+        import gc
+        s = Selector(Config())
+        class TestGone:
+            def test_gone(self):
+                pass
+        assert s.wantClass(TestGone)
+        assert s.wantMethod(TestGone.test_gone)
+        self.assertEqual(len(s.answers('wantClass')), 1)
+        self.assertEqual(len(s.answers('wantMethod')), 1)
+        del TestGone
+        gc.collect()
+        self.assertEqual(len(s.answers('wantClass')), 0)
+        self.assertEqual(len(s.answers('wantMethod')), 0)
+
     def test_want_module(self):
         m = mod('whatever')
         m2 = mod('this.that')
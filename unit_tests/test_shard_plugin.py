@@ -0,0 +1,43 @@
+import unittest
+from nose.plugins.multiprocess import TimingStore
+from nose.plugins.shard import Shard
+
+
+class TestShardPlugin(unittest.TestCase):
+
+    def shard(self, index, count):
+        sh = Shard()
+        sh.index = index
+        sh.count = count
+        sh.timings = TimingStore(None, '/work')
+        return sh
+
+    def test_hash_is_stable(self):
+        sh = self.shard(1, 4)
+        # crc32 of the key, so the same on every machine
+        self.assertEqual(sh.hash('test_funcs.py:test_a'), 3)
+        self.assertEqual([sh.hash('mod%s.py' % i) for i in range(8)],
+                         [0, 1, 3, 2, 3, 2, 0, 1])
+
+    def test_balance_by_duration(self):
+        keys = ['a.py', 'b.py', 'c.py', 'd.py', 'e.py']
+        times = {'a.py': 10.0, 'b.py': 6.0, 'c.py': 5.0, 'd.py': 1.0}
+        shards = []
+        for index in (1, 2):
+            sh = self.shard(index, 2)
+            sh.timings.times = times.copy()
+            shards.append(sh.balance(keys))
+        one, two = shards
+        # longest first, each to the shard with less to do: a (10) | b
+        # (6), e (the average, 5.5) | c (5) | d (1)
+        self.assertEqual(sorted(one.keys()), ['a.py', 'c.py'])
+        self.assertEqual(sorted(two.keys()), ['b.py', 'd.py', 'e.py'])
+
+    def test_balance_without_timings_is_round_robin(self):
+        keys = ['a.py', 'b.py', 'c.py', 'd.py']
+        sh = self.shard(2, 2)
+        self.assertEqual(sorted(sh.balance(keys).keys()), ['b.py', 'd.py'])
+
+
+if __name__ == '__main__':
+    unittest.main()
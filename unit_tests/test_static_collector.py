@@ -0,0 +1,133 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from nose.config import Config
+from nose.plugins.skip import SkipTest
+from nose import static
+
+
+class TestStaticCollector(unittest.TestCase):
+
+    def setUp(self):
+        if static.ast is None:
+            raise SkipTest("ast module not available")
+        self.dir = tempfile.mkdtemp()
+        self.collector = static.StaticCollector(Config())
+
+    def tearDown(self):
+        sys.modules.pop('test_mod', None)
+        shutil.rmtree(self.dir)
+
+    def collect(self, source):
+        filename = os.path.join(self.dir, 'test_mod.py')
+        f = open(filename, 'w')
+        try:
+            f.write(source)
+        finally:
+            f.close()
+        tests = self.collector.collect(filename)
+        if tests is None:
+            return None
+        for test in tests:
+            assert test.address()[0] == filename
+            assert test.address()[1] == 'test_mod'
+        return [str(test) for test in tests]
+
+    def test_functions_and_classes(self):
+        names = self.collect('''
+import unittest
+from unittest import TestCase
+from nose.tools import istest, nottest, with_setup
+
+def test_z():
+    """Docstring"""
+
+def test_a():
+    def inner():
+        yield 1
+
+def helper():
+    pass
+
+@istest
+def check():
+    pass
+
+@nottest
+def test_skipped():
+    pass
+
+@with_setup(helper)
+def test_fixture():
+    pass
+
+class TestPlain(object):
+    def test_2(self):
+        pass
+    def test_1(self):
+        pass
+    def helper(self):
+        pass
+
+class Case(unittest.TestCase):
+    def test_x(self):
+        pass
+
+class Derived(Case):
+    def test_y(self):
+        pass
+
+class _Private(TestCase):
+    def test_p(self):
+        pass
+
+class TestOff:
+    __test__ = False
+    def test_o(self):
+        pass
+''')
+        self.assertEqual(names, [
+            'test_x (test_mod.Case)',
+            'test_x (test_mod.Derived)',
+            'test_y (test_mod.Derived)',
+            'test_mod.TestPlain.test_1',
+            'test_mod.TestPlain.test_2',
+            'test_mod.test_z',
+            'test_mod.test_a',
+            'test_mod.check',
+            'test_mod.test_fixture'])
+
+    def test_dynamic_modules(self):
+        for source in (
+            'def test_gen():\n    yield None\n',
+            'class TestG:\n    def test_gen(self):\n        yield None\n',
+            'from helpers import *\n',
+            'from helpers import test_shared\n',
+            'from helpers import Base\nclass TestB(Base):\n    pass\n',
+            'import deco\n@deco.attr\ndef test_d():\n    pass\n',
+            'def check():\n    pass\ntest_alias = check\n',
+            'try:\n    def test_t():\n        pass\nexcept:\n    pass\n',
+            'class TestM:\n    __metaclass__ = type\n',
+            '__test__ = False\n',
+            'def test_broken(:\n'):
+            self.assertEqual(self.collect(source), None, source)
+
+    def test_address_round_trip(self):
+        from nose.loader import TestLoader
+        self.collect('class TestPlain:\n    def test_1(self):\n'
+                     '        pass\n\ndef test_f():\n    pass\n')
+        filename = os.path.join(self.dir, 'test_mod.py')
+        tests = self.collector.collect(filename)
+        loader = TestLoader()
+        for test in tests:
+            filename, module, call = test.address()
+            loaded = list(loader.loadTestsFromName(
+                '%s:%s' % (filename, call)))
+            self.assertEqual(len(loaded), 1)
+            self.assertEqual(loaded[0].id(), test.id())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from nose.config import Config
+from nose.selector import Selector
+from nose.watch import Watcher
+
+
+def write(path, text):
+    f = open(path, 'w')
+    try:
+        f.write(text)
+    finally:
+        f.close()
+    # make sure the change is seen, however coarse the file system's
+    # timestamps are
+    later = os.stat(path).st_mtime + 10
+    os.utime(path, (later, later))
+
+
+class TestWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.names = ('watch_helper', 'watch_other', 'test_watch_a',
+                      'test_watch_b', 'test_watch_c')
+        self.path('watch_helper', "def help():\n    return 1\n")
+        self.path('watch_other', "X = 1\n")
+        self.path('test_watch_a', "from watch_helper import help\n"
+                  "def test():\n    assert help()\n")
+        self.path('test_watch_b', "import watch_other\n"
+                  "def test():\n    pass\n")
+        sys.path.insert(0, self.dir)
+        for name in self.names:
+            sys.modules.pop(name, None)
+        __import__('test_watch_a')
+        __import__('test_watch_b')
+        self.watcher = Watcher([self.dir], Selector(Config()))
+        self.watcher.interval = 0
+
+    def tearDown(self):
+        sys.path.remove(self.dir)
+        for name in self.names:
+            sys.modules.pop(name, None)
+        shutil.rmtree(self.dir)
+
+    def path(self, name, text=None):
+        path = os.path.join(self.dir, name + '.py')
+        if text is not None:
+            write(path, text)
+        return path
+
+    def test_dependencies(self):
+        self.watcher.snapshot()
+        self.assertEqual(sorted(self.watcher.modules.keys()),
+                         ['test_watch_a', 'test_watch_b', 'watch_helper',
+                          'watch_other'])
+        self.assertEqual(self.watcher.dependents,
+                         {'watch_helper': ['test_watch_a'],
+                          'watch_other': ['test_watch_b']})
+
+    def test_change_to_dependency(self):
+        self.watcher.snapshot()
+        self.assertEqual(self.watcher.changes(), [])
+        self.path('watch_helper', "def help():\n    return 0\n")
+        self.assertEqual(self.watcher.wait(), [self.path('test_watch_a')])
+        # the changed module and its dependents are imported again;
+        # the rest are reused
+        assert 'watch_helper' not in sys.modules
+        assert 'test_watch_a' not in sys.modules
+        assert 'test_watch_b' in sys.modules
+        assert 'watch_other' in sys.modules
+
+    def test_new_and_broken_test_modules(self):
+        self.watcher.snapshot()
+        self.path('test_watch_c', "def test(:\n")
+        self.path('test_watch_b', "def test():\n    pass\n")
+        self.assertEqual(self.watcher.wait(), [self.path('test_watch_b'),
+                                               self.path('test_watch_c')])
+        # changes to modules that no test depends on run nothing
+        self.path('watch_unused', "Y = 1\n")
+        self.assertEqual(self.watcher.affected(self.watcher.changes()), [])
+        # a module that could not be imported is run again when it changes
+        self.watcher.snapshot()
+        self.path('test_watch_c', "def test():\n    pass\n")
+        self.assertEqual(self.watcher.wait(), [self.path('test_watch_c')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@
 import sys
 import os
 import optparse
+import re
 import unittest
 from xml.sax import saxutils
 
@@ -287,3 +288,25 @@ class TestXMLOutputWithXML(unittest.TestCase):
             assert ('<testcase classname="test_xunit.TC" '
                     'name="runTest" time="0" />') in result
 
+    def test_overlapping_tests(self):
+        # tests replayed from multiprocess workers overlap
+        import nose.plugins.xunit
+        now = [100.0]
+        orig_time = nose.plugins.xunit.time
+        nose.plugins.xunit.time = lambda: now[0]
+        try:
+            a = mktest()
+            b = mktest()
+            self.x.startTest(a)
+            now[0] += 2
+            self.x.startTest(b)
+            now[0] += 1
+            self.x.addSuccess(a, (None,None,None))
+            self.x.stopTest(a)
+            now[0] += 4
+            self.x.addSuccess(b, (None,None,None))
+            self.x.stopTest(b)
+        finally:
+            nose.plugins.xunit.time = orig_time
+        result = self.get_xml_report()
+        eq_(re.findall(r'time="(\d+)"', result), ['3', '5'])